@@ -2,36 +2,84 @@ import streamlit as st
 import pandas as pd
 import subprocess
 import os
-from src.config import DEFAULT_TOWNS, DEFAULT_ZIPS, DEFAULT_MAX_PAGES
+from src.config import DEFAULT_TOWNS, DEFAULT_ZIPS, DEFAULT_MAX_PAGES, CONTACTS_DB_PATH
 
 import sys
 
-# Ensure Playwright browsers are installed
-if not os.path.exists(os.path.expanduser("~/.cache/ms-playwright")):
-    try:
+from src.scraper_manager import ScraperManager
+from src.connectors import CONNECTORS, create_connector
+from src.worker import ScrapeWorker
+from src.progress import DONE, CANCELLED
+from src.cache import ResultCache, ResultSet
+from src.contact_store import ContactQuery, ContactStore
+from src.browser import SharedBrowser
+from src.planner import Gazetteer
+import time
+from dataclasses import replace
+
+POLL_INTERVAL = 1.0  # seconds between UI refreshes while a scrape is running
+
+
+@st.cache_resource
+def ensure_playwright_browsers():
+    """Install Chromium once per server process instead of checking on every rerun."""
+    if not os.path.exists(os.path.expanduser("~/.cache/ms-playwright")):
         subprocess.run([sys.executable, "-m", "playwright", "install", "chromium"], check=True)
+    return True
+
+
+@st.cache_resource
+def get_gazetteer() -> Gazetteer:
+    return Gazetteer.load()
+
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    return ResultCache()
+
+
+@st.cache_resource
+def get_shared_browser() -> SharedBrowser:
+    return SharedBrowser()
+
+
+@st.cache_resource
+def get_contact_store() -> ContactStore:
+    return ContactStore(CONTACTS_DB_PATH)
+
+
+def shared_browser_endpoint():
+    """Endpoint of the app-wide browser, or None to let each scrape launch its own."""
+    try:
+        return get_shared_browser().start()
     except Exception as e:
-        st.error(f"Failed to install Playwright browsers: {e}")
+        st.warning(f"Shared browser unavailable, scrapes will launch their own: {e}")
+        return None
 
-from src.scraper_manager import ScraperManager
-from src.connectors.compass import CompassConnector
-from src.connectors.coldwell_banker import CBConnector
-from src.connectors.long_and_foster import LongAndFosterConnector
-from src.connectors.bhhs import BHHSConnector
-from src.utils import setup_logger
-import time
-from loguru import logger
 
 # Initialize session state
 if "results" not in st.session_state:
     st.session_state["results"] = None
-if "logs" not in st.session_state:
-    st.session_state["logs"] = []
+if "result_set" not in st.session_state:
+    st.session_state["result_set"] = None
+if "cache_key" not in st.session_state:
+    st.session_state["cache_key"] = None
+if "worker" not in st.session_state:
+    st.session_state["worker"] = None
+if "agents_offset" not in st.session_state:
+    st.session_state["agents_offset"] = 0
+if "finalized" not in st.session_state:
+    st.session_state["finalized"] = False
 
 st.set_page_config(page_title="Real Estate Agent Scraper", layout="wide")
 
 st.title("🏡 JOJ Real Estate Agent Scraper")
 
+try:
+    ensure_playwright_browsers()
+except Exception as e:
+    st.error(f"Failed to install Playwright browsers: {e}")
+
 with st.expander("ℹ️ How to Use & ChatGPT Prompt Helper"):
     st.markdown("""
     ### How to Use
@@ -58,6 +106,9 @@ with st.expander("ℹ️ How to Use & ChatGPT Prompt Helper"):
 with st.sidebar:
     st.header("Configuration")
     
+    area_choice = st.selectbox("Area (expands to its towns)", ["(none)"] + get_gazetteer().areas())
+    area = None if area_choice == "(none)" else area_choice
+
     towns_input = st.text_area("Towns (Format: 'Town, State' - one per line)", "\n".join(DEFAULT_TOWNS))
     zips_input = st.text_area("Zip Codes (comma-separated)", ", ".join(DEFAULT_ZIPS))
     
@@ -65,29 +116,20 @@ with st.sidebar:
     
     st.subheader("Sources")
     st.info("ℹ️ **Dynamic Search:** Connectors will search based on your 'Town, State' input. No default results are provided.")
-    use_compass = st.checkbox("Compass", value=True)
-    use_cb = st.checkbox("Coldwell Banker", value=True)
-    use_lf = st.checkbox("Long & Foster", value=True)
-    use_bhhs = st.checkbox("BHHS", value=True)
+    selected_sources = [name for name, info in CONNECTORS.items() if st.checkbox(info.label, value=info.default)]
     
     output_file = st.text_input("Output Filename", "contacts.csv")
+
+    force_refresh = st.checkbox("Ignore cached results", value=False)
     
     run_btn = st.button("Run Scraper", type="primary")
     
-    st.caption("Note: To stop the scraping process, use the 'Stop' button in the top-right corner of the app.")
-
-# Log Display Area
-st.subheader("📋 Progress Logs")
-log_placeholder = st.empty()
+    st.caption("Note: Scrapes run in the background. Use 'Cancel Scrape' below the progress bars to stop early.")
 
-if st.session_state["logs"]:
-    log_placeholder.code("".join(st.session_state["logs"][-20:]))
+worker = st.session_state["worker"]
+is_running = worker is not None and worker.is_alive()
 
-if run_btn:
-    # Clear previous state
-    st.session_state["logs"] = []
-    st.session_state["results"] = None
-    
+if run_btn and not is_running:
     # Split by newline to handle "Town, State" correctly
     towns = [t.strip() for t in towns_input.split("\n") if t.strip()]
     zips = [z.strip() for z in zips_input.split(",")]
@@ -97,67 +139,140 @@ if run_btn:
     invalid_towns = [t for t in towns if "," not in t]
 
     if invalid_towns:
-        if not valid_towns:
+        if not valid_towns and not area:
             st.error("❌ **Input Error:** All provided towns are missing state codes. Please format them as '**Town, State**' (e.g., 'Ridgewood, NJ').")
             st.stop()
         else:
             st.warning(f"⚠️ Skipping invalid inputs: {', '.join(invalid_towns)}. Please use 'Town, State' format.")
 
-    # Define custom sink for Streamlit
-    def streamlit_sink(message):
-        st.session_state["logs"].append(message)
-        log_placeholder.code("".join(st.session_state["logs"][-20:]))
+    cache_key = ResultCache.make_key(towns + ([f"area:{area}"] if area else []), zips, selected_sources, max_pages)
+    cached = None if force_refresh else get_result_cache().get(cache_key)
 
-    # Reset logger to output to our custom sink
-    logger.remove()
-    logger.add(streamlit_sink, format="{time:HH:mm:ss} | {level} | {message}")
-    
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    manager = ScraperManager(towns, zips, max_pages, output_file)
+    if cached is not None:
+        st.session_state["worker"] = None
+        st.session_state["results"] = None
+        st.session_state["result_set"] = cached
+        worker = None
+        age_minutes = int((time.time() - cached.created_at) / 60)
+        st.info(f"Loaded {len(cached)} cached agents from a run {age_minutes} min ago. Tick 'Ignore cached results' to re-scrape.")
+        run_btn = False
+
+if run_btn and not is_running:
+    manager = ScraperManager(valid_towns, zips, max_pages, output_file, browser_endpoint=shared_browser_endpoint(), area=area,
+                             contacts_path=CONTACTS_DB_PATH)
     
-    if use_compass:
-        manager.add_connector(CompassConnector())
-        
-    if use_cb:
-        manager.add_connector(CBConnector())
-
-    if use_lf:
-        manager.add_connector(LongAndFosterConnector())
-
-    if use_bhhs:
-        manager.add_connector(BHHSConnector())
-        
-    try:
-        status_text.text("Scraping in progress...")
-        manager.run() # This blocks
-        progress_bar.progress(100)
-        status_text.text("Done!")
-        
-        if manager.agents:
-            df = pd.DataFrame([a.to_dict() for a in manager.agents])
-            st.session_state["results"] = df
-            st.success(f"Scraping completed! Found {len(manager.agents)} agents.")
-        else:
+    for source in selected_sources:
+        manager.add_connector(create_connector(source))
+
+    # The scrape runs in its own thread so this script run returns immediately
+    worker = ScrapeWorker(manager)
+    worker.start()
+    st.session_state["worker"] = worker
+    st.session_state["results"] = None
+    st.session_state["result_set"] = None
+    st.session_state["cache_key"] = cache_key
+    st.session_state["agents_offset"] = 0
+    st.session_state["finalized"] = False
+    is_running = True
+
+if worker is not None:
+    progress = worker.progress
+
+    st.subheader("⏳ Progress")
+    for connector in progress.snapshot():
+        label = f"{connector.name}: {connector.status} · {connector.agents} agents"
+        if connector.pages_total:
+            label += f" · {connector.pages_done}/{connector.pages_total} pages"
+        if connector.error:
+            label += f" · {connector.error}"
+        st.progress(connector.fraction, text=label)
+
+    if is_running:
+        if st.button("Cancel Scrape"):
+            worker.cancel()
+            st.info("Cancelling... connectors stop at their next checkpoint.")
+
+    # Log Display Area
+    st.subheader("📋 Progress Logs")
+    st.code("".join(progress.logs(20)))
+
+    # Append only the agents yielded since the last poll
+    new_agents, offset = progress.agents_since(st.session_state["agents_offset"])
+    if new_agents:
+        new_rows = pd.DataFrame([a.to_dict() for a in new_agents])
+        current = st.session_state["results"]
+        st.session_state["results"] = new_rows if current is None else pd.concat([current, new_rows], ignore_index=True)
+        st.session_state["agents_offset"] = offset
+
+    if not is_running and progress.finished and not st.session_state["finalized"]:
+        st.session_state["finalized"] = True
+        # Swap the streamed raw rows for the deduplicated final set
+        if worker.manager.agents:
+            if progress.status == DONE:
+                result_set = get_result_cache().put(st.session_state["cache_key"], worker.manager.agents)
+            else:
+                # Partial runs are shown but never cached
+                result_set = ResultSet(worker.manager.agents)
+            st.session_state["result_set"] = result_set
+            st.session_state["results"] = None
+            if progress.status == DONE:
+                st.success(f"Scraping completed! Found {len(worker.manager.agents)} agents.")
+            elif progress.status == CANCELLED:
+                st.warning(f"Scraping cancelled. Kept {len(worker.manager.agents)} agents.")
+        elif progress.status in (DONE, CANCELLED):
             st.warning("No agents found.")
-            
-    except Exception as e:
-        st.error(f"An error occurred: {e}")
-        logger.error(f"Error: {e}")
+        if progress.error:
+            st.error(f"An error occurred: {progress.error}")
 
 # Persistent Results & Download Section
-if st.session_state["results"] is not None:
+result_set = st.session_state["result_set"]
+if result_set is not None and not is_running:
     st.divider()
     st.subheader("✅ Results")
-    st.dataframe(st.session_state["results"])
-    
-    csv = st.session_state["results"].to_csv(index=False).encode('utf-8')
+    st.dataframe(result_set.dataframe)
     
+    # Serialized once per result set, not on every rerun
     st.download_button(
         label="Download CSV",
-        data=csv,
+        data=result_set.csv_bytes,
         file_name=output_file,
         mime="text/csv",
         key="download-csv"
     )
+elif st.session_state["results"] is not None:
+    st.divider()
+    st.subheader(f"🔄 Results so far ({len(st.session_state['results'])} raw)")
+    st.dataframe(st.session_state["results"])
+
+# Every agent from past runs, queried one page at a time from the indexed store
+if not is_running:
+    st.divider()
+    store = get_contact_store()
+    st.subheader(f"📇 Contact History ({len(store)} agents)")
+    col1, col2, col3, col4 = st.columns(4)
+    name_filter = col1.text_input("Name starts with")
+    town_filter = col2.text_input("Town ('Wayne' or 'Wayne, PA')")
+    zip_filter = col3.text_input("Zip (or prefix)")
+    brokerage_filter = col4.text_input("Brokerage starts with")
+    col1, col2, col3, col4 = st.columns(4)
+    source_filter = col1.selectbox("Source", ["(any)"] + store.sources())
+    domain_filter = col2.text_input("Email domain")
+    has_email = col3.checkbox("Has email")
+    town_name, _, town_state = town_filter.partition(",")
+    contact_query = ContactQuery(
+        name=name_filter, town=town_name, state=town_state, zip_code=zip_filter, brokerage=brokerage_filter,
+        source="" if source_filter == "(any)" else source_filter, email_domain=domain_filter, has_email=has_email,
+    )
+    # Back to the first page whenever the filters change
+    if st.session_state.get("contact_filters") != contact_query:
+        st.session_state["contact_filters"] = contact_query
+        st.session_state["contact_page"] = 1
+    page_number = col4.number_input("Page", min_value=1, key="contact_page")
+    contact_page = store.query(replace(contact_query, page=page_number))
+    st.caption(f"{contact_page.first}-{contact_page.last} of {contact_page.total} matching agents "
+               f"(page {contact_page.page} of {contact_page.pages})")
+    st.dataframe(pd.DataFrame(contact_page.rows), hide_index=True)
+
+if is_running:
+    time.sleep(POLL_INTERVAL)
+    st.rerun()
@@ -0,0 +1,44 @@
+"""Parser throughput on the saved ~1 MB roster pages.
+
+    python benchmarks/bench_parsers.py --runs 20
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.parsers import parse_bhhs_roster, parse_lf_roster  # noqa: E402
+from src.planner import Target  # noqa: E402
+
+TARGET = Target("Wayne", "PA", "19087")
+CASES = [
+    ("bhhs", "bhhs_dump.html", parse_bhhs_roster),
+    ("lf", "lf_dump.html", parse_lf_roster),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark roster parsers")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, filename, fn in CASES:
+        with open(os.path.join(ROOT, filename), encoding="utf-8") as f:
+            html = f.read()
+        size_mb = len(html.encode("utf-8")) / 1e6
+        agents = fn(html, "https://example.com/roster", TARGET)
+
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            fn(html, "https://example.com/roster", TARGET)
+        per_page = (time.perf_counter() - start) / args.runs
+
+        print(f"{name:<5} {size_mb:5.2f} MB  {len(agents):3d} agents  "
+              f"{per_page * 1000:7.1f} ms/page  {1 / per_page:6.1f} pages/s  {size_mb / per_page:6.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
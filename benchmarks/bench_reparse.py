@@ -0,0 +1,53 @@
+"""Offline re-parse throughput over a synthetic region archive.
+
+Archives Coldwell Banker-shaped list pages from the fixture server's generator
+(no network), then times `reparse` over them.
+
+    python benchmarks/bench_reparse.py --towns 500 --workers 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from loguru import logger  # noqa: E402
+from src.archive import PageArchive  # noqa: E402
+from src.fixture_server import FixtureConfig, FixtureServer  # noqa: E402
+from src.parsers import parse_cb_page  # noqa: E402
+from src.planner import Target  # noqa: E402
+from src.reparse import reparse  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark re-parsing a page archive")
+    parser.add_argument("--towns", type=int, default=500)
+    parser.add_argument("--agents", type=int, default=96, help="Agents per town (24 per list page)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    logger.remove()
+
+    server = FixtureServer(FixtureConfig(agents_per_town=args.agents))
+    pages = -(-args.agents // server.config.cb_page_size)
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        with PageArchive(os.path.join(directory, "pages")) as archive:
+            for t in range(args.towns):
+                town = f"town{t}"
+                for n in range(1, pages + 1):
+                    url = f"https://example.com/pa/{town}/agents/" + (f"p_{n}/" if n > 1 else "")
+                    archive.add("ColdwellBanker", parse_cb_page, server._cb_list("pa", town, n),
+                                (url, Target(town, "PA"), n), url=url)
+            summary = archive.summary()
+        print(f"archived: {summary} in {time.perf_counter() - start:.1f}s")
+
+        stats = reparse(os.path.join(directory, "pages"), os.path.join(directory, "out.csv"), workers=args.workers)
+        print(f"reparse: {stats['pages']} pages, {stats['agents']} agents, {stats['unique']} unique "
+              f"in {stats['seconds']:.2f}s with {args.workers} workers ({stats['pages'] / stats['seconds']:.0f} pages/s)")
+
+
+if __name__ == "__main__":
+    main()
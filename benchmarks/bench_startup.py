@@ -0,0 +1,68 @@
+"""CLI startup benchmark.
+
+Times `main.py --help` and a bare `import main` in fresh interpreters and lists the
+slowest imports reported by `python -X importtime`. Point --repo at another checkout
+(e.g. a `git worktree` of an older commit) to compare before/after.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repo /tmp/old-checkout --runs 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_command(args, cwd, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), min(samples)
+
+
+def slowest_imports(cwd, statement, top):
+    """Cumulative import cost per root package, e.g. pandas, playwright, src."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=cwd, capture_output=True, text=True, check=True)
+    by_root = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        root = name.strip().split(".")[0]
+        if root in ("main", "site", "encodings"):
+            continue
+        by_root[root] = max(by_root.get(root, 0), int(cumulative_us))
+    return sorted(((us, root) for root, us in by_root.items()), reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup latency")
+    parser.add_argument("--repo", default=ROOT, help="Checkout to benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=8, help="Top-level imports to list")
+    args = parser.parse_args()
+
+    commands = {
+        "main.py --help": [sys.executable, "main.py", "--help"],
+        "import main": [sys.executable, "-c", "import main"],
+        "interpreter only": [sys.executable, "-c", "pass"],
+    }
+    print(f"Repo: {args.repo} ({args.runs} runs each)")
+    for label, command in commands.items():
+        median, best = time_command(command, args.repo, args.runs)
+        print(f"  {label:<18} median {median * 1000:7.1f} ms   best {best * 1000:7.1f} ms")
+
+    print("Slowest top-level imports for `import main`:")
+    for cumulative_us, name in slowest_imports(args.repo, "import main", args.top):
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
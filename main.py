@@ -1,47 +1,235 @@
 import argparse
-from src.config import DEFAULT_TOWNS, DEFAULT_ZIPS, DEFAULT_MAX_PAGES
-from src.scraper_manager import ScraperManager
-from src.connectors.compass import CompassConnector
-from src.connectors.coldwell_banker import CBConnector
-from src.connectors.long_and_foster import LongAndFosterConnector
-from src.connectors.bhhs import BHHSConnector
-from src.utils import setup_logger
-
-def main():
-    parser = argparse.ArgumentParser(description="Real Estate Agent Scraper")
-    parser.add_argument("--area", type=str, help="Area name (unused logic currently, uses towns)", default="Main Line")
-    parser.add_argument("--towns", type=str, help="Comma-separated towns", default=",".join(DEFAULT_TOWNS))
-    parser.add_argument("--zips", type=str, help="Comma-separated zip codes", default=",".join(DEFAULT_ZIPS))
+import sys
+from src.config import DEFAULT_TOWNS, DEFAULT_ZIPS, DEFAULT_MAX_PAGES, DEFAULT_PARSER_WORKERS, DEFAULT_CONCURRENCY, CHANGE_INDEX_PATH, ARCHIVE_DIR, CONTACTS_DB_PATH
+from src.connectors import available_sources, create_connector, default_sources, resolve_source
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # Subcommands; anything else is a one-shot scrape, as before
+    if argv[:1] == ["serve"]:
+        return serve(argv[1:])
+    if argv[:1] == ["reparse"]:
+        return reparse(argv[1:])
+    if argv[:1] == ["query"]:
+        return query(argv[1:])
+
+    parser = argparse.ArgumentParser(description="Real Estate Agent Scraper",
+                                     epilog="Subcommands: 'main.py serve --help' runs the scrape service; "
+                                            "'main.py reparse --help' rebuilds output from the page archive; "
+                                            "'main.py query --help' searches every agent collected so far.")
+    parser.add_argument("--area", type=str, help="Area name from the bundled gazetteer (e.g. 'Main Line'), expanded into its towns", default=None)
+    # The defaults only apply when none of --area/--towns/--zips is given; zips expand into towns too
+    parser.add_argument("--towns", type=str, default="",
+                        help=f"Comma-separated towns (default, with no --area/--zips: {'; '.join(DEFAULT_TOWNS)})")
+    parser.add_argument("--zips", type=str, default="",
+                        help=f"Comma-separated zip codes (default, with no --area/--towns: {', '.join(DEFAULT_ZIPS)})")
     parser.add_argument("--max_pages", type=int, help="Max pages to scrape per source", default=DEFAULT_MAX_PAGES)
     parser.add_argument("--out", type=str, help="Output CSV file", default="contacts.csv")
-    parser.add_argument("--sources", type=str, help="Comma-separated sources (compass, cb, lf, bhhs)", default="compass,cb,lf,bhhs")
+    parser.add_argument("--sources", type=str, help=f"Comma-separated sources ({', '.join(available_sources())})",
+                        default=",".join(default_sources()))
+    parser.add_argument("--parser_workers", type=int, default=DEFAULT_PARSER_WORKERS,
+                        help="Processes parsing captured HTML (0 = parse in the fetch thread)")
+    parser.add_argument("--target_unique", type=int, default=None, help="Stop once this many unique agents are collected")
+    parser.add_argument("--source_deadline", type=float, default=None, help="Seconds each source may run")
+    parser.add_argument("--max_profile_visits", type=int, default=None,
+                        help="Profile pages to visit across the run; later agents keep roster data only")
+    parser.add_argument("--min_new_rate", type=float, default=None,
+                        help="Stop a source once fewer than this share (0-1) of its recent agents are new")
+    parser.add_argument("--enrich_concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Browser workers visiting profiles for missing emails after dedup")
+    parser.add_argument("--inline_profiles", action="store_true",
+                        help="Visit profiles while scraping (before dedup) instead of in the enrichment stage")
+    parser.add_argument("--index", type=str, default=CHANGE_INDEX_PATH,
+                        help="SQLite index of previously seen agents, used to detect changes between runs")
+    parser.add_argument("--no_index", action="store_true", help="Don't update the change index or write a delta file")
+    parser.add_argument("--delta", type=str, default=None,
+                        help="CSV of new/changed/disappeared agents (default: <out>_delta.csv)")
+    parser.add_argument("--contacts", type=str, default=CONTACTS_DB_PATH,
+                        help="SQLite store accumulating every run's agents, searched by 'main.py query'")
+    parser.add_argument("--no_contacts", action="store_true", help="Don't add this run's agents to the contacts store")
+    parser.add_argument("--memory_limit_mb", type=float, default=None,
+                        help="Memory-bounded mode for very large regions: RSS budget in MB (dedup spills to disk, output is streamed)")
+    parser.add_argument("--archive", type=str, nargs="?", const=ARCHIVE_DIR, default=None, metavar="DIR",
+                        help=f"Keep every fetched page, compressed, for 'main.py reparse' (default dir: {ARCHIVE_DIR})")
+    parser.add_argument("--plan", action="store_true", help="Print the roster URLs and cost estimate, then exit without scraping")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+
+    # Imported after argument parsing so `--help` stays fast
+    from loguru import logger
+    from src.utils import setup_logger
+    from src.scraper_manager import ScraperManager
+    from src.planner import split_town_list
+    from src.budget import ScrapeBudget
     
     setup_logger()
     
-    towns = [t.strip() for t in args.towns.split(",")]
-    zips = [z.strip() for z in args.zips.split(",")]
+    towns = split_town_list(args.towns)
+    zips = [z.strip() for z in args.zips.split(",") if z.strip()]
+    if not (towns or zips or args.area):
+        towns, zips = list(DEFAULT_TOWNS), list(DEFAULT_ZIPS)
     
-    manager = ScraperManager(towns, zips, args.max_pages, args.out)
+    budget = ScrapeBudget(
+        target_unique=args.target_unique,
+        source_deadline=args.source_deadline,
+        max_profile_visits=args.max_profile_visits,
+        min_new_rate=args.min_new_rate,
+    )
+    manager = ScraperManager(towns, zips, args.max_pages, args.out, area=args.area,
+                             parser_workers=args.parser_workers, budget=budget,
+                             enrich=not args.inline_profiles, enrich_concurrency=args.enrich_concurrency,
+                             index_path=None if args.no_index else args.index, delta_file=args.delta,
+                             memory_limit_mb=args.memory_limit_mb, archive_dir=args.archive,
+                             contacts_path=None if args.no_contacts else args.contacts)
     
-    sources = [s.strip().lower() for s in args.sources.split(",")]
-    
-    if "compass" in sources:
-        manager.add_connector(CompassConnector())
-        
-    if "coldwellbanker" in sources or "cb" in sources:
-        manager.add_connector(CBConnector())
-
-    if "longandfoster" in sources or "lf" in sources:
-        manager.add_connector(LongAndFosterConnector())
-
-    if "bhhs" in sources:
-        manager.add_connector(BHHSConnector())
-        
-    # Add other connectors here if implemented
+    sources = []
+    for name in args.sources.split(","):
+        if not name.strip():
+            continue
+        try:
+            source = resolve_source(name)
+        except KeyError as e:
+            logger.warning(str(e))
+            continue
+        if source not in sources:
+            sources.append(source)
+
+    # Only the selected connector modules (and Playwright) get imported
+    for source in sources:
+        manager.add_connector(create_connector(source))
     
+    if args.plan:
+        plan = manager.build_plan()
+        print(plan.summary())
+        for source, connector_plan in plan.connectors.items():
+            for request in connector_plan.requests:
+                print(f"  [{source}] {request.url}  <- {'; '.join(t.label for t in request.targets)}")
+        return
+
     manager.run()
 
+
+def serve(argv):
+    from src.config import (
+        SERVICE_HOST,
+        SERVICE_MAX_CONCURRENT_JOBS,
+        SERVICE_MAX_QUEUED_JOBS,
+        SERVICE_OUTPUT_DIR,
+        SERVICE_PORT,
+    )
+    parser = argparse.ArgumentParser(prog="main.py serve",
+                                     description="Run scrapes as jobs submitted over a local HTTP/JSON API")
+    parser.add_argument("--host", type=str, default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--max_concurrent", type=int, default=SERVICE_MAX_CONCURRENT_JOBS, help="Jobs scraping at once")
+    parser.add_argument("--max_queued", type=int, default=SERVICE_MAX_QUEUED_JOBS, help="Jobs waiting before submissions are refused")
+    parser.add_argument("--output_dir", type=str, default=SERVICE_OUTPUT_DIR, help="Where each job's CSV is written")
+    parser.add_argument("--parser_workers", type=int, default=DEFAULT_PARSER_WORKERS)
+    parser.add_argument("--index", type=str, default=CHANGE_INDEX_PATH)
+    parser.add_argument("--no_index", action="store_true")
+    parser.add_argument("--contacts", type=str, default=CONTACTS_DB_PATH)
+    parser.add_argument("--no_contacts", action="store_true")
+    parser.add_argument("--no_shared_browser", action="store_true", help="Launch Chromium per job instead of keeping one warm")
+    args = parser.parse_args(argv)
+
+    from loguru import logger
+    from src.utils import setup_logger
+    from src.service import ScrapeService, make_server
+
+    setup_logger()
+    service = ScrapeService(max_concurrent=args.max_concurrent, max_queued=args.max_queued,
+                            output_dir=args.output_dir, parser_workers=args.parser_workers,
+                            shared_browser=not args.no_shared_browser,
+                            index_path=None if args.no_index else args.index,
+                            contacts_path=None if args.no_contacts else args.contacts)
+    service.start()
+    server = make_server(service, args.host, args.port)
+    logger.info(f"Job API on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+
+def reparse(argv):
+    parser = argparse.ArgumentParser(prog="main.py reparse",
+                                     description="Re-run the parsers over archived pages and rewrite the output, without the network")
+    parser.add_argument("--archive", type=str, default=ARCHIVE_DIR, help="Archive written by a scrape with --archive")
+    parser.add_argument("--out", type=str, default="contacts.csv", help="Output CSV file")
+    parser.add_argument("--sources", type=str, default=None,
+                        help="Comma-separated source names as archived (e.g. ColdwellBanker,BHHS); all by default")
+    parser.add_argument("--parser_workers", type=int, default=DEFAULT_PARSER_WORKERS,
+                        help="Processes parsing archived pages (0 = parse inline)")
+    parser.add_argument("--no_contact_cache", action="store_true",
+                        help="Only use archived profile pages for emails, not the profile contact cache")
+    args = parser.parse_args(argv)
+
+    from src.utils import setup_logger
+    from src.enrichment import ContactCache
+    from src.reparse import reparse as reparse_archive
+
+    setup_logger()
+    sources = [s.strip() for s in args.sources.split(",") if s.strip()] if args.sources else None
+    try:
+        reparse_archive(args.archive, args.out, workers=args.parser_workers, sources=sources,
+                        contact_cache=None if args.no_contact_cache else ContactCache())
+    except FileNotFoundError as e:
+        parser.exit(1, f"{e}\n")
+
+
+def query(argv):
+    from src.config import QUERY_PAGE_SIZE
+    parser = argparse.ArgumentParser(prog="main.py query",
+                                     description="Search the agents accumulated by every run in the contacts store")
+    parser.add_argument("--db", type=str, default=CONTACTS_DB_PATH, help="Contacts store written by scrapes")
+    parser.add_argument("--name", type=str, default="", help="Prefix of the full or last name (e.g. 'sull')")
+    parser.add_argument("--town", type=str, default="", help="Town, optionally with state: 'Wayne' or 'Wayne, PA'")
+    parser.add_argument("--state", type=str, default="")
+    parser.add_argument("--zip", type=str, default="", help="Zip code or prefix (e.g. '190')")
+    parser.add_argument("--brokerage", type=str, default="", help="Brokerage prefix (e.g. 'coldwell')")
+    parser.add_argument("--source", type=str, default="")
+    parser.add_argument("--email_domain", type=str, default="", help="e.g. compass.com")
+    parser.add_argument("--has_email", action="store_true", help="Only agents with an email address")
+    parser.add_argument("--page", type=int, default=1)
+    parser.add_argument("--page_size", type=int, default=QUERY_PAGE_SIZE)
+    parser.add_argument("--format", choices=["table", "csv", "json"], default="table")
+    parser.add_argument("--import_csv", type=str, default=None, metavar="FILE",
+                        help="First add the agents in a contacts CSV from an earlier run")
+    args = parser.parse_args(argv)
+
+    import csv
+    import json
+    from src.contact_store import COLUMNS, ContactQuery, ContactStore
+
+    town, _, state = args.town.partition(",")
+    with ContactStore(args.db) as store:
+        if args.import_csv:
+            print(f"Imported {store.import_csv(args.import_csv)} agents from {args.import_csv}", file=sys.stderr)
+        result = store.query(ContactQuery(
+            name=args.name, town=town, state=state or args.state, zip_code=args.zip, brokerage=args.brokerage,
+            source=args.source, email_domain=args.email_domain, has_email=args.has_email,
+            page=args.page, page_size=args.page_size,
+        ))
+
+    if args.format == "json":
+        print(json.dumps({"total": result.total, "page": result.page, "pages": result.pages, "rows": result.rows}, indent=2))
+        return
+    if args.format == "csv":
+        writer = csv.DictWriter(sys.stdout, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(result.rows)
+        return
+    shown = ["full_name", "email", "phone", "brokerage", "city", "state", "zip_code", "source"]
+    table = [[str(row[c] or "") for c in shown] for row in result.rows]
+    widths = [min(max([len(c)] + [len(r[i]) for r in table]), 40) for i, c in enumerate(shown)]
+    for cells in [shown] + table:
+        print("  ".join(cell[:width].ljust(width) for cell, width in zip(cells, widths)).rstrip())
+    print(f"\n{result.first}-{result.last} of {result.total} agents (page {result.page} of {result.pages})")
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,231 @@
+"""Append-only archive of fetched page bodies, for re-parsing without the network.
+
+Each page is compressed on its own (zstd when the `zstandard` package is
+installed, gzip otherwise) and appended to a segment file; a SQLite index
+records where it landed plus the parser and arguments the connector used on
+it. Any page can be read back with one slice of a memory-mapped segment, and
+identical bodies are stored once.
+
+    .cache/pages/
+        index.sqlite
+        segment-00001.gz
+        segment-00002.gz
+"""
+import glob
+import gzip
+import hashlib
+import importlib
+import mmap
+import os
+import pickle
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from src.config import ARCHIVE_DIR, ARCHIVE_SEGMENT_BYTES
+from src.identity import utc_now
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is always available
+    zstandard = None
+
+GZIP = ".gz"
+ZSTD = ".zst"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    url TEXT NOT NULL,
+    parser TEXT NOT NULL,
+    args BLOB NOT NULL,
+    segment TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    fetched_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_url ON pages (url, parser);
+CREATE INDEX IF NOT EXISTS pages_hash ON pages (content_hash);
+"""
+
+
+@dataclass(frozen=True)
+class PageRecord:
+    id: int
+    source: str
+    url: str
+    parser: str
+    args: bytes
+    segment: str
+    offset: int
+    length: int
+    fetched_at: str
+
+
+def parser_path(fn: Callable) -> str:
+    return f"{fn.__module__}:{fn.__qualname__}"
+
+
+def resolve_parser(path: str) -> Callable:
+    module, name = path.split(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def _compress(body: bytes, codec: str) -> bytes:
+    if codec == ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    return gzip.compress(body, compresslevel=6)
+
+
+def _decompress(blob: bytes, codec: str) -> bytes:
+    if codec == ZSTD:
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return gzip.decompress(blob)
+
+
+class PageArchive:
+    def __init__(self, directory: str = ARCHIVE_DIR, segment_bytes: int = ARCHIVE_SEGMENT_BYTES,
+                 codec: Optional[str] = None):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.codec = codec or (ZSTD if zstandard is not None else GZIP)
+        if self.codec == ZSTD and zstandard is None:
+            raise RuntimeError("zstd archives need the zstandard package")
+        os.makedirs(directory, exist_ok=True)
+        # Connectors and enrichment workers write from different threads
+        self.conn = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._segment: Optional[str] = None
+        self._file = None
+        self._pending = 0
+        self._maps: Dict[str, mmap.mmap] = {}
+        self.stats = {"pages": 0, "stored": 0, "bytes_in": 0, "bytes_out": 0}
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Writing
+
+    def _open_segment(self):
+        """Append to the newest segment of this codec while it has room, else start a new one."""
+        existing = sorted(glob.glob(os.path.join(self.directory, "segment-*")))
+        latest = existing[-1] if existing else None
+        if latest and latest.endswith(self.codec) and os.path.getsize(latest) < self.segment_bytes:
+            path = latest
+        else:
+            number = int(os.path.basename(latest).split("-")[1].split(".")[0]) + 1 if latest else 1
+            path = os.path.join(self.directory, f"segment-{number:05d}{self.codec}")
+        self._segment = os.path.basename(path)
+        self._file = open(path, "ab")
+
+    def add(self, source: str, parser: Callable, body: Union[str, bytes], args: Sequence[Any] = (),
+            url: str = "") -> int:
+        """Archive one page body with the parser call that reads it; returns the record id."""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        digest = hashlib.sha1(body).hexdigest()
+        with self._lock:
+            self.stats["pages"] += 1
+            self.stats["bytes_in"] += len(body)
+            location = self.conn.execute(
+                "SELECT segment, offset, length FROM pages WHERE content_hash = ? LIMIT 1", (digest,)).fetchone()
+            if location is None:
+                if self._file is None or self._file.tell() >= self.segment_bytes:
+                    if self._file is not None:
+                        self._file.close()
+                    self._open_segment()
+                blob = _compress(body, self.codec)
+                location = (self._segment, self._file.tell(), len(blob))
+                self._file.write(blob)
+                self.stats["stored"] += 1
+                self.stats["bytes_out"] += len(blob)
+            cursor = self.conn.execute(
+                """INSERT INTO pages (source, url, parser, args, segment, offset, length, content_hash, fetched_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (source, url, parser_path(parser), pickle.dumps(tuple(args)), *location, digest, utc_now()),
+            )
+            self._pending += 1
+            if self._pending >= 100:
+                self._flush()
+            return cursor.lastrowid
+
+    def _flush(self):
+        # Bodies reach the segment before the index rows that point at them
+        if self._file is not None:
+            self._file.flush()
+        self.conn.commit()
+        self._pending = 0
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+            self.conn.close()
+
+    def summary(self) -> str:
+        stats = self.stats
+        ratio = stats["bytes_in"] / stats["bytes_out"] if stats["bytes_out"] else 0
+        return (f"{stats['pages']} pages archived ({stats['stored']} new bodies, "
+                f"{stats['bytes_out'] / 2 ** 20:.1f} MB, {ratio:.1f}x compression)")
+
+    # Reading
+
+    def records(self, latest: bool = True) -> List[PageRecord]:
+        """Archived pages in fetch order; with `latest`, only the newest fetch of each (URL, parser)."""
+        with self._lock:
+            self._flush()
+        query = "SELECT id, source, url, parser, args, segment, offset, length, fetched_at FROM pages"
+        if latest:
+            query += " WHERE id IN (SELECT MAX(id) FROM pages GROUP BY url, parser)"
+        return [PageRecord(*row) for row in self.conn.execute(query + " ORDER BY id")]
+
+    def read(self, record: PageRecord) -> bytes:
+        return read_page(self.directory, record.segment, record.offset, record.length, self._maps)
+
+
+def read_page(directory: str, segment: str, offset: int, length: int, maps: Dict[str, mmap.mmap]) -> bytes:
+    """Decompress one page out of a memory-mapped segment; `maps` caches the mappings by path."""
+    path = os.path.join(directory, segment)
+    mapped = maps.get(path)
+    if mapped is None or len(mapped) < offset + length:
+        # Segments only grow; remap when a record lies past the mapped end
+        if mapped is not None:
+            mapped.close()
+        with open(path, "rb") as f:
+            mapped = maps[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return _decompress(mapped[offset:offset + length], os.path.splitext(segment)[1])
+
+
+# Segment maps held by each parser-pool worker process
+_worker_maps: Dict[str, mmap.mmap] = {}
+
+BatchItem = Tuple[str, int, int, str, bytes]
+
+
+def parse_batch(directory: str, items: List[BatchItem]) -> List[Tuple[Any, Optional[str]]]:
+    """Run in a parser-pool worker: read and parse a batch of pages; (result, error) per page.
+
+    Workers map the segments themselves, so only offsets cross the process boundary.
+    """
+    results = []
+    for segment, offset, length, parser, args in items:
+        try:
+            body = read_page(directory, segment, offset, length, _worker_maps)
+            results.append((resolve_parser(parser)(body, *pickle.loads(args)), None))
+        except Exception as e:
+            results.append((None, f"{type(e).__name__}: {e}"))
+    return results
@@ -0,0 +1,114 @@
+import atexit
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Optional
+from loguru import logger
+
+DEVTOOLS_RE = re.compile(r"DevTools listening on (ws://\S+)")
+
+
+class SharedBrowser:
+    """A long-lived headless Chromium that scrapes connect to over CDP.
+
+    Playwright's sync objects are bound to the thread that created them, so the
+    browser process itself is what gets shared: each scrape thread connects with
+    `chromium.connect_over_cdp(endpoint)`, which is far cheaper than a launch.
+    """
+
+    def __init__(self, executable_path: Optional[str] = None, startup_timeout: float = 30.0):
+        self.executable_path = executable_path
+        self.startup_timeout = startup_timeout
+        self.endpoint: Optional[str] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._profile_dir: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _default_executable() -> str:
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as p:
+            return p.chromium.executable_path
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> str:
+        """Launch Chromium if needed and return its CDP websocket endpoint."""
+        with self._lock:
+            if self.running:
+                return self.endpoint
+
+            executable = self.executable_path or self._default_executable()
+            self._profile_dir = tempfile.mkdtemp(prefix="scraper-browser-")
+            self._process = subprocess.Popen(
+                [
+                    executable,
+                    "--headless=new",
+                    "--remote-debugging-port=0",
+                    f"--user-data-dir={self._profile_dir}",
+                    "--no-first-run",
+                    "--no-default-browser-check",
+                    "about:blank",
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+
+            deadline = time.time() + self.startup_timeout
+            while time.time() < deadline:
+                line = self._process.stderr.readline()
+                if not line and self._process.poll() is not None:
+                    break
+                match = DEVTOOLS_RE.search(line)
+                if match:
+                    self.endpoint = match.group(1)
+                    break
+
+            if not self.endpoint:
+                self._stop_locked()
+                raise RuntimeError("Chromium did not report a DevTools endpoint")
+
+            # Keep draining stderr so Chromium never blocks on a full pipe
+            threading.Thread(target=self._drain, args=(self._process,), daemon=True).start()
+            atexit.register(self.stop)
+            logger.info(f"Shared browser listening on {self.endpoint}")
+            return self.endpoint
+
+    @staticmethod
+    def _drain(process: subprocess.Popen):
+        for _ in process.stderr:
+            pass
+
+    def stop(self):
+        with self._lock:
+            self._stop_locked()
+
+    def _stop_locked(self):
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.terminate()
+                try:
+                    self._process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    self._process.kill()
+            self._process = None
+        if self._profile_dir:
+            shutil.rmtree(self._profile_dir, ignore_errors=True)
+            self._profile_dir = None
+        self.endpoint = None
+
+
+def launch_browser(p, endpoint: Optional[str] = None):
+    """Connect to a SharedBrowser endpoint if given, otherwise launch headless Chromium."""
+    if endpoint:
+        try:
+            return p.chromium.connect_over_cdp(endpoint)
+        except Exception as e:
+            logger.warning(f"Could not connect to shared browser ({e}); launching a new one.")
+    return p.chromium.launch(headless=True)
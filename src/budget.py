@@ -0,0 +1,85 @@
+"""Run budgets: stop scraping once it stops being productive.
+
+`ScrapeBudget` holds the limits; `BudgetTracker` is the run-time state that
+ScraperManager feeds with every collected agent and connectors consult inside
+their loops (`BaseConnector.should_stop()` / `allow_profile_visit()`).
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+from src.config import BUDGET_RATE_WINDOW
+
+
+@dataclass
+class ScrapeBudget:
+    target_unique: Optional[int] = None  # stop the whole run after this many unique agents
+    source_deadline: Optional[float] = None  # seconds each source may run
+    max_profile_visits: Optional[int] = None  # profile page loads across the run
+    min_new_rate: Optional[float] = None  # stop a source when < this share of its recent agents is new
+    rate_window: int = BUDGET_RATE_WINDOW
+
+    @property
+    def unlimited(self) -> bool:
+        # An explicit 0 is a limit (e.g. no profile visits at all), not "unset"
+        limits = (self.target_unique, self.source_deadline, self.max_profile_visits, self.min_new_rate)
+        return all(limit is None for limit in limits)
+
+
+class BudgetTracker:
+    def __init__(self, budget: Optional[ScrapeBudget] = None):
+        self.budget = budget or ScrapeBudget()
+        self._lock = threading.Lock()
+        self.unique = 0
+        self.profile_visits = 0
+        self.source: Optional[str] = None
+        self._source_started = 0.0
+        self._recent = deque(maxlen=max(self.budget.rate_window, 1))
+
+    def start_source(self, name: str):
+        with self._lock:
+            self.source = name
+            self._source_started = time.monotonic()
+            self._recent.clear()
+
+    def record(self, is_new: bool):
+        with self._lock:
+            self.unique += is_new
+            self._recent.append(is_new)
+
+    @property
+    def new_rate(self) -> Optional[float]:
+        """Share of the current source's last `rate_window` agents that were new; None until the window fills."""
+        if len(self._recent) < self._recent.maxlen:
+            return None
+        return sum(self._recent) / len(self._recent)
+
+    def allow_profile_visit(self) -> bool:
+        """Claim one profile visit; False once the run's allowance is spent."""
+        with self._lock:
+            limit = self.budget.max_profile_visits
+            if limit is not None and self.profile_visits >= limit:
+                return False
+            self.profile_visits += 1
+            return True
+
+    def run_exhausted(self) -> Optional[str]:
+        """Why the whole run should stop, or None."""
+        target = self.budget.target_unique
+        if target is not None and self.unique >= target:
+            return f"reached {target} unique agents"
+        return None
+
+    def stop_reason(self) -> Optional[str]:
+        """Why the current source should stop, or None to keep going."""
+        reason = self.run_exhausted()
+        if reason:
+            return reason
+        deadline = self.budget.source_deadline
+        if deadline is not None and self.source and time.monotonic() - self._source_started >= deadline:
+            return f"{self.source} hit its {deadline:.0f}s deadline"
+        rate, floor = self.new_rate, self.budget.min_new_rate
+        if floor is not None and rate is not None and rate < floor:
+            return f"{self.source} new-agent rate fell to {rate:.0%} (< {floor:.0%})"
+        return None
@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+from src.config import RESULT_CACHE_TTL, RESULT_CACHE_MAX_ENTRIES
+from src.models import Agent
+
+CacheKey = Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...], int]
+
+
+class ResultSet:
+    """Finished scrape results. The DataFrame and CSV export are built lazily, once."""
+
+    def __init__(self, agents: List[Agent]):
+        self.agents = agents
+        self.created_at = time.time()
+        self._lock = threading.Lock()
+        self._dataframe = None
+        self._csv_bytes: Optional[bytes] = None
+
+    def __len__(self):
+        return len(self.agents)
+
+    @property
+    def dataframe(self):
+        with self._lock:
+            if self._dataframe is None:
+                import pandas as pd
+                self._dataframe = pd.DataFrame([a.to_dict() for a in self.agents])
+            return self._dataframe
+
+    @property
+    def csv_bytes(self) -> bytes:
+        df = self.dataframe
+        with self._lock:
+            if self._csv_bytes is None:
+                self._csv_bytes = df.to_csv(index=False).encode("utf-8")
+            return self._csv_bytes
+
+
+class ResultCache:
+    """In-process TTL cache of scrape results keyed on the scrape parameters."""
+
+    def __init__(self, ttl: float = RESULT_CACHE_TTL, max_entries: int = RESULT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, ResultSet]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(towns: Iterable[str], zips: Iterable[str], sources: Iterable[str], max_pages: int) -> CacheKey:
+        def norm(values):
+            return tuple(sorted({v.strip().lower() for v in values if v and v.strip()}))
+        return norm(towns), norm(zips), norm(sources), int(max_pages)
+
+    def get(self, key: CacheKey) -> Optional[ResultSet]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                return None
+            if time.time() - result.created_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def put(self, key: CacheKey, agents: List[Agent]) -> ResultSet:
+        result = ResultSet(agents)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
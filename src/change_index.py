@@ -0,0 +1,194 @@
+"""Persistent agent index for cross-run change detection.
+
+Every run's agents are looked up by `agent_id` (a SQLite primary key, so O(1)
+per agent) and classified as new, changed or unchanged. Active agents in the
+same source/town scope that weren't seen this time are marked as disappeared.
+`write_delta` turns the result into a CSV of just the changes, for the CRM; with
+a `DeltaWriter` sink the changes stream straight to that CSV instead of being
+held in memory, which large (memory-bounded) runs need.
+"""
+import csv
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from src.identity import content_hash, source_key, utc_now
+from src.models import Agent
+
+NEW = "new"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+DISAPPEARED = "disappeared"
+
+ACTIVE = "active"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS agents (
+    agent_id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    city TEXT NOT NULL,
+    state TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    record TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS agents_scope ON agents (source, state, city, status);
+"""
+
+
+@dataclass
+class Delta:
+    new: List[Dict] = field(default_factory=list)
+    changed: List[Dict] = field(default_factory=list)
+    disappeared: List[Dict] = field(default_factory=list)
+    unchanged: int = 0
+    counts: Dict[str, int] = field(default_factory=lambda: {NEW: 0, CHANGED: 0, DISAPPEARED: 0})
+    # Receives (change, record) instead of the lists above when set
+    sink: Optional[Callable[[str, Dict], None]] = None
+
+    def add(self, change: str, record: Dict):
+        self.counts[change] += 1
+        if self.sink is not None:
+            self.sink(change, record)
+        else:
+            getattr(self, change).append(record)
+
+    def summary(self) -> str:
+        return (f"{self.counts[NEW]} new, {self.counts[CHANGED]} changed, "
+                f"{self.unchanged} unchanged, {self.counts[DISAPPEARED]} disappeared")
+
+    def rows(self) -> Iterable[Dict]:
+        for change, records in ((NEW, self.new), (CHANGED, self.changed), (DISAPPEARED, self.disappeared)):
+            for record in records:
+                yield {"change": change, **record}
+
+
+# One writer per index file at a time within this process (the scrape service runs jobs
+# concurrently); other processes wait on SQLite's own lock, up to LOCK_TIMEOUT
+_write_locks: Dict[str, threading.Lock] = {}
+_write_locks_guard = threading.Lock()
+LOCK_TIMEOUT = 300
+
+
+def _write_lock(path: str) -> threading.Lock:
+    with _write_locks_guard:
+        return _write_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+def _scope(agent: Agent):
+    return agent.source or "", (agent.city or "").lower(), (agent.state or "").lower()
+
+
+class ChangeIndex:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=LOCK_TIMEOUT)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM agents").fetchone()[0]
+
+    def classify(self, agent: Agent) -> str:
+        """What this agent would count as against the index, without recording it."""
+        row = self.conn.execute("SELECT content_hash, status FROM agents WHERE agent_id = ?", (agent.agent_id,)).fetchone()
+        if row is None or row[1] != ACTIVE:
+            return NEW
+        return UNCHANGED if row[0] == content_hash(agent) else CHANGED
+
+    def apply(self, agents: Iterable[Agent], complete: bool = True,
+              incomplete: Iterable[Tuple[str, str, str]] = (),
+              sink: Optional[Callable[[str, Dict], None]] = None) -> Delta:
+        """Record a run's agents and return what changed since the previous runs.
+
+        Disappearances are only detected for complete runs, and only within the
+        (source, town) scopes this run returned agents for, so a cancelled run or
+        a source that failed outright doesn't mark everyone as gone. `incomplete`
+        lists (source, town, state) scopes that lost roster pages; they are skipped too,
+        as are agents with no town, whose scope would span every town the source covers.
+        Changed records go to `sink` when one is given (see `DeltaWriter`).
+        """
+        skipped: Set[Tuple[str, str, str]] = {(source_key(s), c.lower(), st.lower()) for s, c, st in incomplete}
+        delta = Delta(sink=sink)
+        now = utc_now()
+        with _write_lock(self.path), self.conn:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (agent_id TEXT PRIMARY KEY)")
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS scopes (source TEXT, city TEXT, state TEXT, PRIMARY KEY (source, city, state))")
+            self.conn.execute("DELETE FROM seen")
+            self.conn.execute("DELETE FROM scopes")
+
+            for agent in agents:
+                change = self.classify(agent)
+                record = agent.to_dict()
+                source, city, state = _scope(agent)
+                if change == UNCHANGED:
+                    delta.unchanged += 1
+                else:
+                    delta.add(change, record)
+                self.conn.execute(
+                    """INSERT INTO agents (agent_id, source, city, state, content_hash, record, first_seen, last_seen, status)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (agent_id) DO UPDATE SET
+                           source = excluded.source, city = excluded.city, state = excluded.state,
+                           content_hash = excluded.content_hash, record = excluded.record,
+                           last_seen = excluded.last_seen, status = excluded.status""",
+                    (agent.agent_id, source, city, state, content_hash(agent), json.dumps(record), now, now, ACTIVE),
+                )
+                self.conn.execute("INSERT OR IGNORE INTO seen VALUES (?)", (agent.agent_id,))
+                if city and (source_key(source), city, state) not in skipped:
+                    self.conn.execute("INSERT OR IGNORE INTO scopes VALUES (?, ?, ?)", (source, city, state))
+
+            if complete:
+                gone = """FROM agents a
+                          JOIN scopes s ON a.source = s.source AND a.city = s.city AND a.state = s.state
+                          WHERE a.status = ? AND a.agent_id NOT IN (SELECT agent_id FROM seen)"""
+                # Read through the cursor, then flag them all in one statement
+                for (record,) in self.conn.execute(f"SELECT a.record {gone}", (ACTIVE,)):
+                    delta.add(DISAPPEARED, json.loads(record))
+                self.conn.execute(f"UPDATE agents SET status = ? WHERE agent_id IN (SELECT a.agent_id {gone})",
+                                  (DISAPPEARED, ACTIVE))
+        return delta
+
+
+class DeltaWriter:
+    """Delta sink writing each change to CSV as it is found: `index.apply(agents, sink=writer)`."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        fieldnames = ["change"] + list(Agent(first_name="", last_name="", full_name="").to_dict())
+        self.writer = csv.DictWriter(self.file, fieldnames=fieldnames)
+        self.writer.writeheader()
+
+    def __call__(self, change: str, record: Dict):
+        self.writer.writerow({"change": change, **record})
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_delta(delta: Delta, path: str):
+    """CSV of new/changed/disappeared agents with a leading `change` column; unchanged agents are left out."""
+    with DeltaWriter(path) as writer:
+        for row in delta.rows():
+            writer(row.pop("change"), row)
@@ -1,3 +1,5 @@
+import os
+
 # Target Geography
 DEFAULT_TOWNS = ["Ridgewood, NJ"]
 
@@ -10,3 +12,61 @@ DEFAULT_CONCURRENCY = 1
 
 # User Agent
 USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Result Cache (Streamlit app)
+RESULT_CACHE_TTL = 3600  # seconds a finished scrape is reused for identical parameters
+RESULT_CACHE_MAX_ENTRIES = 32
+
+# Compass agent-search feed (the XHR behind the infinite-scroll agent list).
+# UNVERIFIED: the endpoint, its location/start/num params and the response schema were inferred,
+# not confirmed against a captured response. "auto" mode falls back to the DOM scrape when the
+# feed fails or comes back empty, and CompassConnector logs the JSON feeds the rendered page
+# actually calls so this can be corrected.
+COMPASS_AGENT_SEARCH_URL = "https://www.compass.com/api/v3/agents/search"
+COMPASS_API_PAGE_SIZE = 50
+
+# Parsing
+DEFAULT_PARSER_WORKERS = min(4, os.cpu_count() or 1)  # 0 parses inline in the fetch thread
+
+# Coldwell Banker list pages loaded ahead in background tabs while profiles are visited
+CB_PREFETCH_DEPTH = 1
+
+# Budgets: agents per source over which the marginal new-unique rate is measured
+BUDGET_RATE_WINDOW = 50
+
+# Email enrichment (profile visits after dedup)
+ENRICHMENT_CACHE_PATH = os.path.join(".cache", "profile_contacts.json")
+ENRICHMENT_CACHE_TTL = 30 * 24 * 3600  # seconds a profile's contact details are trusted
+
+# Navigation retries and per-host circuit breaker
+NAV_RETRIES = 2  # extra attempts after a timeout, network error, 429 or 5xx
+NAV_BACKOFF = 2.0  # seconds before the first retry, doubled each time
+NAV_MAX_BACKOFF = 30.0
+CIRCUIT_BREAKER_THRESHOLD = 5  # consecutive failures before a host is skipped
+CIRCUIT_BREAKER_COOLDOWN = 300  # seconds before a tripped host is tried again
+
+# Cross-run change detection
+CHANGE_INDEX_PATH = os.path.join(".cache", "agents.sqlite")
+
+# Memory-bounded runs (--memory_limit_mb)
+DEDUP_SPILL_THRESHOLD = 100_000  # unique agents held in memory before the dedup index moves to SQLite
+MEMORY_SPILL_FRACTION = 0.7  # spill early once RSS passes this share of the limit
+MEMORY_CHECK_EVERY = 1000  # agents between RSS checks
+BROWSER_CONTEXT_MAX_MB = 512  # JS heap after which a connector recycles its browser context
+
+# Scrape service (main.py serve)
+SERVICE_HOST = "127.0.0.1"  # local only; the job API has no authentication
+SERVICE_PORT = 8700
+SERVICE_MAX_CONCURRENT_JOBS = 1  # jobs scraping at once; the rest wait in the queue
+SERVICE_MAX_QUEUED_JOBS = 20  # submissions beyond this are rejected with 503
+SERVICE_JOB_HISTORY = 50  # finished jobs kept for status queries
+SERVICE_OUTPUT_DIR = "jobs"  # each job's CSV is written here as <job id>.csv
+
+# Raw page archive (--archive) and offline re-parsing (main.py reparse)
+ARCHIVE_DIR = os.path.join(".cache", "pages")
+ARCHIVE_SEGMENT_BYTES = 256 * 2 ** 20  # segment files roll over at this size
+ARCHIVE_REPARSE_BATCH = 64  # pages per parser-pool task when re-parsing
+
+# Accumulated contacts across runs (main.py query, the app's contact browser)
+CONTACTS_DB_PATH = os.path.join(".cache", "contacts.sqlite")
+QUERY_PAGE_SIZE = 50  # rows per page of query results
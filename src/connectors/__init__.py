@@ -0,0 +1,61 @@
+"""Connector registry.
+
+Sources are referred to by short names (`compass`, `cb`, `lf`, `bhhs`). Connector
+modules pull in Playwright, so they are only imported once a source is selected.
+Spec-driven sources (src/connectors/sites.py) are opt-in: they run only when
+named in `--sources`, not by default.
+"""
+import importlib
+from dataclasses import dataclass
+from typing import Dict, List
+
+
+@dataclass(frozen=True)
+class ConnectorInfo:
+    module: str
+    class_name: str
+    label: str
+    # Part of a run when no sources are named
+    default: bool = True
+
+
+CONNECTORS: Dict[str, ConnectorInfo] = {
+    "compass": ConnectorInfo("src.connectors.compass", "CompassConnector", "Compass"),
+    "cb": ConnectorInfo("src.connectors.coldwell_banker", "CBConnector", "Coldwell Banker"),
+    "lf": ConnectorInfo("src.connectors.long_and_foster", "LongAndFosterConnector", "Long & Foster"),
+    "bhhs": ConnectorInfo("src.connectors.bhhs", "BHHSConnector", "BHHS"),
+    "cbspec": ConnectorInfo("src.connectors.sites", "ColdwellBankerSpecConnector", "Coldwell Banker (spec)",
+                            default=False),
+}
+
+ALIASES: Dict[str, str] = {
+    "coldwellbanker": "cb",
+    "longandfoster": "lf",
+}
+
+
+def available_sources() -> List[str]:
+    return list(CONNECTORS)
+
+
+def default_sources() -> List[str]:
+    return [name for name, info in CONNECTORS.items() if info.default]
+
+
+def resolve_source(name: str) -> str:
+    """Map a user-supplied source name or alias to its registry key."""
+    key = name.strip().lower()
+    key = ALIASES.get(key, key)
+    if key not in CONNECTORS:
+        raise KeyError(f"Unknown source '{name}'. Available: {', '.join(CONNECTORS)}")
+    return key
+
+
+def get_connector_class(name: str):
+    info = CONNECTORS[resolve_source(name)]
+    module = importlib.import_module(info.module)
+    return getattr(module, info.class_name)
+
+
+def create_connector(name: str, **kwargs):
+    return get_connector_class(name)(**kwargs)
@@ -1,21 +1,200 @@
 from abc import ABC, abstractmethod
-from typing import List, Generator
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Iterable, List, Generator, Optional, Set, Tuple
 from src.models import Agent
+from src.archive import PageArchive
+from src.progress import ScrapeProgress
+from src.budget import BudgetTracker
+from src.browser import launch_browser
+from src.navigation import Navigator
+from src.config import USER_AGENT
+from src.planner import RosterRequest, Target, build_targets, collapse_requests
+from src.parsers import ParserPool
 from loguru import logger
+import threading
 import time
 import random
 
 class BaseConnector(ABC):
+    # Rough cost model used by the planner: list pages per roster URL (None = up to
+    # max_pages), profile pages visited per list page, and seconds per page load.
+    list_pages_per_request: Optional[int] = 1
+    profiles_per_list_page: int = 0
+    seconds_per_page: float = 3.0
+
     def __init__(self, name: str, rate_limit: float = 1.0):
         self.name = name
         self.rate_limit = rate_limit
-    
+        # Set by ScraperManager before scrape() is called
+        self.cancel_event: Optional[threading.Event] = None
+        self.progress: Optional[ScrapeProgress] = None
+        # CDP endpoint of a SharedBrowser; when unset each scrape launches its own Chromium
+        self.browser_endpoint: Optional[str] = None
+        # Roster URLs assigned by the planner; built from towns/zips when unset
+        self.planned_requests: Optional[List[RosterRequest]] = None
+        # Shared with the rest of the run by ScraperManager; inline parsing when unset
+        self.parser_pool: Optional[ParserPool] = None
+        # Run budgets shared by ScraperManager; no limits when unset
+        self.budget: Optional[BudgetTracker] = None
+        # Leave profile-only fields (emails) to the enrichment stage instead of visiting profiles inline
+        self.defer_profiles = False
+        # Retries and circuit breaker for page loads, shared across the run by ScraperManager
+        self.navigator: Optional[Navigator] = None
+        # Memory-bounded runs: recycle the browser context once a page's JS heap passes this
+        self.context_memory_limit_mb: Optional[float] = None
+        # Every parsed page body is kept here when set, for `main.py reparse`
+        self.archive: Optional[PageArchive] = None
+        # (town, state) pairs, lowercased, whose roster pages failed to load this run; the
+        # change index doesn't mark their missing agents as disappeared
+        self.failed_scopes: Set[Tuple[str, str]] = set()
+
     @abstractmethod
     def scrape(self, towns: List[str], zips: List[str], max_pages: int) -> Generator[Agent, None, None]:
         """Yields Agent objects."""
         pass
 
+    def roster_url(self, target: Target) -> Optional[str]:
+        """URL of the agent roster covering `target`, or None if this source can't serve it."""
+        return None
+
+    def estimate_cost(self, request_count: int, max_pages: int):
+        """Upper-bound (page loads, seconds) for scraping `request_count` roster URLs."""
+        list_pages = request_count * (self.list_pages_per_request or max_pages)
+        page_loads = list_pages * (1 + self.profiles_per_list_page)
+        return page_loads, page_loads * (self.seconds_per_page + self.rate_limit)
+
+    def _roster_requests(self, towns: List[str], zips: List[str]) -> List[RosterRequest]:
+        """The planner's requests for this connector, or a plan built from the raw inputs."""
+        if self.planned_requests is not None:
+            return self.planned_requests
+        targets = build_targets(towns, zips)
+        return collapse_requests([RosterRequest(url, [t]) for t in targets for url in [self.roster_url(t)] if url])
+
+    def _roster_failed(self, request: RosterRequest):
+        """Record that some of `request`'s roster pages were lost, so its towns are only partly scraped."""
+        # Agents carry the roster's own town (RosterRequest.target); the requested towns are kept too
+        for target in [request.target, *request.targets]:
+            self.failed_scopes.add((target.town.lower(), target.state.lower()))
+
+    def _parse(self, fn: Callable, *args, url: str = "") -> Future:
+        """Hand captured HTML to the parser pool (archiving it first when an archive is set).
+
+        Parsers take the page body first and, usually, its URL second; `url` names
+        pages whose parser doesn't get one (profile pages).
+        """
+        self._archive(fn, *args, url=url)
+        if self.parser_pool is None:
+            self.parser_pool = ParserPool(workers=0)
+        return self.parser_pool.submit(fn, *args)
+
+    def _parsed(self, future: Future, label: str):
+        """Wait for a parse result; None if the parser raised."""
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error(f"Failed to parse {label}: {e}")
+            return None
+
+    def _archive(self, fn: Callable, body, *args, url: str = ""):
+        """Record a fetched body and how to parse it; archive failures never stop a scrape."""
+        if self.archive is None:
+            return
+        page_url = args[0] if args and isinstance(args[0], str) else url
+        try:
+            self.archive.add(self.name, fn, body, args, url=page_url)
+        except Exception as e:
+            logger.warning(f"Could not archive {page_url}: {e}")
+
+    @staticmethod
+    def _label(item) -> str:
+        return getattr(item, "url", None) or getattr(item, "source_url", None) or str(item)
+
+    def _pipeline(self, items: Iterable, fetch: Callable[[Any], Optional[tuple]],
+                  lookahead: int = 2) -> Generator[Tuple[Any, Any], None, None]:
+        """Fetch items in this thread while earlier pages are parsed in the pool.
+
+        `fetch(item)` navigates and returns `(parser, html, *args)`, or None to skip
+        the item. Yields `(item, parsed)` in input order; `parsed` is None when the
+        item was skipped or its parser failed.
+        """
+        pending = deque()
+        for item in items:
+            if self.should_stop():
+                break
+            job = fetch(item)
+            if job is None:
+                future = Future()
+                future.set_result(None)
+            else:
+                future = self._parse(*job, url=self._label(item))
+            pending.append((item, future))
+            # Hand back finished parses right away, but never hold more than `lookahead`
+            while pending and (len(pending) > lookahead or pending[0][1].done()):
+                done_item, done_future = pending.popleft()
+                yield done_item, self._parsed(done_future, self._label(done_item))
+        while pending:
+            done_item, done_future = pending.popleft()
+            yield done_item, self._parsed(done_future, self._label(done_item))
+
+    def is_cancelled(self) -> bool:
+        """True once the run has been cancelled; connectors check this inside their loops."""
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def should_stop(self) -> bool:
+        """True when cancelled or a budget says this source is no longer worth scraping."""
+        return self.is_cancelled() or (self.budget is not None and self.budget.stop_reason() is not None)
+
+    def allow_profile_visit(self) -> bool:
+        """Claim a profile page load from the budget; False means use the roster data as-is."""
+        return self.budget is None or self.budget.allow_profile_visit()
+
+    def _launch_browser(self, p):
+        """Connect to the shared browser if one is configured, otherwise launch headless Chromium."""
+        return launch_browser(p, self.browser_endpoint)
+
+    def _nav(self) -> Navigator:
+        if self.navigator is None:
+            self.navigator = Navigator(cancel_event=self.cancel_event)
+        return self.navigator
+
+    def _goto(self, page, url: str, **kwargs):
+        """Navigate through the run's Navigator; raises NavigationError once retries are exhausted."""
+        return self._nav().goto(page, url, **kwargs)
+
+    def _recycle_context(self, browser, context, page, setup: Optional[Callable] = None):
+        """Swap in a fresh context and page once the current page's JS heap passes the limit.
+
+        Returns the (context, page) to keep using; `setup(page)` re-attaches listeners.
+        """
+        if not self.context_memory_limit_mb:
+            return context, page
+        try:
+            heap_mb = page.evaluate("() => performance.memory ? performance.memory.usedJSHeapSize : 0") / 2 ** 20
+        except Exception:
+            return context, page
+        if heap_mb < self.context_memory_limit_mb:
+            return context, page
+        logger.info(f"{self.name}: browser page holds {heap_mb:.0f} MB of JS heap; recycling its context.")
+        context.close()
+        context = browser.new_context(user_agent=USER_AGENT)
+        page = context.new_page()
+        if setup is not None:
+            setup(page)
+        return context, page
+
+    def _set_pages_total(self, total: int):
+        if self.progress:
+            self.progress.set_pages_total(self.name, total)
+
+    def _advance(self, pages: int = 1):
+        if self.progress:
+            self.progress.advance(self.name, pages)
+
     def _sleep(self):
-        """Sleep to respect rate limit with some jitter."""
+        """Sleep to respect rate limit with some jitter. Wakes early on cancellation."""
         sleep_time = self.rate_limit + random.uniform(0, 0.5)
-        time.sleep(sleep_time)
+        if self.cancel_event is not None:
+            self.cancel_event.wait(sleep_time)
+        else:
+            time.sleep(sleep_time)
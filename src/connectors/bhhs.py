@@ -1,98 +1,60 @@
-from typing import List, Generator
+from typing import List, Generator, Optional
+from urllib.parse import quote
 from playwright.sync_api import sync_playwright
 from src.connectors.base_connector import BaseConnector
 from src.models import Agent
-from src.utils import normalize_phone, parse_name
+from src.planner import RosterRequest, Target
+from src.parsers import parse_bhhs_roster
 from src.config import USER_AGENT
 from loguru import logger
-import time
-from datetime import datetime
+
+BHHS_BASE = "https://www.foxroach.com"
 
 class BHHSConnector(BaseConnector):
-    def __init__(self, rate_limit: float = 1.0):
+    def __init__(self, rate_limit: float = 1.0, site: str = BHHS_BASE):
         super().__init__("BHHS", rate_limit)
+        self.site = site.rstrip("/")
         # Using the specific Wayne-Devon office URL as requested/inspected
         self.base_url = "https://wayne-devon.foxroach.com/roster/agents"
 
+    def roster_url(self, target: Target) -> Optional[str]:
+        # Attempt dynamic search on main Fox & Roach site
+        # Pattern guess: https://www.foxroach.com/roster/agents?city=Town&state=State
+        return f"{self.site}/roster/agents?city={quote(target.roster_city)}&state={target.state}"
+
     def scrape(self, towns: List[str], zips: List[str], max_pages: int) -> Generator[Agent, None, None]:
-        urls = []
-        for town_input in towns:
-            if "," in town_input:
-                town, state = [x.strip() for x in town_input.split(",", 1)]
-                # Attempt dynamic search on main Fox & Roach site
-                # Pattern guess: https://www.foxroach.com/roster/agents?city=Town&state=State
-                urls.append(f"https://www.foxroach.com/roster/agents?city={town}&state={state}")
+        requests = self._roster_requests(towns, zips)
         
-        if not urls:
+        if not requests:
             logger.warning("No 'Town, State' inputs for BHHS. Skipping.")
             return
 
+        self._set_pages_total(len(requests))
+
         with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
+            browser = self._launch_browser(p)
             context = browser.new_context(user_agent=USER_AGENT)
             page = context.new_page()
 
-            for url in urls:
-                logger.info(f"Scraping BHHS URL: {url}")
+            def fetch_roster(request: RosterRequest):
+                nonlocal context, page
+                context, page = self._recycle_context(browser, context, page)
+                logger.info(f"Scraping BHHS URL: {request.url}")
                 try:
-                    page.goto(url, timeout=60000)
+                    self._goto(page, request.url, timeout=60000)
                     page.wait_for_timeout(2000)
                 except Exception as e:
-                    logger.error(f"Failed to load {url}: {e}")
-                    continue
+                    logger.error(f"Failed to load {request.url}: {e}")
+                    self._roster_failed(request)
+                    return None
+                # Parsing happens in the pool while the next roster loads
+                return parse_bhhs_roster, page.content(), request.url, request.target
 
-                cards = page.locator('div.rn-agent-roster-card')
-            count = cards.count()
-            logger.info(f"Found {count} BHHS agents")
-            
-            for i in range(count):
-                card = cards.nth(i)
-                try:
-                    # Name extraction
-                    name_el = card.locator('h1.rn-agent-roster-name')
-                    full_name_text = name_el.inner_text().strip()
-                    
-                    # Remove title if present (e.g., "Karen Teran Sales Associate")
-                    title_el = card.locator('h1.rn-agent-roster-name span.account-title')
-                    if title_el.count() > 0:
-                        title_text = title_el.inner_text()
-                        full_name = full_name_text.replace(title_text, "").strip()
-                    else:
-                        full_name = full_name_text
-                    
-                    first, last = parse_name(full_name)
-                    
-                    # Phone
-                    phone_el = card.locator('a[href^="tel:"]').first
-                    phone = None
-                    if phone_el.count() > 0:
-                        phone_href = phone_el.get_attribute('href')
-                        phone = normalize_phone(phone_href.replace('tel:', ''))
-                    
-                    # Profile URL
-                    profile_link = card.locator('div.rn-agent-roster-header a').first
-                    profile_url = None
-                    if profile_link.count() > 0:
-                        href = profile_link.get_attribute('href')
-                        if href:
-                            profile_url = f"https://wayne-devon.foxroach.com{href}" if href.startswith('/') else href
+            for request, agents in self._pipeline(requests, fetch_roster):
+                self._advance()
+                if agents is None:
+                    continue
+                logger.info(f"Found {len(agents)} BHHS agents")
+                yield from agents
 
-                    agent = Agent(
-                        first_name=first,
-                        last_name=last,
-                        full_name=full_name,
-                        email=None, # No direct email on roster
-                        phone=phone,
-                        brokerage="BHHS Fox & Roach",
-                        city="Wayne", 
-                        state="",
-                        zip_code="19087",
-                        source=self.name,
-                        source_url=profile_url or url,
-                        scraped_at=datetime.now().isoformat()
-                    )
-                    yield agent
-                    
-                except Exception as e:
-                    logger.warning(f"Error parsing BHHS agent card {i}: {e}")
-                    continue
\ No newline at end of file
+            browser.close()
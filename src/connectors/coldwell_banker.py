@@ -1,174 +1,147 @@
-from typing import List, Generator
+from typing import List, Generator, Optional
 from playwright.sync_api import sync_playwright
 from src.connectors.base_connector import BaseConnector
 from src.models import Agent
-from src.utils import normalize_phone, parse_name
-from src.config import USER_AGENT
+from src.planner import Target
+from src.connectors.prefetch import TabPrefetcher
+from src.navigation import NavigationError, classify_exception
+from src.parsers import parse_cb_page, parse_profile_contact
+from src.parsers.coldwell_banker import CB_BASE
+from src.config import CB_PREFETCH_DEPTH, USER_AGENT
 from loguru import logger
-import time
 
 class CBConnector(BaseConnector):
-    def __init__(self, rate_limit: float = 1.0):
+    def __init__(self, rate_limit: float = 1.0, prefetch_depth: int = CB_PREFETCH_DEPTH, base_url: str = CB_BASE):
         super().__init__("ColdwellBanker", rate_limit)
-        self.base_url = "https://www.coldwellbankerhomes.com"
+        self.base_url = base_url.rstrip("/")
+        # List pages loaded ahead in background tabs (0 disables prefetching)
+        self.prefetch_depth = prefetch_depth
+
+    list_pages_per_request = None
+    profiles_per_list_page = 24
+
+    def roster_url(self, target: Target) -> Optional[str]:
+        town_slug = target.roster_city.lower().replace(" ", "-")
+        return f"{self.base_url}/{target.state.lower()}/{town_slug}/agents/"
+
+    def _load_list_page(self, prefetcher: TabPrefetcher, page, url: str) -> str:
+        """HTML of a list page: the prefetched tab if it loaded, else a retried load in `page`."""
+        navigator = self._nav()
+        if navigator.allows(url):
+            try:
+                return prefetcher.take(url)
+            except Exception as e:
+                # Error pages (429, 5xx, ...) and timeouts count against the host like any other failed load
+                navigator.record_failure(url, e.kind if isinstance(e, NavigationError) else classify_exception(e))
+                logger.warning(f"Prefetch of {url} failed ({e}); loading it directly.")
+        else:
+            prefetcher.discard()
+        self._goto(page, url, timeout=60000)
+        page.wait_for_timeout(2000)  # Wait for load
+        return page.content()
 
     def scrape(self, towns: List[str], zips: List[str], max_pages: int) -> Generator[Agent, None, None]:
-        if not towns:
-            logger.warning("No towns provided for Coldwell Banker.")
+        requests = self._roster_requests(towns, zips)
+        if not requests:
+            logger.warning("No 'Town, State' inputs for Coldwell Banker. Skipping.")
             return
         
+        # Upper bound; towns that run out of pages early are topped up when they finish
+        self._set_pages_total(len(requests) * max_pages)
+
         with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
+            browser = self._launch_browser(p)
             context = browser.new_context(user_agent=USER_AGENT)
-            page = context.new_page()
-
-            for town_input in towns:
-                # Parse "Town, State" from input if available
-                if "," not in town_input:
-                    logger.warning(f"Skipping '{town_input}' for Coldwell Banker - missing state (e.g. 'Town, State').")
-                    continue
-
-                town_name, state_code = [part.strip() for part in town_input.split(",", 1)]
-                town_slug = town_name.lower().replace(" ", "-")
-                state_slug = state_code.lower()
-                
-                url = f"{self.base_url}/{state_slug}/{town_slug}/agents/"
-                logger.info(f"Scraping Coldwell Banker URL: {url}")
-                
+            page = context.new_page()  # profile tab; list pages use prefetch tabs
+
+            def fetch_profile(agent: Agent):
+                if not self.allow_profile_visit():
+                    return None
+                logger.info(f"Visiting profile: {agent.source_url}")
                 try:
-                    page.goto(url, timeout=60000)
-                    page.wait_for_timeout(2000) # Wait for load
+                    self._goto(page, agent.source_url, timeout=30000)
                 except Exception as e:
-                    logger.error(f"Failed to load {url}: {e}")
-                    continue
+                    logger.error(f"Error scraping profile {agent.source_url}: {e}")
+                    return None
+                return parse_profile_contact, page.content()
+
+            for request in requests:
+                if self.should_stop():
+                    break
+
+                context, page = self._recycle_context(browser, context, page)
+                url = request.url
+                town_name = request.target.town
+                logger.info(f"Scraping Coldwell Banker URL: {url}")
+
+                def page_url(n: int) -> str:
+                    return url if n == 1 else f"{url}p_{n}/"
+
+                # List pages load in their own tabs ahead of time, so page N+1 is
+                # already rendering while page N's profiles are being visited.
+                prefetcher = TabPrefetcher(context, depth=self.prefetch_depth)
+                last_page: Optional[int] = None  # from the pager; None until seen
+
+                def schedule_ahead(current: int):
+                    stop = min(max_pages, last_page or max_pages)
+                    for n in range(current + 1, min(current + self.prefetch_depth, stop) + 1):
+                        prefetcher.schedule(page_url(n))
 
-                # Pagination loop
                 current_page = 1
-                while current_page <= max_pages:
-                    logger.info(f"Processing page {current_page} for {town_name}")
-                    
-                    # Find agent blocks
-                    agent_blocks = page.locator('.agent-block')
-                    count = agent_blocks.count()
-                    logger.info(f"Found {count} agents on page {current_page}")
-                    
-                    if count == 0:
-                        logger.warning("No agents found, stopping.")
-                        break
-
-                    # Collect basic info and profile URLs
-                    page_agents = []
-                    for i in range(count):
-                        try:
-                            block = agent_blocks.nth(i)
-                            
-                            # Name
-                            name_el = block.locator('.agent-content-name a')
-                            if name_el.count() == 0:
-                                continue
-                            full_name = name_el.text_content().strip()
-                            profile_href = name_el.get_attribute("href")
-                            profile_url = f"{self.base_url}{profile_href}" if profile_href else ""
-                            
-                            # Phone
-                            phone_el = block.locator('a.phone-link')
-                            phone = ""
-                            if phone_el.count() > 0:
-                                # Prefer mobile if available, otherwise take first
-                                mobile_el = block.locator('a.phone-link[data-phone-type="mobile"]')
-                                if mobile_el.count() > 0:
-                                    phone = normalize_phone(mobile_el.first.text_content().strip())
-                                else:
-                                    phone = normalize_phone(phone_el.first.text_content().strip())
-                                
-                            # Office
-                            office_el = block.locator('p.office a')
-                            office = office_el.text_content().strip() if office_el.count() > 0 else ""
-                            
-                            first, last = parse_name(full_name)
-                            
-                            page_agents.append({
-                                "first": first,
-                                "last": last,
-                                "full_name": full_name,
-                                "phone": phone,
-                                "office": office,
-                                "profile_url": profile_url,
-                                "town": town_name,
-                                "state": state_code.upper()
-                            })
-                            
-                        except Exception as e:
-                            logger.error(f"Error parsing agent block {i}: {e}")
+                try:
+                    while current_page <= max_pages and (last_page is None or current_page <= last_page):
+                        if self.should_stop():
+                            break
 
-                    # Now visit each profile to get email
-                    for agent_data in page_agents:
-                        if not agent_data["profile_url"]:
-                            continue
-                            
                         try:
-                            logger.info(f"Visiting profile: {agent_data['profile_url']}")
-                            page.goto(agent_data["profile_url"], timeout=30000)
-                            # page.wait_for_selector('a[href^="mailto:"]', timeout=5000) # Might not exist
-                            
-                            email = ""
-                            email_el = page.locator('a[href^="mailto:"]')
-                            if email_el.count() > 0:
-                                href = email_el.first.get_attribute("href")
-                                if href:
-                                    email = href.replace("mailto:", "").split("?")[0].strip()
-                            
-                            agent = Agent(
-                                first_name=agent_data["first"],
-                                last_name=agent_data["last"],
-                                full_name=agent_data["full_name"],
-                                email=email,
-                                phone=agent_data["phone"],
-                                brokerage=f"Coldwell Banker - {agent_data['office']}",
-                                city=agent_data["town"].title(),
-                                state=agent_data["state"],
-                                source="Coldwell Banker",
-                                source_url=agent_data["profile_url"],
-                                scraped_at=time.strftime("%Y-%m-%d %H:%M:%S")
-                            )
-                            yield agent
-                            
-                            self._sleep()
-                            
+                            html = self._load_list_page(prefetcher, page, page_url(current_page))
                         except Exception as e:
-                            logger.error(f"Error scraping profile {agent_data['profile_url']}: {e}")
-                            # Yield partial data
-                            agent = Agent(
-                                first_name=agent_data["first"],
-                                last_name=agent_data["last"],
-                                full_name=agent_data["full_name"],
-                                email="",
-                                phone=agent_data["phone"],
-                                brokerage=f"Coldwell Banker - {agent_data['office']}",
-                                city=agent_data["town"].title(),
-                                state=agent_data["state"],
-                                source="Coldwell Banker",
-                                source_url=agent_data["profile_url"],
-                                scraped_at=time.strftime("%Y-%m-%d %H:%M:%S")
-                            )
-                            yield agent
-
-                    # Go back to list page for next iteration if needed
-                    # Actually, visiting profiles navigates away.
-                    # We need to restore the list page state.
-                    # Since we are iterating pages via URL, we can just goto the next page URL.
-                    
-                    current_page += 1
-                    if current_page > max_pages:
-                        break
-                        
-                    next_url = f"{self.base_url}/pa/{town_slug}/agents/p_{current_page}/"
-                    logger.info(f"Moving to next page: {next_url}")
-                    try:
-                        page.goto(next_url, timeout=60000)
-                        page.wait_for_timeout(2000)
-                    except Exception as e:
-                        logger.error(f"Failed to load next page {next_url}: {e}")
-                        break
-            
+                            logger.error(f"Failed to load {page_url(current_page)}: {e}")
+                            self._roster_failed(request)
+                            break
+                        schedule_ahead(current_page)
+
+                        logger.info(f"Processing page {current_page} for {town_name}")
+                        parsed = self._parsed(
+                            self._parse(parse_cb_page, html, page_url(current_page), request.target, current_page),
+                            page_url(current_page),
+                        )
+                        page_agents, pager_last = parsed or ([], None)
+                        logger.info(f"Found {len(page_agents)} agents on page {current_page}")
+
+                        if pager_last is not None:
+                            last_page = pager_last
+                            # Drop prefetches past the last page the pager knows about
+                            wanted = {page_url(n) for n in range(current_page + 1, last_page + 1)}
+                            prefetcher.discard(keep=wanted.__contains__)
+                            schedule_ahead(current_page)
+
+                        if not page_agents:
+                            logger.warning("No agents found, stopping.")
+                            break
+
+                        if self.defer_profiles:
+                            # Emails are filled in by the enrichment stage, after dedup
+                            yield from page_agents
+                        else:
+                            with_profiles = [a for a in page_agents if a.source_url]
+                            for agent, contact in self._pipeline(with_profiles, fetch_profile):
+                                if contact is not None:
+                                    agent.email = contact[0] or ""
+                                    yield agent
+                                    self._sleep()
+                                else:
+                                    # Yield partial data
+                                    yield agent
+
+                        self._advance()
+                        current_page += 1
+                finally:
+                    prefetcher.discard()
+
+                if last_page is not None and current_page > last_page:
+                    logger.info(f"Reached last page ({last_page}) for {town_name}")
+                # Count pages skipped by an early stop so the bar still reaches 100%
+                self._advance(max(max_pages - current_page + 1, 0))
+
             browser.close()
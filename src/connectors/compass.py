@@ -1,59 +1,185 @@
-from typing import List, Generator
+from typing import Dict, List, Generator, Optional
 from playwright.sync_api import sync_playwright
 from src.connectors.base_connector import BaseConnector
 from src.models import Agent
-from src.utils import normalize_phone, parse_name
-from src.config import USER_AGENT
+from src.planner import RosterRequest, Target
+from src.navigation import NavigationError
+from src.parsers import parse_agent_search_body, parse_agent_search_response, parse_compass_cards
+from src.parsers.compass import COMPASS_BASE
+from src.config import USER_AGENT, COMPASS_AGENT_SEARCH_URL, COMPASS_API_PAGE_SIZE
 from loguru import logger
-import time
+import requests
+from urllib.parse import urlsplit
+
+FETCH_MODES = ("auto", "api", "dom")
+
+
+class CompassFeedUnavailable(Exception):
+    """The agent-search JSON feed could not be used for a location."""
+
 
 class CompassConnector(BaseConnector):
-    def __init__(self, rate_limit: float = 1.0):
+    def __init__(self, rate_limit: float = 1.0, fetch_mode: str = "auto", session: Optional[requests.Session] = None,
+                 api_url: Optional[str] = None, page_size: int = COMPASS_API_PAGE_SIZE, site: str = COMPASS_BASE):
         super().__init__("Compass", rate_limit)
+        if fetch_mode not in FETCH_MODES:
+            raise ValueError(f"fetch_mode must be one of {FETCH_MODES}")
         self.start_urls = []
+        # auto: JSON feed first, rendered page only for locations the feed can't serve
+        self.fetch_mode = fetch_mode
+        self.site = site.rstrip("/")
+        # The feed lives on the same site, so pointing `site` at a fixture server moves both
+        self.api_url = api_url or f"{self.site}{urlsplit(COMPASS_AGENT_SEARCH_URL).path}"
+        self.page_size = page_size
+        self.session = session
+        self.discovered_feed_urls = set()
+        # Location page URL -> its roster request, for recording failed loads
+        self.location_requests: Dict[str, RosterRequest] = {}
+
+    list_pages_per_request = None
+    seconds_per_page = 1.0
+
+    def roster_url(self, target: Target) -> Optional[str]:
+        # Pattern: https://www.compass.com/agents/locations/ridgewood-nj/
+        return f"{self.site}/agents/locations/{self._slug(target)}/"
+
+    @staticmethod
+    def _slug(target: Target) -> str:
+        return f"{target.roster_city.lower().replace(' ', '-')}-{target.state.lower()}"
 
     def scrape(self, towns: List[str], zips: List[str], max_pages: int) -> Generator[Agent, None, None]:
-        # Determine URLs to scrape
-        urls = []
-        
-        # Try to generate dynamic URLs from input
-        for town_input in towns:
-            if "," in town_input:
-                town, state = [x.strip() for x in town_input.split(",", 1)]
-                # Pattern: https://www.compass.com/agents/locations/ridgewood-nj/
-                slug = f"{town.lower().replace(' ', '-')}-{state.lower()}"
-                urls.append(f"https://www.compass.com/agents/locations/{slug}/")
+        requests_ = self._roster_requests(towns, zips)
+        self.location_requests = {r.url: r for r in requests_}
+        locations = [(self._slug(r.primary), r.url) for r in requests_]
         
         # If no dynamic URLs (or only plain towns provided), warn and return empty.
-        if not urls:
+        if not locations:
             logger.warning("No valid 'Town, State' inputs found for Compass. Skipping.")
             return
 
+        self._set_pages_total(len(locations))
+
+        if self.fetch_mode == "dom":
+            yield from self._scrape_dom([url for _, url in locations], max_pages)
+            return
+
+        dom_urls = []
+        for slug, url in locations:
+            if self.should_stop():
+                break
+            try:
+                yield from self._scrape_api(slug, url, max_pages)
+            except CompassFeedUnavailable as e:
+                if self.fetch_mode == "api":
+                    logger.error(f"Compass feed failed for {slug}: {e}")
+                    self._location_failed(url)
+                else:
+                    logger.warning(f"Compass feed unavailable for {slug} ({e}); falling back to page scraping.")
+                    dom_urls.append(url)
+                    continue
+            self._advance()
+
+        if dom_urls and not self.should_stop():
+            yield from self._scrape_dom(dom_urls, max_pages)
+
+    def _location_failed(self, url: str):
+        if url in self.location_requests:
+            self._roster_failed(self.location_requests[url])
+
+    def _get_session(self) -> requests.Session:
+        if self.session is None:
+            self.session = requests.Session()
+            self.session.headers.update({
+                "User-Agent": USER_AGENT,
+                "Accept": "application/json",
+                "X-Requested-With": "XMLHttpRequest",
+            })
+        return self.session
+
+    def _scrape_api(self, slug: str, referer: str, max_pages: int) -> Generator[Agent, None, None]:
+        """Page through the agent-search feed for one location, `page_size` agents per request."""
+        session = self._get_session()
+        target = self.location_requests[referer].target if referer in self.location_requests else None
+        start = 0
+        for page_number in range(max_pages):
+            if self.should_stop():
+                return
+            try:
+                response = self._nav().fetch(self.api_url, lambda: session.get(
+                    self.api_url,
+                    params={"location": slug, "start": start, "num": self.page_size},
+                    headers={"Referer": referer},
+                    timeout=30,
+                ))
+                response.raise_for_status()
+                agents, total = parse_agent_search_response(response.json(), self.site, target)
+                if self.archive is not None:
+                    self._archive(parse_agent_search_body, response.text, response.url, self.site, target)
+            except (requests.RequestException, NavigationError, ValueError) as e:
+                if page_number == 0:
+                    raise CompassFeedUnavailable(str(e)) from e
+                # Keep what earlier pages returned
+                logger.error(f"Compass feed failed for {slug} at offset {start}: {e}")
+                self._location_failed(referer)
+                return
+
+            if page_number == 0 and not agents:
+                raise CompassFeedUnavailable("feed returned no agents")
+
+            logger.info(f"Compass feed {slug}: {len(agents)} agents at offset {start}" + (f" of {total}" if total else ""))
+            yield from agents
+
+            start += len(agents)
+            if not agents or len(agents) < self.page_size or (total is not None and start >= total):
+                return
+            self._sleep()
+
+    def _record_feed(self, response):
+        """Log JSON agent feeds the rendered page calls so COMPASS_AGENT_SEARCH_URL can be kept current."""
+        try:
+            if "agent" in response.url and "json" in response.headers.get("content-type", ""):
+                endpoint = response.url.split("?")[0]
+                if endpoint not in self.discovered_feed_urls:
+                    self.discovered_feed_urls.add(endpoint)
+                    logger.info(f"Compass page requested agent feed: {response.request.method} {endpoint}")
+        except Exception:
+            pass
+
+    def _scrape_dom(self, urls: List[str], max_pages: int) -> Generator[Agent, None, None]:
+        """Fallback: render each location page, scroll until no new cards load, then parse the cards."""
         with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
+            browser = self._launch_browser(p)
             context = browser.new_context(user_agent=USER_AGENT)
             page = context.new_page()
+            page.on("response", self._record_feed)
 
-            for url in urls:
+            def fetch_location(url: str):
+                nonlocal context, page
+                # A fully scrolled location page keeps every card in the DOM
+                context, page = self._recycle_context(browser, context, page,
+                                                      setup=lambda new_page: new_page.on("response", self._record_feed))
                 logger.info(f"Scraping Compass URL: {url}")
                 try:
-                    page.goto(url, timeout=60000)
+                    self._goto(page, url, timeout=60000)
                     # Check for 404 or redirect to home
-                    if page.url == "https://www.compass.com/" or "404" in page.title():
+                    if page.url == f"{self.site}/" or "404" in page.title():
                         logger.warning(f"URL {url} redirected to home or 404. Skipping.")
-                        continue
+                        return None
                         
                     page.wait_for_selector('[class*="agentCard"]', timeout=10000)
                 except Exception as e:
                     logger.error(f"Failed to load {url}: {e}")
-                    continue
+                    self._location_failed(url)
+                    return None
 
                 # Scroll to load more agents
                 # We treat each scroll as a "page" roughly
                 previous_count = 0
                 for i in range(max_pages):
-                    cards = page.locator('[class*="agentCard"]')
-                    count = cards.count()
+                    if self.should_stop():
+                        break
+
+                    count = page.locator('.agentCard-name').count()
                     logger.info(f"Found {count} agents so far...")
                     
                     if count == previous_count and i > 0:
@@ -65,72 +191,16 @@ class CompassConnector(BaseConnector):
                     # Scroll to bottom
                     page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
                     self._sleep() # Wait for load
-                    
-                    # Yield new agents (or all and dedupe later)
-                    # For simplicity, we parse all at the end or parse visible ones.
-                    # Since DOM elements might be removed/added, parsing all at the end is safer if memory allows,
-                    # but for large lists, we might want to parse incrementally.
-                    # However, Playwright handles locators dynamically.
-                    
-                # Parse all visible cards
-                cards = page.locator('[class*="agentCard"]')
-                count = cards.count()
-                logger.info(f"Parsing {count} agents from {url}")
-                
-                for i in range(count):
-                    try:
-                        card = cards.nth(i)
-                        
-                        # Extract Name
-                        name_el = card.locator('.agentCard-name')
-                        if name_el.count() == 0:
-                            continue
-                        full_name = name_el.text_content().strip()
-                        first, last = parse_name(full_name)
-                        
-                        # Extract Email
-                        email_el = card.locator('a[href^="mailto:"]')
-                        email = ""
-                        if email_el.count() > 0:
-                            href = email_el.get_attribute("href")
-                            if href:
-                                email = href.replace("mailto:", "").strip()
-                        
-                        # Extract Phone
-                        phone_el = card.locator('a[href^="tel:"]')
-                        phone = ""
-                        if phone_el.count() > 0:
-                            phone_text = phone_el.text_content().strip()
-                            # Often text is "M: 215..."
-                            phone = normalize_phone(phone_text)
-                        
-                        # Extract Link
-                        link_el = card.locator('a.agentCard-imageWrapper')
-                        source_url = ""
-                        if link_el.count() > 0:
-                            href = link_el.get_attribute("href")
-                            if href:
-                                source_url = f"https://www.compass.com{href}"
-                        
-                        agent = Agent(
-                            first_name=first,
-                            last_name=last,
-                            full_name=full_name,
-                            email=email,
-                            phone=phone,
-                            brokerage="Compass",
-                            source="Compass",
-                            source_url=source_url,
-                            scraped_at=time.strftime("%Y-%m-%dT%H:%M:%S")
-                        )
-                        
-                        # Filter by town/zip if possible? 
-                        # Since we are scraping a "Main Line" page, we assume they serve the area.
-                        # We can refine later if we visit profile pages.
-                        
-                        yield agent
-                        
-                    except Exception as e:
-                        logger.error(f"Error parsing card {i}: {e}")
+
+                # Parse all loaded cards from one HTML snapshot, off this thread
+                request = self.location_requests.get(url)
+                return parse_compass_cards, page.content(), url, request.target if request else None
+
+            for url, agents in self._pipeline(urls, fetch_location):
+                self._advance()
+                if agents is None:
+                    continue
+                logger.info(f"Parsed {len(agents)} agents from {url}")
+                yield from agents
             
             browser.close()
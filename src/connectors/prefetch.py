@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict
+from typing import List
+from loguru import logger
+from src.navigation import NavigationError, classify_status
+
+
+class TabPrefetcher:
+    """Loads upcoming list pages in background tabs while the caller works in another tab.
+
+    The sync API blocks on `page.goto()`, so a prefetch starts navigation with a
+    script-driven location change and returns immediately; Chromium loads the
+    page in parallel and `take()` only waits for whatever is left. That load
+    bypasses the Navigator, so `take()` checks the document's HTTP status itself.
+    """
+
+    def __init__(self, context, depth: int = 1, settle_ms: int = 2000, timeout_ms: int = 60000):
+        self.context = context
+        self.depth = depth
+        # Minimum time a page gets to render its JS-built list, counted from when its load started
+        self.settle_ms = settle_ms
+        self.timeout_ms = timeout_ms
+        self._tabs: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _start(self, url: str):
+        tab = self.context.new_page()
+        # Main-document responses, redirects included; the last one is the page that loaded
+        statuses: List[int] = []
+
+        def on_response(response):
+            if response.request.is_navigation_request() and response.frame == tab.main_frame:
+                statuses.append(response.status)
+
+        tab.on("response", on_response)
+        tab.evaluate("url => { window.location.href = url; }", url)
+        self._tabs[url] = (tab, time.monotonic(), statuses)
+
+    def schedule(self, url: str):
+        """Start loading `url` in a background tab unless it is already in flight or the depth is used up."""
+        if url in self._tabs or len(self._tabs) >= self.depth:
+            return
+        logger.debug(f"Prefetching {url}")
+        self._start(url)
+
+    def take(self, url: str) -> str:
+        """Return the HTML of `url`, waiting for its prefetch to finish (or loading it now).
+
+        Raises NavigationError when the page came back with an error status (429, 5xx, other 4xx).
+        """
+        if url not in self._tabs:
+            self._start(url)
+        tab, started, statuses = self._tabs.pop(url)
+        try:
+            tab.wait_for_url(lambda u: u != "about:blank", timeout=self.timeout_ms)
+            tab.wait_for_load_state("load", timeout=self.timeout_ms)
+            status = statuses[-1] if statuses else None
+            kind = classify_status(status)
+            if kind is not None:
+                raise NavigationError(url, kind, f"HTTP {status}")
+            remaining = self.settle_ms - (time.monotonic() - started) * 1000
+            if remaining > 0:
+                tab.wait_for_timeout(remaining)
+            return tab.content()
+        finally:
+            tab.close()
+
+    def discard(self, keep=lambda url: False):
+        """Close prefetched tabs that are no longer needed (all of them by default)."""
+        for url in list(self._tabs):
+            if not keep(url):
+                tab = self._tabs.pop(url)[0]
+                tab.close()
+
+    @property
+    def in_flight(self):
+        return list(self._tabs)
@@ -0,0 +1,79 @@
+"""Brokerages defined purely by a SiteSpec.
+
+Adding a source is a spec here plus a registry entry in src/connectors/__init__.py.
+
+COLDWELL_BANKER is the hand-written CBConnector ported to a spec: same roster
+URLs, `p_N/` pages and selectors as src/parsers/coldwell_banker.py. It is
+registered as the opt-in `cbspec`; `cb` stays the default because it also
+prefetches list pages in background tabs and reads the last page off the pager.
+
+KELLER_WILLIAMS and REMAX are UNVERIFIED: their URL patterns and selectors have
+not been checked against the live sites, so they are not in the registry. Check
+them with a one-town run (`SpecConnector(KELLER_WILLIAMS).scrape(["Wayne, PA"], [], 1)`)
+before registering them.
+"""
+from src.connectors.spec_connector import SpecConnector
+from src.parsers.coldwell_banker import CB_BASE
+from src.parsers.spec import NUMBERED, SCROLL, Field, SiteSpec
+
+COLDWELL_BANKER = SiteSpec(
+    source="Coldwell Banker",
+    brokerage="Coldwell Banker",
+    site=CB_BASE,
+    roster_url="{site}/{state_lower}/{city_slug}/agents/",
+    card=".agent-block",
+    name=Field(".agent-content-name a"),
+    # Prefer the mobile number, otherwise the first one listed
+    phone=Field('a.phone-link[data-phone-type="mobile"]', fallback="a.phone-link"),
+    profile_url=Field(".agent-content-name a", "href"),
+    office=Field("p.office a"),
+    pagination=NUMBERED,
+    page_url="{url}p_{page}/",
+    next_link='a[rel="next"], a.next, li.next a',
+    visit_profiles=True,
+)
+
+KELLER_WILLIAMS = SiteSpec(
+    source="KellerWilliams",
+    brokerage="Keller Williams",
+    site="https://www.kw.com",
+    # Agent search is a client-rendered app that appends cards as it scrolls
+    roster_url="{site}/agent/search/{state_lower}/{city_slug}",
+    card="div.AgentCard, [data-testid='agent-card']",
+    name=Field(".AgentCard__name, [data-testid='agent-name']"),
+    phone=Field('a[href^="tel:"]', "href"),
+    email=Field('a[href^="mailto:"]', "href"),
+    profile_url=Field('a[href*="/agent/"]', "href"),
+    office=Field(".AgentCard__office, [data-testid='agent-office']"),
+    pagination=SCROLL,
+)
+
+REMAX = SiteSpec(
+    source="REMAX",
+    brokerage="RE/MAX",
+    site="https://www.remax.com",
+    roster_url="{site}/real-estate-agents/{city_slug}-{state_lower}",
+    card="div.agent-card, li.roster-card",
+    name=Field(".agent-card-name, .roster-card-name"),
+    phone=Field('a[href^="tel:"]', "href"),
+    profile_url=Field('a.agent-card-link, a[href*="/real-estate-agents/"]', "href"),
+    office=Field(".agent-card-office, .roster-card-office"),
+    pagination=NUMBERED,
+    page_url="{url}?page={page}",
+    next_link='a[rel="next"], li.pagination-next a',
+    # Rosters are server-rendered; no browser needed
+    render=False,
+    visit_profiles=True,
+)
+
+
+class ColdwellBankerSpecConnector(SpecConnector):
+    spec = COLDWELL_BANKER
+
+
+class KellerWilliamsConnector(SpecConnector):
+    spec = KELLER_WILLIAMS
+
+
+class REMAXConnector(SpecConnector):
+    spec = REMAX
@@ -0,0 +1,171 @@
+from dataclasses import replace
+from typing import Dict, Generator, List, Optional, Set, Tuple
+import requests
+from playwright.sync_api import sync_playwright
+from src.connectors.base_connector import BaseConnector
+from src.models import Agent
+from src.planner import RosterRequest, Target
+from src.parsers import parse_profile_contact
+from src.parsers.common import make_tree
+from src.parsers.spec import NUMBERED, SCROLL, SINGLE, SiteSpec, has_next, parse_spec_page
+from src.config import USER_AGENT
+from loguru import logger
+
+
+class SpecConnector(BaseConnector):
+    """Runs any `SiteSpec`: a brokerage is a spec, not another hand-written loop.
+
+    Pages load through the run's Navigator (retries, circuit breaker) and are
+    parsed in the parser pool while the next one loads. Static sites
+    (`render=False`) are fetched over HTTP with no browser at all; profile
+    emails are visited inline or left to the cached, concurrent enrichment stage.
+    """
+
+    spec: Optional[SiteSpec] = None
+
+    def __init__(self, spec: Optional[SiteSpec] = None, rate_limit: float = 1.0, site: Optional[str] = None):
+        spec = spec or self.spec
+        if spec is None:
+            raise ValueError(f"{type(self).__name__} needs a SiteSpec")
+        if site is not None:
+            # e.g. a fixture server standing in for the real site
+            spec = replace(spec, site=site.rstrip("/"))
+        super().__init__(spec.source, rate_limit)
+        self.spec = spec
+        self.session: Optional[requests.Session] = None
+        # Cost model for the planner
+        self.list_pages_per_request = 1 if spec.pagination == SINGLE else None
+        self.profiles_per_list_page = 20 if spec.visit_profiles else 0
+        self.seconds_per_page = 3.0 if spec.render else 1.0
+
+    def roster_url(self, target: Target) -> Optional[str]:
+        return self.spec.url_for(target)
+
+    def scrape(self, towns: List[str], zips: List[str], max_pages: int) -> Generator[Agent, None, None]:
+        requests_ = self._roster_requests(towns, zips)
+        if not requests_:
+            logger.warning(f"No 'Town, State' inputs for {self.name}. Skipping.")
+            return
+        self._set_pages_total(len(requests_))
+
+        if not self.spec.render:
+            yield from self._run(requests_, max_pages, page=None)
+            return
+        with sync_playwright() as p:
+            browser = self._launch_browser(p)
+            context = browser.new_context(user_agent=USER_AGENT)
+            page = context.new_page()
+            try:
+                yield from self._run(requests_, max_pages, page, browser, context)
+            finally:
+                browser.close()
+
+    def _run(self, requests_: List[RosterRequest], max_pages: int, page,
+             browser=None, context=None) -> Generator[Agent, None, None]:
+        spec = self.spec
+        # Whether each roster's latest page linked to another; read as the page items are generated
+        more: Dict[str, bool] = {}
+        # (roster URL, page number) of each roster's last page, for progress
+        last_pages: Set[Tuple[str, int]] = set()
+        loaded = 0
+
+        def pages():
+            for request in requests_:
+                last = max_pages if spec.pagination == NUMBERED else 1
+                for number in range(1, last + 1):
+                    yield request, number
+                    if not more.get(request.url):
+                        break
+
+        def fetch_page(item: Tuple[RosterRequest, int]):
+            nonlocal context, page, loaded
+            request, number = item
+            url = spec.page(request.url, number)
+            more[request.url] = False
+            if loaded:
+                self._sleep()
+            loaded += 1
+            if page is not None:
+                context, page = self._recycle_context(browser, context, page)
+            logger.info(f"Scraping {self.name} URL: {url}")
+            try:
+                html = self._load(page, url, max_pages)
+            except Exception as e:
+                logger.error(f"Failed to load {url}: {e}")
+                self._roster_failed(request)
+                last_pages.add((request.url, number))
+                return None
+            if spec.not_found and spec.not_found in html:
+                logger.warning(f"URL {url} returned 404/Not Found. Skipping.")
+                last_pages.add((request.url, number))
+                return None
+            if spec.pagination == NUMBERED:
+                # Decided here, before the parse, so the next page can start loading straight away
+                more[request.url] = (page.query_selector(spec.next_link) is not None if page is not None
+                                     else has_next(spec, make_tree(html)))
+            if not more[request.url] or number == max_pages:
+                last_pages.add((request.url, number))
+            return parse_spec_page, html, url, request.target, spec
+
+        def fetch_profile(agent: Agent):
+            if not self.allow_profile_visit():
+                return None
+            self._sleep()
+            logger.info(f"Visiting profile: {agent.source_url}")
+            try:
+                return parse_profile_contact, self._load(page, agent.source_url, 0)
+            except Exception as e:
+                logger.warning(f"Error scraping profile {agent.source_url}: {e}")
+                return None
+
+        for (request, number), parsed in self._pipeline(pages(), fetch_page):
+            agents = parsed[0] if parsed else []
+            logger.info(f"Found {len(agents)} {self.name} agents on page {number} of {request.url}")
+            # Progress counts rosters; a roster is done once its last page is in
+            if (request.url, number) in last_pages:
+                self._advance()
+
+            if not spec.visit_profiles or self.defer_profiles:
+                # Emails (if any) are filled in by the enrichment stage, after dedup
+                yield from agents
+                continue
+            with_profiles = []
+            for agent in agents:
+                if agent.source_url:
+                    with_profiles.append(agent)
+                else:
+                    yield agent
+            for agent, contact in self._pipeline(with_profiles, fetch_profile):
+                if contact is not None:
+                    email, phone = contact
+                    agent.email = email or agent.email
+                    agent.phone = agent.phone or phone
+                yield agent
+
+    def _load(self, page, url: str, scrolls: int) -> str:
+        """HTML of `url`: rendered in `page` (scrolled up to `scrolls` times), or fetched over HTTP."""
+        if page is None:
+            session = self._get_session()
+            # 4xx/5xx come back from the Navigator as NavigationError
+            return self._nav().fetch(url, lambda: session.get(url, timeout=30)).text
+
+        self._goto(page, url, timeout=60000)
+        page.wait_for_timeout(self.spec.settle_ms)
+        if self.spec.pagination == SCROLL and scrolls:
+            count = len(page.query_selector_all(self.spec.card))
+            for _ in range(scrolls - 1):
+                if self.should_stop():
+                    break
+                page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                page.wait_for_timeout(self.spec.settle_ms)
+                new_count = len(page.query_selector_all(self.spec.card))
+                if new_count == count:
+                    break
+                count = new_count
+        return page.content()
+
+    def _get_session(self) -> requests.Session:
+        if self.session is None:
+            self.session = requests.Session()
+            self.session.headers.update({"User-Agent": USER_AGENT})
+        return self.session
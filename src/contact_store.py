@@ -0,0 +1,239 @@
+"""Persistent, indexed store of every agent collected across runs.
+
+`contacts.csv` holds only the latest run; this SQLite table accumulates them
+all, keyed by `agent_id`, with normalized copies of the fields people filter
+on (town, zip, brokerage, source, email domain, name) each behind an index.
+Queries return one page at a time plus a total, so the UI and `main.py query`
+stay interactive with tens of thousands of agents.
+
+Prefix searches are index range scans (`name_norm >= 'sul' AND name_norm < 'sum'`)
+rather than LIKE, which SQLite can't run off an index with its default collation.
+"""
+import csv
+import math
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.config import CONTACTS_DB_PATH, QUERY_PAGE_SIZE
+from src.identity import utc_now
+from src.models import Agent
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    agent_id TEXT PRIMARY KEY,
+    first_name TEXT,
+    last_name TEXT,
+    full_name TEXT,
+    email TEXT,
+    phone TEXT,
+    brokerage TEXT,
+    city TEXT,
+    state TEXT,
+    zip_code TEXT,
+    areas_served TEXT,
+    source TEXT,
+    source_url TEXT,
+    scraped_at TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    name_norm TEXT NOT NULL,
+    last_norm TEXT NOT NULL,
+    city_norm TEXT NOT NULL,
+    state_norm TEXT NOT NULL,
+    brokerage_norm TEXT NOT NULL,
+    source_norm TEXT NOT NULL,
+    email_domain TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS contacts_name ON contacts (name_norm);
+CREATE INDEX IF NOT EXISTS contacts_last ON contacts (last_norm);
+CREATE INDEX IF NOT EXISTS contacts_town ON contacts (city_norm, state_norm);
+CREATE INDEX IF NOT EXISTS contacts_zip ON contacts (zip_code);
+CREATE INDEX IF NOT EXISTS contacts_brokerage ON contacts (brokerage_norm);
+CREATE INDEX IF NOT EXISTS contacts_source ON contacts (source_norm);
+CREATE INDEX IF NOT EXISTS contacts_email_domain ON contacts (email_domain);
+"""
+
+# Returned by queries, in display order
+COLUMNS = [
+    "full_name", "email", "phone", "brokerage", "city", "state", "zip_code",
+    "source", "source_url", "first_seen", "last_seen", "agent_id",
+]
+
+
+def normalize(value: Optional[str]) -> str:
+    """Lowercase, accents stripped, punctuation to single spaces: 'O'Brien-Núñez' -> 'o brien nunez'."""
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(c for c in value if not unicodedata.combining(c)).lower()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", value).split())
+
+
+def email_domain(email: Optional[str]) -> str:
+    return email.rsplit("@", 1)[1].strip().lower() if email and "@" in email else ""
+
+
+def _prefix_range(prefix: str) -> Tuple[str, str]:
+    """Bounds of every string starting with `prefix`, for an index range scan."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+@dataclass(frozen=True)
+class ContactQuery:
+    """Filters for `ContactStore.query`; empty ones are ignored. Text matching is normalized."""
+    name: str = ""  # prefix of the full or last name
+    town: str = ""
+    state: str = ""
+    zip_code: str = ""  # prefix, so "190" covers 19010-19099
+    brokerage: str = ""  # prefix, so "coldwell" covers every Coldwell Banker office
+    source: str = ""
+    email_domain: str = ""
+    has_email: bool = False
+    page: int = 1
+    page_size: int = QUERY_PAGE_SIZE
+
+    def where(self) -> Tuple[str, List]:
+        clauses, params = [], []
+
+        def prefix(column: str, value: str):
+            low, high = _prefix_range(value)
+            clauses.append(f"{column} >= ? AND {column} < ?")
+            params.extend([low, high])
+
+        name = normalize(self.name)
+        if name:
+            low, high = _prefix_range(name)
+            clauses.append("((name_norm >= ? AND name_norm < ?) OR (last_norm >= ? AND last_norm < ?))")
+            params.extend([low, high, low, high])
+        if normalize(self.town):
+            clauses.append("city_norm = ?")
+            params.append(normalize(self.town))
+        if normalize(self.state):
+            clauses.append("state_norm = ?")
+            params.append(normalize(self.state))
+        if self.zip_code.strip():
+            prefix("zip_code", self.zip_code.strip())
+        if normalize(self.brokerage):
+            prefix("brokerage_norm", normalize(self.brokerage))
+        if normalize(self.source):
+            clauses.append("source_norm = ?")
+            params.append(normalize(self.source))
+        if self.email_domain.strip():
+            clauses.append("email_domain = ?")
+            params.append(self.email_domain.strip().lstrip("@").lower())
+        elif self.has_email:
+            clauses.append("email_domain != ''")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+@dataclass
+class ContactPage:
+    rows: List[Dict] = field(default_factory=list)
+    total: int = 0
+    page: int = 1
+    page_size: int = QUERY_PAGE_SIZE
+
+    @property
+    def pages(self) -> int:
+        return max(math.ceil(self.total / self.page_size), 1)
+
+    @property
+    def first(self) -> int:
+        """1-based position of the first row, 0 when the page is empty."""
+        return (self.page - 1) * self.page_size + 1 if self.rows else 0
+
+    @property
+    def last(self) -> int:
+        return self.first + len(self.rows) - 1 if self.rows else 0
+
+
+class ContactStore:
+    def __init__(self, path: str = CONTACTS_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # One store serves every Streamlit session; WAL lets it read while a scrape writes
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+    def upsert(self, agents: Iterable[Agent]) -> int:
+        """Add or refresh agents; a later run without an email or phone doesn't erase a known one."""
+        now = utc_now()
+        rows = (
+            (agent.agent_id, agent.first_name, agent.last_name, agent.full_name, agent.email or None,
+             agent.phone or None, agent.brokerage, agent.city, agent.state, agent.zip_code, agent.areas_served,
+             agent.source, agent.source_url, agent.scraped_at, now, now,
+             normalize(agent.full_name), normalize(agent.last_name), normalize(agent.city),
+             normalize(agent.state), normalize(agent.brokerage), normalize(agent.source), email_domain(agent.email))
+            for agent in agents
+        )
+        with self._lock, self.conn:
+            cursor = self.conn.executemany(
+                """INSERT INTO contacts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (agent_id) DO UPDATE SET
+                       first_name = excluded.first_name, last_name = excluded.last_name,
+                       full_name = excluded.full_name,
+                       email = COALESCE(excluded.email, contacts.email),
+                       email_domain = CASE WHEN excluded.email IS NULL THEN contacts.email_domain
+                                           ELSE excluded.email_domain END,
+                       phone = COALESCE(excluded.phone, contacts.phone),
+                       brokerage = excluded.brokerage, city = excluded.city, state = excluded.state,
+                       zip_code = excluded.zip_code, areas_served = excluded.areas_served,
+                       source = excluded.source, source_url = excluded.source_url,
+                       scraped_at = excluded.scraped_at, last_seen = excluded.last_seen,
+                       name_norm = excluded.name_norm, last_norm = excluded.last_norm,
+                       city_norm = excluded.city_norm, state_norm = excluded.state_norm,
+                       brokerage_norm = excluded.brokerage_norm, source_norm = excluded.source_norm""",
+                rows,
+            )
+        return cursor.rowcount
+
+    def import_csv(self, path: str) -> int:
+        """Load a contacts CSV written by an earlier run, e.g. to backfill the store."""
+        with open(path, newline="", encoding="utf-8") as f:
+            return self.upsert(
+                Agent(first_name=row.get("first_name") or "", last_name=row.get("last_name") or "",
+                      full_name=row.get("full_name") or "", email=row.get("email") or None,
+                      phone=row.get("phone") or None, brokerage=row.get("brokerage") or None,
+                      city=row.get("city") or None, state=row.get("state") or None,
+                      zip_code=row.get("zip") or None, areas_served=row.get("areas_served") or None,
+                      source=row.get("source") or "", source_url=row.get("source_url") or "",
+                      scraped_at=row.get("scraped_at") or "")
+                for row in csv.DictReader(f)
+            )
+
+    def query(self, query: ContactQuery) -> ContactPage:
+        """One page of matching contacts, ordered by name, and the total number of matches."""
+        where, params = query.where()
+        page_size = max(query.page_size, 1)
+        page = max(query.page, 1)
+        with self._lock:
+            total = self.conn.execute(f"SELECT COUNT(*) FROM contacts{where}", params).fetchone()[0]
+            cursor = self.conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM contacts{where} ORDER BY name_norm, agent_id LIMIT ? OFFSET ?",
+                params + [page_size, (page - 1) * page_size],
+            )
+            rows = [dict(zip(COLUMNS, row)) for row in cursor]
+        return ContactPage(rows, total, page, page_size)
+
+    def sources(self) -> List[str]:
+        """Distinct sources in the store, for filter choices."""
+        with self._lock:
+            return [row[0] for row in self.conn.execute(
+                "SELECT MIN(source) FROM contacts GROUP BY source_norm ORDER BY source_norm")]
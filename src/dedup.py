@@ -0,0 +1,236 @@
+import json
+import os
+import sqlite3
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from loguru import logger
+from src.config import DEDUP_SPILL_THRESHOLD
+from src.models import Agent
+
+
+class DedupIndex:
+    """Incremental duplicate check: an agent is a duplicate if its email, phone or name+brokerage was seen."""
+
+    def __init__(self):
+        # key -> the first (surviving) agent that had it
+        self.emails: Dict[str, Agent] = {}
+        self.phones: Dict[str, Agent] = {}
+        self.names: Dict[str, Agent] = {}  # full_name + brokerage
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def name_key(agent: Agent) -> str:
+        return f"{agent.full_name}|{agent.brokerage}"
+
+    def match(self, agent: Agent) -> Optional[Agent]:
+        """The surviving agent this one duplicates, or None."""
+        return (
+            (agent.email and self.emails.get(agent.email))
+            or (agent.phone and self.phones.get(agent.phone))
+            or self.names.get(self.name_key(agent))
+        )
+
+    def is_duplicate(self, agent: Agent) -> bool:
+        return self.match(agent) is not None
+
+    def _index(self, agent: Agent, survivor: Agent):
+        if agent.email:
+            self.emails.setdefault(agent.email, survivor)
+        if agent.phone:
+            self.phones.setdefault(agent.phone, survivor)
+        self.names.setdefault(self.name_key(agent), survivor)
+
+    def add(self, agent: Agent) -> bool:
+        """Index the agent; True if it was new."""
+        if self.is_duplicate(agent):
+            return False
+        self._index(agent, agent)
+        return True
+
+    def merge(self, agent: Agent) -> bool:
+        """Like add(), but a duplicate's contact details fill gaps in the agent it duplicates.
+
+        A Compass record with an email then covers the Coldwell Banker record of
+        the same person, so enrichment doesn't need to visit their profile.
+        """
+        survivor = self.match(agent)
+        if survivor is None:
+            self._index(agent, agent)
+            return True
+        if agent.email and not survivor.email:
+            survivor.email = agent.email
+        if agent.phone and not survivor.phone:
+            survivor.phone = agent.phone
+        self._index(agent, survivor)
+        return False
+
+    def filter(self, agents: Iterable[Agent]) -> List[Agent]:
+        return [agent for agent in agents if self.merge(agent)]
+
+
+class SpillingDedupIndex(DedupIndex):
+    """A DedupIndex that also keeps the surviving agents, moving keys and agents to SQLite on demand.
+
+    Used by memory-bounded runs: survivors are merged incrementally instead of
+    collecting every raw agent first, and once more than `max_in_memory`
+    survivors are held (or the RSS monitor asks for it) everything is spilled
+    to a temporary database and looked up from there.
+    """
+
+    def __init__(self, max_in_memory: int = DEDUP_SPILL_THRESHOLD, spill_dir: Optional[str] = None):
+        super().__init__()
+        self.max_in_memory = max_in_memory
+        self.spill_dir = spill_dir
+        self.survivors: List[Agent] = []
+        self.conn: Optional[sqlite3.Connection] = None
+        self._path: Optional[str] = None
+        self._count = 0
+        self._pending_writes = 0
+
+    @property
+    def spilled(self) -> bool:
+        return self.conn is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def spill(self):
+        """Move every key and survivor to disk; later lookups go to SQLite."""
+        if self.spilled:
+            return
+        fd, self._path = tempfile.mkstemp(prefix="dedup-", suffix=".sqlite", dir=self.spill_dir)
+        os.close(fd)
+        self.conn = sqlite3.connect(self._path, check_same_thread=False)
+        # Scratch data for this run only: durability doesn't matter, speed does
+        self.conn.executescript("""
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE agents (id INTEGER PRIMARY KEY, record TEXT NOT NULL);
+            CREATE TABLE keys (key TEXT PRIMARY KEY, agent INTEGER NOT NULL) WITHOUT ROWID;
+        """)
+        rowids = {id(agent): n for n, agent in enumerate(self.survivors, 1)}
+        self.conn.executemany("INSERT INTO agents VALUES (?, ?)",
+                              ((n, _dump(agent)) for n, agent in enumerate(self.survivors, 1)))
+        for prefix, index in (("e", self.emails), ("p", self.phones), ("n", self.names)):
+            self.conn.executemany("INSERT OR IGNORE INTO keys VALUES (?, ?)",
+                                  ((f"{prefix}:{key}", rowids[id(agent)]) for key, agent in index.items()))
+        self.conn.commit()
+        logger.info(f"Dedup index spilled {len(self.survivors)} agents to {self._path}")
+        self.survivors = []
+        self.emails, self.phones, self.names = {}, {}, {}
+
+    def _keys(self, agent: Agent) -> List[str]:
+        keys = []
+        if agent.email:
+            keys.append(f"e:{agent.email}")
+        if agent.phone:
+            keys.append(f"p:{agent.phone}")
+        keys.append(f"n:{self.name_key(agent)}")
+        return keys
+
+    def _match_id(self, agent: Agent) -> Optional[int]:
+        keys = self._keys(agent)
+        found = dict(self.conn.execute(
+            f"SELECT key, agent FROM keys WHERE key IN ({','.join('?' * len(keys))})", keys
+        ).fetchall())
+        # Same precedence as DedupIndex.match: email, then phone, then name+brokerage
+        return next((found[key] for key in keys if key in found), None)
+
+    def _index_keys(self, agent: Agent, rowid: int):
+        keys = self._keys(agent)
+        self.conn.execute(f"INSERT OR IGNORE INTO keys VALUES {','.join(['(?, ?)'] * len(keys))}",
+                          [value for key in keys for value in (key, rowid)])
+
+    def _write(self):
+        self._pending_writes += 1
+        if self._pending_writes >= 10000:
+            self.conn.commit()
+            self._pending_writes = 0
+
+    def match(self, agent: Agent) -> Optional[Agent]:
+        if not self.spilled:
+            return super().match(agent)
+        rowid = self._match_id(agent)
+        return None if rowid is None else self._load(rowid)
+
+    def merge(self, agent: Agent) -> bool:
+        if not self.spilled:
+            if not super().merge(agent):
+                return False
+            self.survivors.append(agent)
+            self._count += 1
+            if self._count > self.max_in_memory:
+                self.spill()
+            return True
+
+        rowid = self._match_id(agent)
+        if rowid is None:
+            rowid = self.conn.execute("INSERT INTO agents (record) VALUES (?)", (_dump(agent),)).lastrowid
+            self._index_keys(agent, rowid)
+            self._count += 1
+            self._write()
+            return True
+
+        survivor = self._load(rowid)
+        if (agent.email and not survivor.email) or (agent.phone and not survivor.phone):
+            survivor.email = survivor.email or agent.email
+            survivor.phone = survivor.phone or agent.phone
+            self.conn.execute("UPDATE agents SET record = ? WHERE id = ?", (_dump(survivor), rowid))
+        self._index_keys(agent, rowid)
+        self._write()
+        return False
+
+    def add(self, agent: Agent) -> bool:
+        # Survivors must be stored, so plain add() behaves like merge()
+        return self.merge(agent)
+
+    def _load(self, rowid: int) -> Agent:
+        return _load(self.conn.execute("SELECT record FROM agents WHERE id = ?", (rowid,)).fetchone()[0])
+
+    def batches(self, size: int = 1000) -> Iterator[List[Tuple[int, Agent]]]:
+        """Survivors in first-seen order as (id, agent) batches, without loading them all at once."""
+        if not self.spilled:
+            for start in range(0, len(self.survivors), size):
+                yield list(enumerate(self.survivors[start:start + size], start + 1))
+            return
+        self.conn.commit()
+        last = 0
+        while True:
+            rows = self.conn.execute("SELECT id, record FROM agents WHERE id > ? ORDER BY id LIMIT ?", (last, size)).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [(rowid, _load(record)) for rowid, record in rows]
+
+    def replace(self, batch: List[Tuple[int, Agent]]):
+        """Persist changes made to agents from `batches()` (a no-op while they live in memory)."""
+        if self.spilled:
+            self.conn.executemany("UPDATE agents SET record = ? WHERE id = ?", ((_dump(a), rowid) for rowid, a in batch))
+            self.conn.commit()
+
+    def __iter__(self) -> Iterator[Agent]:
+        for batch in self.batches():
+            for _, agent in batch:
+                yield agent
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        if self._path:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+            self._path = None
+
+
+def _dump(agent: Agent) -> str:
+    # Agent's fields are all flat strings, so vars() is equivalent to (and much faster than) asdict()
+    return json.dumps(vars(agent), separators=(",", ":"))
+
+
+def _load(record: str) -> Agent:
+    return Agent(**json.loads(record))
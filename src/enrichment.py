@@ -0,0 +1,286 @@
+"""Email enrichment: fill in emails from agent profile pages after cross-source dedup.
+
+Connectors that would otherwise visit a profile per agent (Coldwell Banker,
+Long & Foster) hand back roster data only. Once duplicates are merged, the
+enricher visits profiles just for surviving agents that still lack an email,
+with its own worker threads and an on-disk cache of profile contacts.
+"""
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+from src.archive import PageArchive
+from src.budget import BudgetTracker
+from src.browser import launch_browser
+from src.config import (
+    DEFAULT_CONCURRENCY,
+    ENRICHMENT_CACHE_PATH,
+    ENRICHMENT_CACHE_TTL,
+    USER_AGENT,
+)
+from src.models import Agent
+from src.navigation import Navigator
+from src.parsers import parse_profile_contact
+from src.progress import CANCELLED, DONE, ScrapeProgress
+
+ENRICHMENT = "Email enrichment"
+
+Contact = Tuple[Optional[str], Optional[str]]
+
+# Worker reply for a URL it didn't visit (cancelled, or the profile-visit budget ran out)
+_SKIPPED = object()
+
+
+class ContactCache:
+    """Profile URL -> (email, phone), persisted as JSON between runs.
+
+    Profiles without an email are cached too, so they aren't revisited every run.
+    """
+
+    def __init__(self, path: Optional[str] = ENRICHMENT_CACHE_PATH, ttl: float = ENRICHMENT_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        # Service jobs finish on different threads and may save at the same time
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable contact cache {path}: {e}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, url: str) -> Optional[Contact]:
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry is None or time.time() - entry["fetched_at"] > self.ttl:
+            return None
+        return entry["email"], entry["phone"]
+
+    def put(self, url: str, contact: Contact):
+        with self._lock:
+            self._entries[url] = {"email": contact[0], "phone": contact[1], "fetched_at": time.time()}
+            self._dirty = True
+
+    def save(self):
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                now = time.time()
+                entries = {url: e for url, e in self._entries.items() if now - e["fetched_at"] <= self.ttl}
+                self._dirty = False
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Per-process temp name, so a CLI run and the service never share one
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmp, self.path)
+
+
+class EmailEnricher:
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, rate_limit: float = 1.0,
+                 cache: Optional[ContactCache] = None, browser_endpoint: Optional[str] = None,
+                 cancel_event: Optional[threading.Event] = None, budget: Optional[BudgetTracker] = None,
+                 progress: Optional[ScrapeProgress] = None, navigator: Optional[Navigator] = None,
+                 archive: Optional[PageArchive] = None):
+        self.concurrency = max(concurrency, 1)
+        self.rate_limit = rate_limit
+        self.cache = cache if cache is not None else ContactCache()
+        self.browser_endpoint = browser_endpoint
+        self.cancel_event = cancel_event or threading.Event()
+        self.budget = budget
+        self.progress = progress
+        self.navigator = navigator or Navigator(cancel_event=self.cancel_event)
+        self.archive = archive
+        self.stats = {"needed": 0, "cached": 0, "visited": 0, "failed": 0, "skipped": 0, "shared": 0}
+        # Browser workers, started on the first visit and kept for the whole pass
+        self._work: "queue.Queue[Optional[Tuple[str, queue.Queue]]]" = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._planned = 0
+
+    @staticmethod
+    def needs_email(agent: Agent) -> bool:
+        return not agent.email and bool(agent.source_url)
+
+    @staticmethod
+    def profile_groups(agents: List[Agent]) -> Tuple[Dict[str, List[Agent]], List[str]]:
+        """Agents by profile URL, and the URLs shared by differently named agents.
+
+        A shared URL is a roster or office page, not one agent's profile; its first
+        mailto: belongs to nobody in particular, so those agents are left alone.
+        """
+        groups: Dict[str, List[Agent]] = {}
+        for agent in agents:
+            groups.setdefault(agent.source_url, []).append(agent)
+        shared = [url for url, group in groups.items()
+                  if len({" ".join(a.full_name.lower().split()) for a in group}) > 1]
+        for url in shared:
+            del groups[url]
+        return groups, shared
+
+    def enrich(self, agents: List[Agent]) -> Dict[str, int]:
+        """Fill missing emails in place; returns counts of what was done."""
+        return self.enrich_batches([agents])
+
+    def enrich_batches(self, batches: Iterable[Any], agents: Callable[[Any], List[Agent]] = list,
+                       done: Optional[Callable[[Any], None]] = None) -> Dict[str, int]:
+        """Enrich batch by batch (memory-bounded runs) with one set of browser workers and one cache save.
+
+        `agents(batch)` gives a batch's agents; `done(batch)` runs once its emails are filled in.
+        Counts in the returned stats cover the whole pass.
+        """
+        try:
+            for batch in batches:
+                self._enrich_batch(agents(batch))
+                if done is not None:
+                    done(batch)
+                if self.cancel_event.is_set():
+                    break
+        finally:
+            self._stop_workers()
+            if self._planned and self.progress:
+                self.progress.finish_connector(ENRICHMENT, CANCELLED if self.cancel_event.is_set() else DONE)
+            self.cache.save()
+        logger.info(
+            f"Enrichment: {self.stats['needed']} agents without email, {self.stats['cached']} from cache, "
+            f"{self.stats['visited']} profiles visited, {self.stats['failed']} failed, {self.stats['skipped']} skipped"
+        )
+        return self.stats
+
+    def _enrich_batch(self, agents: List[Agent]):
+        pending = [a for a in agents if self.needs_email(a)]
+        self.stats["needed"] += len(pending)
+
+        groups, shared = self.profile_groups(pending)
+        if shared:
+            self.stats["shared"] += len(shared)
+            logger.warning(f"Not enriching {len(shared)} URLs shared by several agents (not profile pages), "
+                           f"e.g. {shared[0]}")
+        to_visit: Dict[str, List[Agent]] = {}
+        for url, group in groups.items():
+            cached = self.cache.get(url)
+            if cached is not None:
+                for agent in group:
+                    self._apply(agent, cached)
+                self.stats["cached"] += len(group)
+            else:
+                to_visit[url] = group
+
+        if not to_visit:
+            return
+        logger.info(f"Enriching {len(to_visit)} profiles ({self.stats['cached']} from cache so far, {self.concurrency} workers)")
+        if self.progress:
+            if not self._planned:
+                self.progress.register(ENRICHMENT)
+                self.progress.start_connector(ENRICHMENT)
+            self.progress.set_pages_total(ENRICHMENT, self._planned + len(to_visit))
+        self._planned += len(to_visit)
+        failed = self.stats["failed"]
+        contacts = self._fetch_all(list(to_visit))
+        for url, contact in contacts.items():
+            self.cache.put(url, contact)
+            for agent in to_visit[url]:
+                self._apply(agent, contact)
+        self.stats["visited"] += len(contacts)
+        self.stats["skipped"] += len(to_visit) - len(contacts) - (self.stats["failed"] - failed)
+
+    @staticmethod
+    def _apply(agent: Agent, contact: Contact):
+        email, phone = contact
+        agent.email = email or agent.email
+        agent.phone = agent.phone or phone
+
+    def _fetch_all(self, urls: List[str]) -> Dict[str, Contact]:
+        """Visit profiles on the worker threads; each worker owns one Playwright page for the whole pass."""
+        self._start_workers(min(self.concurrency, len(urls)))
+        replies: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        for url in urls:
+            self._work.put((url, replies))
+        results: Dict[str, Contact] = {}
+        remaining = len(urls)
+        while remaining:
+            try:
+                url, contact = replies.get(timeout=0.5)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in self._workers):
+                    # Every browser failed to start; what's left counts as skipped
+                    break
+                continue
+            remaining -= 1
+            if contact is None:
+                self.stats["failed"] += 1
+            elif contact is not _SKIPPED:
+                results[url] = contact
+        if remaining:
+            while not self._work.empty():
+                self._work.get_nowait()
+        return results
+
+    def _start_workers(self, count: int):
+        self._workers = [worker for worker in self._workers if worker.is_alive()]
+        while len(self._workers) < count:
+            # Runs in a copy of the caller's context, so logger.contextualize values (the UI's run id) carry over
+            worker = threading.Thread(target=contextvars.copy_context().run, args=(self._worker,),
+                                      name=f"enrichment-{len(self._workers)}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _stop_workers(self):
+        for _ in self._workers:
+            self._work.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+        self._work = queue.Queue()
+
+    def _worker(self):
+        try:
+            self._visit_profiles()
+        except Exception as e:
+            logger.error(f"Enrichment worker failed: {e}")
+
+    def _visit_profiles(self):
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as p:
+            browser = launch_browser(p, self.browser_endpoint)
+            page = browser.new_context(user_agent=USER_AGENT).new_page()
+            try:
+                while True:
+                    item = self._work.get()
+                    if item is None:
+                        return
+                    url, replies = item
+                    if self.cancel_event.is_set() or (self.budget is not None and not self.budget.allow_profile_visit()):
+                        replies.put((url, _SKIPPED))
+                        continue
+                    replies.put((url, self._visit(page, url)))
+                    if self.progress:
+                        self.progress.advance(ENRICHMENT)
+                    self.cancel_event.wait(self.rate_limit + random.uniform(0, 0.5))
+            finally:
+                browser.close()
+
+    def _visit(self, page, url: str) -> Optional[Contact]:
+        logger.info(f"Visiting profile: {url}")
+        try:
+            self.navigator.goto(page, url, timeout=30000)
+            html = page.content()
+            if self.archive is not None:
+                self.archive.add(ENRICHMENT, parse_profile_contact, html, url=url)
+            return parse_profile_contact(html)
+        except Exception as e:
+            logger.warning(f"Error enriching {url}: {e}")
+            return None
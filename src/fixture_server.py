@@ -0,0 +1,375 @@
+"""Local fixture server: synthetic Compass, Coldwell Banker, Long & Foster and BHHS sites.
+
+Serves every page shape the connectors load, using the same selectors the
+parsers rely on, so `ScraperManager` can be load-tested offline at any scale:
+
+    server = FixtureServer(FixtureConfig(agents_per_town=500, error_rate=0.02))
+    base = server.start()
+    CompassConnector(site=base), CBConnector(base_url=base),
+    LongAndFosterConnector(site=base), BHHSConnector(site=base)
+
+or standalone: `python -m src.fixture_server --agents 500 --latency 0.05 0.2`.
+
+Agents are generated deterministically from (source, town, index). The first
+`overlap` share of each town's roster is a region-wide pool listed by every
+source and every town, so dedup has real cross-source and cross-town
+duplicates to remove.
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+SOURCES = ("compass", "cb", "lf", "bhhs")
+
+FIRST_NAMES = ["Avery", "Blake", "Casey", "Dana", "Elliot", "Frances", "Grace", "Harper", "Isaac", "Jordan",
+               "Kendall", "Logan", "Morgan", "Noel", "Owen", "Parker", "Quinn", "Riley", "Sawyer", "Taylor"]
+LAST_NAMES = ["Abbott", "Brennan", "Castillo", "Donovan", "Ellis", "Fischer", "Garrison", "Hayes", "Irwin", "Jensen",
+              "Keller", "Lindqvist", "Moreno", "Nakamura", "Okafor", "Patel", "Quinlan", "Ramirez", "Sullivan", "Thornton"]
+DOMAINS = {"compass": "compass.example", "cb": "cbmove.example", "lf": "lnf.example", "bhhs": "foxroach.example"}
+
+
+@dataclass
+class FixtureConfig:
+    agents_per_town: int = 100
+    cb_page_size: int = 24  # agents per Coldwell Banker list page; the pager covers the rest
+    compass_batch: int = 20  # cards per Compass infinite-scroll batch
+    latency: Tuple[float, float] = (0.0, 0.0)  # seconds added to every response, uniform in [min, max]
+    error_rate: float = 0.0  # share of page requests answered with `error_status`
+    error_status: int = 503
+    overlap: float = 0.2  # share of each roster drawn from the shared, region-wide pool
+    seed: int = 0
+
+
+@dataclass(frozen=True)
+class FixtureAgent:
+    key: str
+    first: str
+    last: str
+    phone: str
+    email: str
+
+    @property
+    def name(self) -> str:
+        return f"{self.first} {self.last}"
+
+    @property
+    def slug(self) -> str:
+        return f"{self.first}-{self.last}-{self.key}".lower()
+
+
+def _hash(*parts) -> int:
+    return int(hashlib.md5("|".join(map(str, parts)).encode()).hexdigest()[:15], 16)
+
+
+def _town_key(text: str) -> str:
+    """'Wayne-PA', 'wayne-pa', ('wayne', 'pa') all map to 'wayne-pa'."""
+    return text.strip("/").lower().replace(" ", "-").replace("%20", "-")
+
+
+class AgentFactory:
+    def __init__(self, config: FixtureConfig):
+        self.config = config
+        # Every list page and profile needs its town's roster; keep the recent ones
+        self.roster = lru_cache(maxsize=1024)(self._roster)
+
+    def _agent(self, source: str, scope: str, index: int) -> FixtureAgent:
+        # 60 bits of hash per agent keeps names, phones and emails of distinct agents
+        # from colliding (and being deduped together) even at millions of agents
+        h = _hash(self.config.seed, source, scope, index)
+        first = FIRST_NAMES[h % len(FIRST_NAMES)]
+        suffix = "".join(chr(97 + (h >> (5 * i)) % 26) for i in range(6)).title()
+        last = f"{LAST_NAMES[(h >> 30) % len(LAST_NAMES)]}-{suffix}"
+        key = f"{h:015x}"
+        digits = f"{2 + h % 8}{(h >> 3) % 10 ** 9:09d}"
+        phone = f"{digits[:3]}-{digits[3:6]}-{digits[6:]}"
+        domain = DOMAINS.get(source, "agents.example")
+        return FixtureAgent(key, first, last, phone, f"{first}.{last}.{key[:6]}@{domain}".lower())
+
+    def _roster(self, source: str, town: str) -> List[FixtureAgent]:
+        total = self.config.agents_per_town
+        shared = int(total * self.config.overlap)
+        agents = [self._agent("shared", "region", i) for i in range(shared)]
+        agents += [self._agent(source, town, i) for i in range(shared, total)]
+        return agents
+
+    def by_key(self, source: str, town: str, key: str) -> Optional[FixtureAgent]:
+        return next((a for a in self.roster(source, town) if a.key == key), None)
+
+
+# -- Markup (mirrors the selectors in src/parsers) --------------------------------
+
+def _page(title: str, body: str, head: str = "") -> str:
+    return f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{escape(title)}</title>{head}</head><body>{body}</body></html>"
+
+
+def compass_card(agent: FixtureAgent) -> str:
+    return (
+        f'<div class="agentCard"><a href="/agents/{agent.slug}/" class="agentCard-imageWrapper">'
+        f'<div class="textIntent-headline1 agentCard-name">{escape(agent.name)}</div></a>'
+        f'<div class="agentCard-contact"><a href="mailto:{agent.email}" class="agentCard-email">{agent.email}</a>'
+        f'<a href="tel:{agent.phone}" class="agentCard-phone">M: {agent.phone}</a></div></div>'
+    )
+
+
+COMPASS_SCROLL_JS = """
+<style>.agentCard { height: 180px; }</style>
+<script>
+let next = %(batch)d, loading = false;
+const total = %(total)d, batch = %(batch)d;
+window.addEventListener('scroll', async () => {
+  if (loading || next >= total) return;
+  if (window.innerHeight + window.scrollY < document.body.scrollHeight - 50) return;
+  loading = true;
+  const response = await fetch('?batch_start=' + next);
+  document.getElementById('cards').insertAdjacentHTML('beforeend', await response.text());
+  next += batch;
+  loading = false;
+});
+</script>
+"""
+
+
+def cb_block(agent: FixtureAgent, state: str, town: str) -> str:
+    return (
+        f'<div class="agent-block"><div class="agent-content-name">'
+        f'<a href="/{state}/{town}/agent/{agent.slug}/aid_{agent.key}/">{escape(agent.name)}</a></div>'
+        f'<a class="phone-link" data-phone-type="office" href="tel:6105550100">610-555-0100</a>'
+        f'<a class="phone-link" data-phone-type="mobile" href="tel:{agent.phone}">{agent.phone}</a>'
+        f'<p class="office"><a href="/{state}/{town}/offices/">{escape(town.replace("-", " ").title())} Office</a></p></div>'
+    )
+
+
+def cb_pager(state: str, town: str, current: int, last: int) -> str:
+    links = []
+    for n in range(1, last + 1):
+        href = f"/{state}/{town}/agents/" if n == 1 else f"/{state}/{town}/agents/p_{n}/"
+        links.append(f'<li><a href="{href}">{n}</a></li>')
+    if current < last:
+        links.append(f'<li class="next"><a rel="next" href="/{state}/{town}/agents/p_{current + 1}/">Next</a></li>')
+    return f'<ul class="pagination">{"".join(links)}</ul>'
+
+
+def lf_card(agent: FixtureAgent, town: str) -> str:
+    return (
+        f'<article class="lf-roster-card lf-agent"><a class="lf-h5-alt" href="/agent/{town}/{agent.slug}">'
+        f'{escape(agent.name)}</a><a href="tel:{agent.phone}">{agent.phone}</a></article>'
+    )
+
+
+def bhhs_card(agent: FixtureAgent, town: str) -> str:
+    return (
+        f'<div class="rn-agent-roster-card"><div class="rn-agent-roster-header"><a href="/bio/{town}/{agent.slug}">'
+        f'<h1 class="rn-agent-roster-name">{escape(agent.name)} <span class="account-title">Sales Associate</span></h1></a></div>'
+        f'<a href="tel:6106870100">Office</a><a href="tel:{agent.phone}"><i class="rni-profile"></i>{agent.phone}</a></div>'
+    )
+
+
+def profile_page(agent: FixtureAgent) -> str:
+    return _page(agent.name, f'<h1>{escape(agent.name)}</h1><a href="mailto:{agent.email}">Email</a>'
+                             f'<a href="tel:{agent.phone}">{agent.phone}</a>')
+
+
+# -- Server -----------------------------------------------------------------------
+
+class FixtureServer:
+    def __init__(self, config: Optional[FixtureConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FixtureConfig()
+        self.agents = AgentFactory(self.config)
+        self.host = host
+        self.port = port
+        self.stats: Counter = Counter()
+        self.max_in_flight = 0
+        self.request_times: List[float] = []
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(self.config.seed)
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> str:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Request handling
+
+    def _handle(self, request: BaseHTTPRequestHandler):
+        with self._lock:
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            self.request_times.append(time.monotonic())
+            low, high = self.config.latency
+            delay = self._random.uniform(low, high) if high else 0.0
+            fail = self.config.error_rate and self._random.random() < self.config.error_rate
+        try:
+            if delay:
+                time.sleep(delay)
+            parts = urlsplit(request.path)
+            query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+            kind, status, body, content_type = self._route(parts.path, query)
+            if fail and kind not in ("compass_batch", "not_found"):
+                kind, status, body, content_type = "error", self.config.error_status, "Service unavailable", "text/plain"
+            with self._lock:
+                self.stats[kind] += 1
+            payload = body.encode("utf-8")
+            request.send_response(status)
+            request.send_header("Content-Type", content_type)
+            request.send_header("Content-Length", str(len(payload)))
+            request.end_headers()
+            request.wfile.write(payload)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _route(self, path: str, query: Dict[str, str]):
+        html = "text/html; charset=utf-8"
+        segments = [s for s in path.split("/") if s]
+
+        # Compass: /agents/locations/{town-st}/, /agents/{slug}/, /api/v3/agents/search
+        if path.startswith("/api/v3/agents/search"):
+            return "compass_api", 200, self._compass_api(query), "application/json"
+        if segments[:2] == ["agents", "locations"] and len(segments) == 3:
+            town = _town_key(segments[2])
+            if "batch_start" in query:
+                return "compass_batch", 200, self._compass_batch(town, int(query["batch_start"])), html
+            return "compass_page", 200, self._compass_page(town), html
+        if segments[:1] == ["agents"] and len(segments) == 2:
+            return "compass_profile", 200, _page("Compass agent", "<h1>Agent</h1>"), html
+
+        # Coldwell Banker: /{st}/{town}/agents/[p_N/], /{st}/{town}/agent/{slug}/aid_{key}/
+        if len(segments) >= 3 and segments[2] == "agents":
+            page = int(segments[3][2:]) if len(segments) > 3 and segments[3].startswith("p_") else 1
+            return "cb_list", 200, self._cb_list(segments[0], segments[1], page), html
+        if len(segments) == 5 and segments[2] == "agent" and segments[4].startswith("aid_"):
+            agent = self.agents.by_key("cb", f"{segments[1]}-{segments[0]}", segments[4][4:])
+            if agent:
+                return "cb_profile", 200, profile_page(agent), html
+
+        # Long & Foster: /real-estate-agents/{Town-ST}, /agent/{town-st}/{slug}
+        if segments[:1] == ["real-estate-agents"] and len(segments) == 2:
+            town = _town_key(segments[1])
+            body = "".join(lf_card(a, town) for a in self.agents.roster("lf", town))
+            return "lf_roster", 200, _page(f"Agents in {town}", body), html
+        if segments[:1] == ["agent"] and len(segments) == 3:
+            agent = self._profile_agent("lf", segments[1], segments[2])
+            if agent:
+                return "lf_profile", 200, profile_page(agent), html
+
+        # BHHS: /roster/agents?city=&state=, /bio/{town-st}/{slug}
+        if path.rstrip("/") == "/roster/agents":
+            town = _town_key(f"{query.get('city', '')}-{query.get('state', '')}")
+            body = "".join(bhhs_card(a, town) for a in self.agents.roster("bhhs", town))
+            return "bhhs_roster", 200, _page("Roster", body), html
+        if segments[:1] == ["bio"] and len(segments) == 3:
+            agent = self._profile_agent("bhhs", segments[1], segments[2])
+            if agent:
+                return "bhhs_profile", 200, profile_page(agent), html
+
+        return "not_found", 404, _page("404 Page Not Found", "<h1>Page Not Found</h1>"), html
+
+    def _profile_agent(self, source: str, town: str, slug: str) -> Optional[FixtureAgent]:
+        return self.agents.by_key(source, _town_key(town), slug.rsplit("-", 1)[-1])
+
+    def _compass_page(self, town: str) -> str:
+        roster = self.agents.roster("compass", town)
+        batch = self.config.compass_batch
+        cards = "".join(compass_card(a) for a in roster[:batch])
+        script = COMPASS_SCROLL_JS % {"batch": batch, "total": len(roster)}
+        return _page(f"Real estate agents in {town}", f'<div id="cards">{cards}</div>', head=script)
+
+    def _compass_batch(self, town: str, start: int) -> str:
+        roster = self.agents.roster("compass", town)
+        return "".join(compass_card(a) for a in roster[start:start + self.config.compass_batch])
+
+    def _compass_api(self, query: Dict[str, str]) -> str:
+        roster = self.agents.roster("compass", _town_key(query.get("location", "")))
+        start, num = int(query.get("start", 0)), int(query.get("num", 50))
+        records = [
+            {"displayName": a.name, "firstName": a.first, "lastName": a.last, "email": a.email,
+             "phones": [{"type": "mobile", "number": a.phone}], "profileUrl": f"/agents/{a.slug}/"}
+            for a in roster[start:start + num]
+        ]
+        return json.dumps({"totalCount": len(roster), "agents": records})
+
+    def _cb_list(self, state: str, town: str, page: int) -> str:
+        roster = self.agents.roster("cb", f"{town}-{state}")
+        size = self.config.cb_page_size
+        last = max(1, -(-len(roster) // size))
+        blocks = "".join(cb_block(a, state, town) for a in roster[(page - 1) * size:page * size])
+        return _page(f"{town} agents - page {page}", blocks + cb_pager(state, quote(town), page, last))
+
+    # Load-test helpers
+
+    def intervals(self) -> List[float]:
+        """Gaps between consecutive requests in seconds, for checking rate limits."""
+        with self._lock:
+            times = sorted(self.request_times)
+        return [b - a for a, b in zip(times, times[1:])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic brokerage sites for offline load tests")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--agents", type=int, default=100, help="Agents per town roster")
+    parser.add_argument("--cb_page_size", type=int, default=24)
+    parser.add_argument("--compass_batch", type=int, default=20)
+    parser.add_argument("--latency", type=float, nargs=2, default=(0.0, 0.0), metavar=("MIN", "MAX"))
+    parser.add_argument("--error_rate", type=float, default=0.0)
+    parser.add_argument("--overlap", type=float, default=0.2)
+    args = parser.parse_args()
+
+    config = FixtureConfig(agents_per_town=args.agents, cb_page_size=args.cb_page_size, compass_batch=args.compass_batch,
+                           latency=tuple(args.latency), error_rate=args.error_rate, overlap=args.overlap)
+    server = FixtureServer(config, port=args.port)
+    print(f"Fixture sites on {server.start()} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+        print(dict(server.stats))
+
+
+if __name__ == "__main__":
+    main()
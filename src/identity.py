@@ -0,0 +1,73 @@
+"""Stable agent identity and timestamps shared by every connector.
+
+`agent_id` is derived from the source plus the profile URL when there is one
+(`source_url` is only ever a profile page, never the roster it was found on),
+otherwise from the best normalized contact detail, so the same agent gets the
+same ID on every run. `content_hash` changes only when a field we export
+changes (not when the agent is merely re-scraped).
+"""
+import hashlib
+import json
+import re
+from datetime import datetime, timezone
+from src.planner import canonical_url
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def utc_now() -> str:
+    """Current time as an ISO-8601 UTC string, the one format used for `scraped_at`."""
+    return datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def _slug(value) -> str:
+    return re.sub(r"[^a-z0-9]", "", (value or "").lower())
+
+
+def source_key(source) -> str:
+    """Source name with case and spacing folded, so 'Coldwell Banker' and 'ColdwellBanker' match."""
+    return _slug(source)
+
+
+def _phone_digits(phone) -> str:
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[1:] if len(digits) == 11 and digits.startswith("1") else digits
+
+
+def _name(value) -> str:
+    return " ".join((value or "").lower().split())
+
+
+def _profile_url(url: str) -> str:
+    url = url.strip().split("#", 1)[0]
+    if "?" in url:
+        return canonical_url(url)
+    # Common case, same result as canonical_url without the urlsplit round trip
+    return url.rstrip("/").lower()
+
+
+def agent_key(agent) -> str:
+    """Readable identity: source plus profile URL, email, phone or name+brokerage, in that order."""
+    source = _slug(agent.source)
+    if agent.source_url:
+        return f"{source}|url:{_profile_url(agent.source_url)}"
+    if agent.email:
+        return f"{source}|email:{agent.email.strip().lower()}"
+    if _phone_digits(agent.phone):
+        return f"{source}|phone:{_phone_digits(agent.phone)}"
+    return f"{source}|name:{_name(agent.full_name)}|{_name(agent.brokerage)}"
+
+
+def agent_id(agent) -> str:
+    return hashlib.sha1(agent_key(agent).encode("utf-8")).hexdigest()[:16]
+
+
+def content_hash(agent) -> str:
+    """Hash of the exported fields, normalized so formatting noise doesn't count as a change."""
+    fields = [
+        _name(agent.first_name), _name(agent.last_name), _name(agent.full_name),
+        (agent.email or "").strip().lower(), _phone_digits(agent.phone),
+        _name(agent.brokerage), _name(agent.city), _name(agent.state), (agent.zip_code or "").strip(),
+        _name(agent.areas_served), agent.source_url or "",
+    ]
+    return hashlib.sha1(json.dumps(fields).encode("utf-8")).hexdigest()
@@ -0,0 +1,47 @@
+"""RSS monitoring for memory-bounded runs."""
+import os
+import sys
+from typing import Optional
+from src.config import MEMORY_SPILL_FRACTION
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        # No procfs (macOS): fall back to the peak, which is what a cap cares about anyway
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        # Windows: no rusage, so RSS reads as 0 and only the dedup spill threshold applies
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+class MemoryMonitor:
+    """Hard RSS budget: `should_spill()` asks for on-disk structures early, `exceeded()` means stop."""
+
+    def __init__(self, limit_mb: float, spill_fraction: float = MEMORY_SPILL_FRACTION):
+        self.limit_mb = limit_mb
+        self.spill_fraction = spill_fraction
+        self.peak_mb = 0.0
+
+    def sample(self) -> float:
+        current = rss_mb()
+        self.peak_mb = max(self.peak_mb, current)
+        return current
+
+    def should_spill(self, current: Optional[float] = None) -> bool:
+        return (current if current is not None else self.sample()) >= self.limit_mb * self.spill_fraction
+
+    def exceeded(self, current: Optional[float] = None) -> bool:
+        return (current if current is not None else self.sample()) >= self.limit_mb
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from typing import Optional, List
+from src.identity import agent_id
 
 @dataclass
 class Agent:
@@ -14,9 +15,14 @@ class Agent:
     zip_code: Optional[str] = None
     areas_served: Optional[str] = None
     source: str = ""
-    source_url: str = ""
+    source_url: str = ""  # the agent's profile page; empty when the roster doesn't link one
     scraped_at: str = ""
 
+    @property
+    def agent_id(self) -> str:
+        """Stable across runs; see src/identity.py."""
+        return agent_id(self)
+
     def to_dict(self):
         return {
             "first_name": self.first_name,
@@ -31,5 +37,6 @@ class Agent:
             "areas_served": self.areas_served,
             "source": self.source,
             "source_url": self.source_url,
-            "scraped_at": self.scraped_at
+            "scraped_at": self.scraped_at,
+            "agent_id": self.agent_id,
         }
@@ -0,0 +1,212 @@
+"""Page navigation with classified retries and a per-host circuit breaker.
+
+Every page load in a run goes through one `Navigator`, for both Playwright
+`page.goto` and `requests` calls. Failures are classified before deciding
+what to do:
+
+- timeouts, network errors, 5xx and 429 are retried with exponential backoff;
+- other 4xx are returned to the caller straight away (the host is up, the page isn't);
+- consecutive retryable failures against one host trip its breaker, and the
+  host's remaining URLs fail immediately instead of each burning a full timeout.
+"""
+import random
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+from loguru import logger
+from src.config import (
+    CIRCUIT_BREAKER_COOLDOWN,
+    CIRCUIT_BREAKER_THRESHOLD,
+    NAV_BACKOFF,
+    NAV_MAX_BACKOFF,
+    NAV_RETRIES,
+)
+
+TIMEOUT = "timeout"
+NETWORK = "network"
+HTTP_4XX = "http_4xx"
+HTTP_429 = "http_429"
+HTTP_5XX = "http_5xx"
+
+RETRYABLE = {TIMEOUT, NETWORK, HTTP_429, HTTP_5XX}
+
+
+class NavigationError(Exception):
+    def __init__(self, url: str, kind: str, detail: str = ""):
+        super().__init__(f"{kind} loading {url}" + (f": {detail}" if detail else ""))
+        self.url = url
+        self.kind = kind
+
+
+class CircuitOpen(NavigationError):
+    """The URL's host has failed too often; it wasn't requested."""
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def classify_exception(error: Exception) -> str:
+    # Playwright's TimeoutError and requests' ConnectTimeout/ReadTimeout all end in "Timeout"/"TimeoutError"
+    return TIMEOUT if "Timeout" in type(error).__name__ else NETWORK
+
+
+def classify_status(status: Optional[int]) -> Optional[str]:
+    """Failure kind for an HTTP status, or None if the response is usable."""
+    if status is None or status < 400:
+        return None
+    if status == 429:
+        return HTTP_429
+    return HTTP_5XX if status >= 500 else HTTP_4XX
+
+
+def status_of(response) -> Optional[int]:
+    """Status of a Playwright response (`.status`) or a requests one (`.status_code`)."""
+    if response is None:
+        return None
+    status = getattr(response, "status", None)
+    return status if isinstance(status, int) else getattr(response, "status_code", None)
+
+
+class CircuitBreaker:
+    """Opens per host after `threshold` consecutive failures; after `cooldown` seconds it is
+    half-open and lets a single probe through, which closes it on success or re-opens it.
+
+    Shared by enrichment threads and concurrent service jobs, so state changes are locked.
+    """
+
+    def __init__(self, threshold: int = CIRCUIT_BREAKER_THRESHOLD, cooldown: float = CIRCUIT_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        # Half-open hosts with a probe in flight, and when it was let through
+        self._probing: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _probe_due(self, host: str, now: float) -> bool:
+        # A probe that never reported back (its thread died) is replaced after another cooldown
+        started = self._probing.get(host)
+        return now - self._opened_at[host] >= self.cooldown and (started is None or now - started >= self.cooldown)
+
+    def allows(self, host: str) -> bool:
+        """Whether a request to `host` would be let through now, without claiming the probe."""
+        with self._lock:
+            return host not in self._opened_at or self._probe_due(host, time.monotonic())
+
+    def acquire(self, host: str) -> bool:
+        """Let a request through: always while closed, and only as the single probe while half-open."""
+        with self._lock:
+            if host not in self._opened_at:
+                return True
+            now = time.monotonic()
+            if not self._probe_due(host, now):
+                return False
+            self._probing[host] = now
+            return True
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            return host in self._opened_at
+
+    def success(self, host: str):
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+            self._probing.pop(host, None)
+
+    def failure(self, host: str) -> bool:
+        """Count a failure; True if it (re)opened the breaker."""
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+            # A failed probe re-opens straight away
+            if self._failures[host] >= self.threshold or host in self._opened_at:
+                self._opened_at[host] = time.monotonic()
+                self._probing.pop(host, None)
+                return True
+            return False
+
+
+class Navigator:
+    def __init__(self, retries: int = NAV_RETRIES, backoff: float = NAV_BACKOFF, max_backoff: float = NAV_MAX_BACKOFF,
+                 breaker: Optional[CircuitBreaker] = None, cancel_event: Optional[threading.Event] = None):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.cancel_event = cancel_event or threading.Event()
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def allows(self, url: str) -> bool:
+        """False while the URL's host is short-circuited."""
+        return self.breaker.allows(host_of(url))
+
+    def fetch(self, url: str, attempt: Callable[[], Any]) -> Any:
+        """Call `attempt()` (which loads `url`) with retries; returns its response or raises NavigationError."""
+        host = host_of(url)
+        if not self.breaker.acquire(host):
+            with self._lock:
+                self.stats["short_circuited"] += 1
+            raise CircuitOpen(url, "circuit_open", f"{host} is failing")
+
+        for attempt_number in range(self.retries + 1):
+            with self._lock:
+                self.stats["attempts"] += 1
+            try:
+                response = attempt()
+                kind, detail = classify_status(status_of(response)), f"HTTP {status_of(response)}"
+            except Exception as e:
+                kind, detail = classify_exception(e), str(e).splitlines()[0] if str(e) else type(e).__name__
+
+            with self._lock:
+                if kind is None:
+                    self.stats["ok"] += 1
+                    self.breaker.success(host)
+                    return response
+                self.stats[kind] += 1
+                if kind not in RETRYABLE:
+                    # The host answered; only this page is missing or forbidden
+                    self.breaker.success(host)
+                    raise NavigationError(url, kind, detail)
+                if self.breaker.failure(host):
+                    self._tripped(host)
+                    raise CircuitOpen(url, kind, detail)
+
+            if attempt_number == self.retries or self.cancel_event.is_set():
+                raise NavigationError(url, kind, detail)
+            delay = min(self.backoff * 2 ** attempt_number, self.max_backoff) * random.uniform(1, 1.5)
+            with self._lock:
+                self.stats["retries"] += 1
+            logger.info(f"Retrying {url} in {delay:.1f}s ({detail})")
+            self.cancel_event.wait(delay)
+
+    def record_failure(self, url: str, kind: str):
+        """Count a failed load made outside `fetch` (e.g. a prefetched tab) in the stats and the breaker."""
+        host = host_of(url)
+        with self._lock:
+            self.stats["attempts"] += 1
+            self.stats[kind] += 1
+            if kind not in RETRYABLE:
+                self.breaker.success(host)
+            elif self.breaker.failure(host):
+                self._tripped(host)
+
+    def _tripped(self, host: str):
+        self.stats["circuit_trips"] += 1
+        logger.warning(f"Circuit open for {host} after repeated failures; "
+                       f"skipping its URLs for {self.breaker.cooldown:.0f}s")
+
+    def goto(self, page, url: str, **kwargs):
+        """`page.goto(url, **kwargs)` with retries and the breaker."""
+        return self.fetch(url, lambda: page.goto(url, **kwargs))
+
+    def summary(self) -> str:
+        with self._lock:
+            if not self.stats:
+                return "no page loads"
+            order = ["attempts", "ok", "retries", TIMEOUT, NETWORK, HTTP_4XX, HTTP_429, HTTP_5XX,
+                     "circuit_trips", "short_circuited"]
+            return ", ".join(f"{key}={self.stats[key]}" for key in order if self.stats[key])
@@ -0,0 +1,57 @@
+"""HTML parsers for each source, decoupled from fetching.
+
+Connectors only capture raw page HTML; the functions here turn it into Agents
+using lxml with selectors compiled once at import. `iter_*` functions yield
+Agents for any fetch backend; the `parse_*` list versions are what the process
+pool runs, since generators can't cross process boundaries.
+"""
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Optional
+from src.config import DEFAULT_PARSER_WORKERS
+from src.parsers.bhhs import iter_bhhs_roster, parse_bhhs_roster
+from src.parsers.coldwell_banker import iter_cb_agent_list, parse_cb_agent_list, parse_cb_page
+from src.parsers.common import parse_profile_contact
+from src.parsers.compass import iter_compass_cards, parse_agent_search_body, parse_agent_search_response, parse_compass_cards
+from src.parsers.long_and_foster import iter_lf_roster, parse_lf_roster
+from src.parsers.spec import parse_spec_page
+
+
+class ParserPool:
+    """Runs parser functions in worker processes so parsing never blocks fetching.
+
+    With `workers=0` everything runs inline in the calling thread, which is
+    what tests and tiny runs want.
+    """
+
+    def __init__(self, workers: int = DEFAULT_PARSER_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def submit(self, fn: Callable, *args) -> Future:
+        if self.workers <= 0:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        if self._executor is None:
+            # spawn: forking a process that's driving Playwright threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor.submit(fn, *args)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
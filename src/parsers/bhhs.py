@@ -0,0 +1,60 @@
+from typing import Iterator, List
+from lxml import etree
+from lxml.cssselect import CSSSelector
+from src.identity import utc_now
+from src.models import Agent
+from src.parsers.common import TEL, absolute_url, first, make_tree, tel_number
+from src.planner import Target
+from src.utils import parse_name
+
+# Office rosters have used both card markups
+CARD = CSSSelector("div.rn-agent-roster-card, article.rng-agent-roster-agent-card")
+NAME = CSSSelector("h1.rn-agent-roster-name")
+# Name text without the "Sales Associate" style title span
+NAME_TEXT = etree.XPath('.//text()[not(ancestor::span[contains(concat(" ", @class, " "), " account-title ")])]')
+AGENT_PHONE_ICON = CSSSelector("i.rni-profile")
+PROFILE_LINK = CSSSelector("div.rn-agent-roster-header a")
+BIO_LINK = CSSSelector('a[href*="/bio/"]')
+
+
+def iter_bhhs_roster(html, page_url: str, target: Target) -> Iterator[Agent]:
+    """Yield agents from a BHHS Fox & Roach roster page (no emails on the roster)."""
+    tree = make_tree(html)
+    scraped_at = utc_now()
+    for card in CARD(tree):
+        name_el = first(NAME, card)
+        if name_el is None:
+            continue
+        full_name = " ".join("".join(NAME_TEXT(name_el)).split())
+        if not full_name:
+            continue
+        first_name, last_name = parse_name(full_name)
+
+        # The agent's own line is marked with a profile icon; otherwise take the first number
+        phones = TEL(card)
+        phone_el = next((tel for tel in phones if AGENT_PHONE_ICON(tel)), phones[0] if phones else None)
+
+        profile_link = first(PROFILE_LINK, card)
+        if profile_link is None:
+            profile_link = first(BIO_LINK, card)
+        profile_url = absolute_url(page_url, profile_link.get("href")) if profile_link is not None else ""
+
+        yield Agent(
+            first_name=first_name,
+            last_name=last_name,
+            full_name=full_name,
+            email=None,
+            phone=tel_number(phone_el),
+            brokerage="BHHS Fox & Roach",
+            city=target.town,
+            state=target.state,
+            zip_code=target.zip_code,
+            source="BHHS",
+            # Empty without a profile link: the roster URL would give every such agent one identity
+            source_url=profile_url,
+            scraped_at=scraped_at
+        )
+
+
+def parse_bhhs_roster(html, page_url: str, target: Target) -> List[Agent]:
+    return list(iter_bhhs_roster(html, page_url, target))
@@ -0,0 +1,75 @@
+import re
+from typing import Iterator, List, Optional, Tuple
+from lxml.cssselect import CSSSelector
+from src.identity import utc_now
+from src.models import Agent
+from src.parsers.common import absolute_url, first, make_tree, text_of
+from src.planner import Target
+from src.utils import normalize_phone, parse_name
+
+CB_BASE = "https://www.coldwellbankerhomes.com"
+
+BLOCK = CSSSelector(".agent-block")
+NAME_LINK = CSSSelector(".agent-content-name a")
+MOBILE_PHONE = CSSSelector('a.phone-link[data-phone-type="mobile"]')
+ANY_PHONE = CSSSelector("a.phone-link")
+OFFICE = CSSSelector("p.office a")
+PAGER_LINK = CSSSelector('a[href*="/agents/p_"]')
+NEXT_LINK = CSSSelector('a[rel="next"], a.next, li.next a')
+PAGE_NUMBER = re.compile(r"/agents/p_(\d+)/?")
+
+
+def iter_cb_agent_list(html, page_url: str, target: Target) -> Iterator[Agent]:
+    """Yield agents from one Coldwell Banker agent list page; emails come from the profiles."""
+    return _iter_blocks(make_tree(html), page_url, target)
+
+
+def _iter_blocks(tree, page_url: str, target: Target) -> Iterator[Agent]:
+    scraped_at = utc_now()
+    for block in BLOCK(tree):
+        name_el = first(NAME_LINK, block)
+        if name_el is None:
+            continue
+        full_name = text_of(name_el)
+        first_name, last_name = parse_name(full_name)
+
+        # Prefer mobile if available, otherwise take first
+        phone_el = first(MOBILE_PHONE, block)
+        if phone_el is None:
+            phone_el = first(ANY_PHONE, block)
+
+        yield Agent(
+            first_name=first_name,
+            last_name=last_name,
+            full_name=full_name,
+            email="",
+            phone=normalize_phone(text_of(phone_el)) if phone_el is not None else "",
+            brokerage=f"Coldwell Banker - {text_of(first(OFFICE, block))}",
+            city=target.town.title(),
+            state=target.state.upper(),
+            zip_code=target.zip_code,
+            source="Coldwell Banker",
+            source_url=absolute_url(page_url, name_el.get("href")),
+            scraped_at=scraped_at
+        )
+
+
+def parse_cb_agent_list(html, page_url: str, target: Target) -> List[Agent]:
+    return list(iter_cb_agent_list(html, page_url, target))
+
+
+def _last_page(tree, current_page: int) -> Optional[int]:
+    """Highest page the pager links to, or None when the page has no pager."""
+    numbers = [int(m.group(1)) for a in PAGER_LINK(tree) for m in [PAGE_NUMBER.search(a.get("href", ""))] if m]
+    has_next = bool(NEXT_LINK(tree))
+    if not numbers and not has_next:
+        return None
+    last = max(numbers + [current_page])
+    # Windowed pagers ("4 5 6 Next") only promise one more page; re-checked on every page
+    return max(last, current_page + 1) if has_next else last
+
+
+def parse_cb_page(html, page_url: str, target: Target, current_page: int) -> Tuple[List[Agent], Optional[int]]:
+    """Agents on a list page plus the last page number its pager reveals (None if no pager)."""
+    tree = make_tree(html)
+    return list(_iter_blocks(tree, page_url, target)), _last_page(tree, current_page)
@@ -0,0 +1,54 @@
+from typing import Optional, Tuple, Union
+from urllib.parse import urljoin
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+from src.utils import normalize_phone
+
+# Pages arrive as already-decoded str (Playwright's page.content(), requests' .text).
+# lxml rejects str input that carries an XML encoding declaration, so make_tree
+# re-encodes it as UTF-8, and the parser is told UTF-8 so a stale <meta charset>
+# in the document can't make it decode those bytes as something else.
+HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+# Selectors are compiled to XPath once at import, not per page
+MAILTO = CSSSelector('a[href^="mailto:"]')
+TEL = CSSSelector('a[href^="tel:"]')
+
+
+def make_tree(html: Union[str, bytes]):
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    return lxml_html.fromstring(html, parser=HTML_PARSER)
+
+
+def first(selector: CSSSelector, element):
+    matches = selector(element)
+    return matches[0] if matches else None
+
+
+def text_of(element) -> str:
+    return element.text_content().strip() if element is not None else ""
+
+
+def absolute_url(base: str, href: Optional[str]) -> str:
+    return urljoin(base, href) if href else ""
+
+
+def mailto_address(href: Optional[str]) -> str:
+    if not href:
+        return ""
+    return href.replace("mailto:", "").split("?")[0].strip()
+
+
+def tel_number(element) -> Optional[str]:
+    if element is None:
+        return None
+    return normalize_phone(element.get("href", "").replace("tel:", "")) or None
+
+
+def parse_profile_contact(html: Union[str, bytes]) -> Tuple[Optional[str], Optional[str]]:
+    """First mailto: address and tel: number on an agent profile page."""
+    tree = make_tree(html)
+    email_el = first(MAILTO, tree)
+    email = mailto_address(email_el.get("href")) if email_el is not None else None
+    return email or None, tel_number(first(TEL, tree))
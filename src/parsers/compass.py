@@ -0,0 +1,126 @@
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from lxml.cssselect import CSSSelector
+from src.identity import utc_now
+from src.models import Agent
+from src.parsers.common import MAILTO, TEL, absolute_url, first, make_tree, mailto_address, text_of
+from src.planner import Target
+from src.utils import normalize_phone, parse_name
+
+COMPASS_BASE = "https://www.compass.com"
+
+NAME = CSSSelector(".agentCard-name")
+IMAGE_LINK = CSSSelector("a.agentCard-imageWrapper")
+
+
+def _is_card_part(el) -> bool:
+    return "agentCard" in (el.get("class") or "")
+
+
+def _location(target: Optional[Target]) -> Dict[str, Optional[str]]:
+    """City, state and zip of the location page the agents were listed on; cards and feed records don't carry them."""
+    if target is None:
+        return {}
+    return {"city": target.town, "state": target.state, "zip_code": target.zip_code}
+
+
+def iter_compass_cards(html, page_url: str = COMPASS_BASE, target: Optional[Target] = None) -> Iterator[Agent]:
+    """Yield agents from the cards of a rendered Compass agents page."""
+    tree = make_tree(html)
+    scraped_at = utc_now()
+    seen_cards = set()
+    for name_el in NAME(tree):
+        # The card is the outermost ancestor in the chain of agentCard* elements
+        card = None
+        for parent in name_el.iterancestors():
+            if not _is_card_part(parent):
+                break
+            card = parent
+        if card is None or card in seen_cards:
+            continue
+        seen_cards.add(card)
+
+        full_name = text_of(name_el)
+        first_name, last_name = parse_name(full_name)
+
+        email_el = first(MAILTO, card)
+        # Often text is "M: 215..."
+        phone_el = first(TEL, card)
+        link_el = first(IMAGE_LINK, card)
+
+        yield Agent(
+            first_name=first_name,
+            last_name=last_name,
+            full_name=full_name,
+            email=mailto_address(email_el.get("href")) if email_el is not None else "",
+            phone=normalize_phone(text_of(phone_el)) if phone_el is not None else "",
+            brokerage="Compass",
+            source="Compass",
+            source_url=absolute_url(page_url, link_el.get("href")) if link_el is not None else "",
+            scraped_at=scraped_at,
+            **_location(target)
+        )
+
+
+def parse_compass_cards(html, page_url: str = COMPASS_BASE, target: Optional[Target] = None) -> List[Agent]:
+    return list(iter_compass_cards(html, page_url, target))
+
+
+def _first(record: Dict[str, Any], *keys: str):
+    for key in keys:
+        value = record.get(key)
+        if value:
+            return value
+    return None
+
+
+def _agent_phone(record: Dict[str, Any]) -> str:
+    phone = _first(record, "mobilePhone", "phone", "phoneNumber", "officePhone")
+    if not phone:
+        phones = record.get("phones") or []
+        # Prefer mobile, like the DOM cards
+        mobile = [p for p in phones if str(p.get("type", "")).lower() in ("mobile", "cell")]
+        chosen = (mobile or phones)[:1]
+        phone = chosen[0].get("number") if chosen else None
+    return normalize_phone(str(phone)) if phone else ""
+
+
+def parse_agent_search_response(payload: Dict[str, Any], base: str = COMPASS_BASE,
+                                target: Optional[Target] = None) -> Tuple[List[Agent], Optional[int]]:
+    """Map one page of the agent-search JSON feed to Agents.
+
+    Relative profile URLs are resolved against `base`. Returns the agents and the total result count when the feed reports one.
+    """
+    records = _first(payload, "agents", "results", "data") or []
+    total = _first(payload, "totalCount", "total", "numFound")
+
+    agents = []
+    scraped_at = utc_now()
+    for record in records:
+        full_name = _first(record, "displayName", "fullName", "name")
+        if not full_name:
+            full_name = " ".join(filter(None, [record.get("firstName"), record.get("lastName")]))
+        full_name = (full_name or "").strip()
+        if not full_name:
+            continue
+        first_name, last_name = parse_name(full_name)
+
+        agents.append(Agent(
+            first_name=record.get("firstName") or first_name,
+            last_name=record.get("lastName") or last_name,
+            full_name=full_name,
+            email=(_first(record, "email", "emailAddress") or "").strip(),
+            phone=_agent_phone(record),
+            brokerage="Compass",
+            source="Compass",
+            source_url=absolute_url(base, _first(record, "profileUrl", "url", "href")),
+            scraped_at=scraped_at,
+            **_location(target)
+        ))
+    return agents, int(total) if total is not None else None
+
+
+def parse_agent_search_body(body: Union[str, bytes], page_url: str, base: str = COMPASS_BASE,
+                            target: Optional[Target] = None) -> Tuple[List[Agent], Optional[int]]:
+    """`parse_agent_search_response` on the raw response body, as archived pages are stored."""
+    return parse_agent_search_response(json.loads(body), base, target)
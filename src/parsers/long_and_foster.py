@@ -0,0 +1,56 @@
+from typing import Iterator, List
+from lxml.cssselect import CSSSelector
+from src.identity import utc_now
+from src.models import Agent
+from src.parsers.common import TEL, absolute_url, first, make_tree, tel_number, text_of
+from src.planner import Target
+from src.utils import parse_name
+
+LF_BASE = "https://www.longandfoster.com"
+# Office page cards first, then the generic search result cards
+CARD_SELECTORS = (CSSSelector("article.lf-roster-card.lf-agent"), CSSSelector(".agent-card, .roster-card"))
+NAME_LINK = CSSSelector("a.lf-h5-alt")
+
+
+def iter_lf_roster(html, page_url: str, target: Target) -> Iterator[Agent]:
+    """Yield agents keyed by profile URL from a Long & Foster roster; emails come from the profiles."""
+    tree = make_tree(html)
+    cards = []
+    for selector in CARD_SELECTORS:
+        cards = selector(tree)
+        if cards:
+            break
+
+    seen_profiles = set()
+    scraped_at = utc_now()
+    for card in cards:
+        name_link = first(NAME_LINK, card)
+        if name_link is None:
+            continue
+        href = name_link.get("href")
+        # The carousel repeats cards
+        if not href or href in seen_profiles:
+            continue
+        seen_profiles.add(href)
+
+        full_name = text_of(name_link)
+        first_name, last_name = parse_name(full_name)
+
+        yield Agent(
+            first_name=first_name,
+            last_name=last_name,
+            full_name=full_name,
+            email=None,
+            phone=tel_number(first(TEL, card)),
+            brokerage="Long & Foster",
+            city=target.town,
+            state=target.state,
+            zip_code=target.zip_code,
+            source="LongAndFoster",
+            source_url=absolute_url(page_url, href),
+            scraped_at=scraped_at
+        )
+
+
+def parse_lf_roster(html, page_url: str, target: Target) -> List[Agent]:
+    return list(iter_lf_roster(html, page_url, target))
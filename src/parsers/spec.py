@@ -0,0 +1,142 @@
+"""Declarative site specs and the one parser that executes them.
+
+A `SiteSpec` says where a brokerage's rosters live and how to read an agent
+card; `SpecConnector` (src/connectors/spec_connector.py) does the fetching.
+Specs are plain frozen dataclasses of strings, so they pickle into the parser
+pool; selectors are compiled once per process and cached.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+from lxml.cssselect import CSSSelector
+from src.identity import utc_now
+from src.models import Agent
+from src.parsers.common import absolute_url, make_tree, mailto_address
+from src.planner import Target
+from src.utils import normalize_phone, parse_name
+
+# Pagination styles
+SINGLE = "single"  # one page per roster URL
+NUMBERED = "numbered"  # `page_url` for pages 2.. while `next_link` is on the page
+SCROLL = "scroll"  # one page that loads more cards as it is scrolled (needs a browser)
+PAGINATION = (SINGLE, NUMBERED, SCROLL)
+
+
+@dataclass(frozen=True)
+class Field:
+    """Where one agent field lives inside a card: the first match of `selector`.
+
+    `attr` reads an attribute (href values are unwrapped from mailto:/tel:);
+    the element's text is used when it is None. `fallback` is tried when
+    `selector` matches nothing, e.g. any phone when a card has no mobile.
+    """
+    selector: str
+    attr: Optional[str] = None
+    fallback: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class SiteSpec:
+    source: str  # Agent.source and the connector's progress name
+    brokerage: str
+    site: str  # base URL, also used to resolve relative profile links
+    # Placeholders: {site} {city} {city_slug} {state} {state_lower} {zip}
+    roster_url: str
+    card: str
+    name: Field
+    phone: Optional[Field] = None
+    email: Optional[Field] = None
+    profile_url: Optional[Field] = None
+    office: Optional[Field] = None  # appended to `brokerage` as "Brokerage - Office"
+    pagination: str = SINGLE
+    page_url: str = "{url}?page={page}"  # NUMBERED: placeholders {url} {page}
+    next_link: Optional[str] = None  # NUMBERED: selector present while more pages follow
+    # Whether pages need JavaScript; static rosters are fetched over plain HTTP, which is far cheaper
+    render: bool = True
+    settle_ms: int = 2000  # rendered pages: time for the card list to build
+    # Emails only on profile pages; visited inline or left to the enrichment stage
+    visit_profiles: bool = False
+    not_found: str = "Page Not Found"
+
+    def __post_init__(self):
+        if self.pagination not in PAGINATION:
+            raise ValueError(f"pagination must be one of {PAGINATION}")
+        if self.pagination == SCROLL and not self.render:
+            raise ValueError("scroll pagination needs render=True")
+        if self.pagination == NUMBERED and not self.next_link:
+            raise ValueError("numbered pagination needs a next_link selector")
+
+    def url_for(self, target: Target) -> str:
+        city = target.roster_city
+        return self.roster_url.format(
+            site=self.site.rstrip("/"),
+            city=quote(city),
+            city_slug=city.lower().replace(" ", "-"),
+            state=target.state,
+            state_lower=target.state.lower(),
+            zip=target.zip_code or "",
+        )
+
+    def page(self, url: str, number: int) -> str:
+        return url if number == 1 else self.page_url.format(url=url, page=number)
+
+
+@lru_cache(maxsize=None)
+def selector(css: str) -> CSSSelector:
+    return CSSSelector(css)
+
+
+def _value(field: Optional[Field], card) -> str:
+    if field is None:
+        return ""
+    matches = selector(field.selector)(card)
+    if not matches and field.fallback:
+        matches = selector(field.fallback)(card)
+    if not matches:
+        return ""
+    if field.attr is None:
+        return " ".join(matches[0].text_content().split())
+    value = (matches[0].get(field.attr) or "").strip()
+    if value.startswith("mailto:"):
+        return mailto_address(value)
+    return value[4:] if value.startswith("tel:") else value
+
+
+def has_next(spec: SiteSpec, tree) -> bool:
+    return spec.next_link is not None and bool(selector(spec.next_link)(tree))
+
+
+def parse_spec_page(html, page_url: str, target: Target, spec: SiteSpec) -> Tuple[List[Agent], bool]:
+    """Agents on one roster page, and whether the page links to a next one."""
+    tree = make_tree(html)
+    scraped_at = utc_now()
+    agents = []
+    seen = set()
+    for card in selector(spec.card)(tree):
+        full_name = _value(spec.name, card)
+        if not full_name:
+            continue
+        profile_url = absolute_url(page_url, _value(spec.profile_url, card))
+        # Carousels and "featured" strips repeat cards
+        key = profile_url or full_name
+        if key in seen:
+            continue
+        seen.add(key)
+        first_name, last_name = parse_name(full_name)
+        office = _value(spec.office, card)
+        agents.append(Agent(
+            first_name=first_name,
+            last_name=last_name,
+            full_name=full_name,
+            email=_value(spec.email, card) or None,
+            phone=normalize_phone(_value(spec.phone, card)) or None,
+            brokerage=f"{spec.brokerage} - {office}" if office else spec.brokerage,
+            city=target.town,
+            state=target.state,
+            zip_code=target.zip_code,
+            source=spec.source,
+            source_url=profile_url,
+            scraped_at=scraped_at
+        ))
+    return agents, has_next(spec, tree)
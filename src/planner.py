@@ -0,0 +1,233 @@
+"""Scrape planning: expand areas/towns/zips into targets, then into per-connector roster URLs.
+
+Targets that resolve to the same roster (same canonical URL, e.g. Strafford and
+Wayne both using Wayne's roster) are collapsed into a single request so large
+areas don't refetch identical pages.
+"""
+import csv
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from loguru import logger
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), "data", "gazetteer.csv")
+
+
+@dataclass(frozen=True)
+class Target:
+    town: str
+    state: str
+    zip_code: Optional[str] = None
+    # USPS preferred city for the zip; brokerage rosters are usually keyed on it
+    roster_town: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.town}, {self.state}"
+
+    @property
+    def roster_city(self) -> str:
+        return self.roster_town or self.town
+
+
+@dataclass
+class RosterRequest:
+    url: str
+    targets: List[Target] = field(default_factory=list)
+
+    @property
+    def primary(self) -> Target:
+        return self.targets[0]
+
+    @property
+    def target(self) -> Target:
+        """The roster's own location, which parsers stamp on its agents.
+
+        Collapsed requests list their targets in input order, so `primary` depends on
+        what else a run asked for. The roster city and state don't, which keeps an
+        agent's record (and its change-index fingerprint) the same from run to run.
+        """
+        primary = self.primary
+        zips = {t.zip_code for t in self.targets}
+        return Target(primary.roster_city, primary.state, zips.pop() if len(zips) == 1 else None)
+
+
+@dataclass
+class ConnectorPlan:
+    source: str
+    requests: List[RosterRequest]
+    collapsed: int = 0
+    est_page_loads: int = 0
+    est_seconds: float = 0.0
+
+
+@dataclass
+class ScrapePlan:
+    targets: List[Target]
+    connectors: Dict[str, ConnectorPlan] = field(default_factory=dict)
+
+    @property
+    def est_page_loads(self) -> int:
+        return sum(p.est_page_loads for p in self.connectors.values())
+
+    @property
+    def est_seconds(self) -> float:
+        return sum(p.est_seconds for p in self.connectors.values())
+
+    def summary(self) -> str:
+        lines = [f"Plan: {len(self.targets)} targets"]
+        for plan in self.connectors.values():
+            lines.append(
+                f"  {plan.source}: {len(plan.requests)} roster URLs"
+                f" ({plan.collapsed} collapsed), ~{plan.est_page_loads} page loads,"
+                f" ~{plan.est_seconds / 60:.1f} min"
+            )
+        lines.append(f"  Total: ~{self.est_page_loads} page loads, ~{self.est_seconds / 60:.1f} min (upper bound)")
+        return "\n".join(lines)
+
+
+class Gazetteer:
+    """Bundled area -> town/zip lookup (src/data/gazetteer.csv)."""
+
+    def __init__(self, rows: Sequence[Dict[str, str]]):
+        self.rows = list(rows)
+
+    @classmethod
+    def load(cls, path: str = GAZETTEER_PATH) -> "Gazetteer":
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls(list(csv.DictReader(f)))
+
+    @staticmethod
+    def _target(row: Dict[str, str]) -> Target:
+        return Target(row["town"], row["state"], row["zip"], row.get("primary_city") or row["town"])
+
+    def areas(self) -> List[str]:
+        return sorted({row["area"] for row in self.rows})
+
+    def expand_area(self, area: str) -> List[Target]:
+        wanted = area.strip().lower()
+        return [self._target(row) for row in self.rows if row["area"].lower() == wanted]
+
+    def towns_for_zip(self, zip_code: str) -> List[Target]:
+        return [self._target(row) for row in self.rows if row["zip"] == zip_code.strip()]
+
+    def lookup(self, town: str, state: Optional[str] = None) -> Optional[Target]:
+        """Find a town, optionally constrained to a state. Returns None if unknown or ambiguous."""
+        matches = [
+            row for row in self.rows
+            if row["town"].lower() == town.strip().lower()
+            and (state is None or row["state"].lower() == state.strip().lower())
+        ]
+        if len({(row["town"], row["state"]) for row in matches}) != 1:
+            return None
+        return self._target(matches[0])
+
+
+def split_town_list(text: str) -> List[str]:
+    """Split a comma-separated CLI town list without breaking 'Town, ST' pairs.
+
+    'Wayne, PA, Devon, PA, Ridgewood' -> ['Wayne, PA', 'Devon, PA', 'Ridgewood']
+    """
+    parts = [p.strip() for p in text.replace(";", ",").replace("\n", ",").split(",")]
+    parts = [p for p in parts if p]
+    towns = []
+    for part in parts:
+        if towns and len(part) == 2 and part.isalpha() and "," not in towns[-1]:
+            towns[-1] = f"{towns[-1]}, {part.upper()}"
+        else:
+            towns.append(part)
+    return towns
+
+
+def parse_town(town_input: str, gazetteer: Optional[Gazetteer] = None) -> Optional[Target]:
+    """Turn 'Town, ST' (or a bare town the gazetteer can place) into a Target."""
+    gazetteer = gazetteer or Gazetteer.load()
+    if "," in town_input:
+        town, state = [x.strip() for x in town_input.split(",", 1)]
+        if not town or not state:
+            return None
+        known = gazetteer.lookup(town, state)
+        return known or Target(town, state.upper())
+    if town_input.strip():
+        return gazetteer.lookup(town_input)
+    return None
+
+
+def build_targets(towns: Sequence[str], zips: Sequence[str] = (), area: Optional[str] = None,
+                  gazetteer: Optional[Gazetteer] = None) -> List[Target]:
+    """Expand area, towns and zips into a de-duplicated, ordered target list."""
+    gazetteer = gazetteer or Gazetteer.load()
+    targets: List[Target] = []
+    seen = set()
+
+    def add(target: Target):
+        key = (target.town.lower(), target.state.lower())
+        if key not in seen:
+            seen.add(key)
+            targets.append(target)
+
+    if area:
+        expanded = gazetteer.expand_area(area)
+        if not expanded:
+            logger.warning(f"Area '{area}' is not in the gazetteer. Known areas: {', '.join(gazetteer.areas())}")
+        for target in expanded:
+            add(target)
+
+    for town_input in towns:
+        if not town_input.strip():
+            continue
+        target = parse_town(town_input, gazetteer)
+        if target is None:
+            logger.warning(f"Skipping '{town_input}' - use 'Town, State' format.")
+            continue
+        add(target)
+
+    for zip_code in zips:
+        if not zip_code.strip():
+            continue
+        matches = gazetteer.towns_for_zip(zip_code)
+        if not matches:
+            logger.warning(f"Zip {zip_code.strip()} is not in the gazetteer; add its town to --towns instead.")
+        for target in matches:
+            add(target)
+
+    return targets
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL for roster comparison: case, trailing slash and query order don't matter."""
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted((k.lower(), v.lower()) for k, v in parse_qsl(parts.query)))
+    path = parts.path.rstrip("/").lower() or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+def collapse_requests(requests: Sequence[RosterRequest]) -> List[RosterRequest]:
+    """Merge requests whose URLs resolve to the same roster, keeping first-seen order."""
+    merged: Dict[str, RosterRequest] = {}
+    for request in requests:
+        key = canonical_url(request.url)
+        if key in merged:
+            merged[key].targets.extend(t for t in request.targets if t not in merged[key].targets)
+        else:
+            merged[key] = RosterRequest(request.url, list(request.targets))
+    return list(merged.values())
+
+
+def plan_scrape(targets: Sequence[Target], connectors: Sequence, max_pages: int) -> ScrapePlan:
+    """Build every connector's roster URL set and estimate what running it would cost."""
+    plan = ScrapePlan(list(targets))
+    for connector in connectors:
+        raw = [RosterRequest(url, [target]) for target in targets
+               for url in [connector.roster_url(target)] if url]
+        requests = collapse_requests(raw)
+        page_loads, seconds = connector.estimate_cost(len(requests), max_pages)
+        plan.connectors[connector.name] = ConnectorPlan(
+            source=connector.name,
+            requests=requests,
+            collapsed=len(raw) - len(requests),
+            est_page_loads=page_loads,
+            est_seconds=seconds,
+        )
+    return plan
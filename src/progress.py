@@ -0,0 +1,111 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from src.models import Agent
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+@dataclass
+class ConnectorProgress:
+    name: str
+    status: str = PENDING
+    agents: int = 0
+    pages_done: int = 0
+    pages_total: int = 0
+    error: Optional[str] = None
+
+    @property
+    def fraction(self) -> float:
+        if self.status in (DONE, FAILED, CANCELLED):
+            return 1.0
+        if not self.pages_total:
+            return 0.0
+        return min(self.pages_done / self.pages_total, 1.0)
+
+
+class ScrapeProgress:
+    """Thread-safe progress shared between a running scrape and whoever polls it."""
+
+    def __init__(self, max_logs: int = 500, keep_agents: bool = True):
+        self._lock = threading.Lock()
+        self._agents: List[Agent] = []
+        # Memory-bounded runs only count agents; nothing streams them to a UI
+        self.keep_agents = keep_agents
+        self._agent_count = 0
+        self._logs: List[str] = []
+        self._max_logs = max_logs
+        self.connectors: Dict[str, ConnectorProgress] = {}
+        self.status = PENDING
+        self.error: Optional[str] = None
+
+    # Writer side (scrape thread)
+
+    def register(self, name: str):
+        with self._lock:
+            self.connectors.setdefault(name, ConnectorProgress(name))
+
+    def set_status(self, status: str, error: Optional[str] = None):
+        with self._lock:
+            self.status = status
+            self.error = error
+
+    def start_connector(self, name: str):
+        with self._lock:
+            self.connectors.setdefault(name, ConnectorProgress(name)).status = RUNNING
+
+    def finish_connector(self, name: str, status: str = DONE, error: Optional[str] = None):
+        with self._lock:
+            progress = self.connectors.setdefault(name, ConnectorProgress(name))
+            progress.status = status
+            progress.error = error
+
+    def set_pages_total(self, name: str, total: int):
+        with self._lock:
+            self.connectors.setdefault(name, ConnectorProgress(name)).pages_total = total
+
+    def advance(self, name: str, pages: int = 1):
+        with self._lock:
+            self.connectors.setdefault(name, ConnectorProgress(name)).pages_done += pages
+
+    def add_agent(self, name: str, agent: Agent):
+        with self._lock:
+            if self.keep_agents:
+                self._agents.append(agent)
+            self._agent_count += 1
+            self.connectors.setdefault(name, ConnectorProgress(name)).agents += 1
+
+    def log(self, message: str):
+        with self._lock:
+            self._logs.append(str(message))
+            if len(self._logs) > self._max_logs:
+                del self._logs[: len(self._logs) - self._max_logs]
+
+    # Reader side (UI / API)
+
+    def agents_since(self, offset: int) -> Tuple[List[Agent], int]:
+        """Return agents collected after `offset` and the new offset."""
+        with self._lock:
+            new_agents = self._agents[offset:]
+            return new_agents, offset + len(new_agents)
+
+    def logs(self, last: int = 20) -> List[str]:
+        with self._lock:
+            return self._logs[-last:]
+
+    def snapshot(self) -> List[ConnectorProgress]:
+        with self._lock:
+            return [ConnectorProgress(**vars(p)) for p in self.connectors.values()]
+
+    @property
+    def total_agents(self) -> int:
+        with self._lock:
+            return self._agent_count
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
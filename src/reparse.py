@@ -0,0 +1,80 @@
+"""Offline re-parse: regenerate the output CSV from the page archive, with no network.
+
+Runs today's parsers over the newest archived copy of every page, so a fixed
+selector or a newly extracted field reaches all previously scraped agents
+without a live re-scrape. Batches of pages are parsed in the parser pool;
+workers read their pages straight out of the memory-mapped segments.
+"""
+import os
+import time
+from typing import Dict, Iterable, Optional
+from loguru import logger
+from src.archive import PageArchive, parse_batch, parser_path
+from src.config import ARCHIVE_DIR, ARCHIVE_REPARSE_BATCH, DEFAULT_PARSER_WORKERS
+from src.dedup import DedupIndex
+from src.enrichment import ContactCache
+from src.parsers import ParserPool, parse_profile_contact
+from src.scraper_manager import write_csv
+
+
+def reparse(archive_dir: str = ARCHIVE_DIR, output_file: str = "contacts.csv",
+            workers: int = DEFAULT_PARSER_WORKERS, sources: Optional[Iterable[str]] = None,
+            contact_cache: Optional[ContactCache] = None, batch_size: int = ARCHIVE_REPARSE_BATCH) -> Dict[str, float]:
+    """Parse every archived roster page, fill emails from archived profiles (then the
+    contact cache), deduplicate and write `output_file`. Returns counts of what was done."""
+    if not os.path.exists(os.path.join(archive_dir, "index.sqlite")):
+        raise FileNotFoundError(f"No page archive in {archive_dir}; scrape with --archive first")
+    started = time.monotonic()
+    profile_parser = parser_path(parse_profile_contact)
+    wanted = {s.lower() for s in sources} if sources else None
+
+    with PageArchive(archive_dir) as archive:
+        records = [r for r in archive.records()
+                   if wanted is None or r.parser == profile_parser or r.source.lower() in wanted]
+    stats = {"pages": len(records), "profiles": 0, "failed": 0, "agents": 0, "emails_filled": 0, "unique": 0}
+    logger.info(f"Re-parsing {len(records)} archived pages from {archive_dir}")
+
+    # Workers open the segments by path, whatever their working directory
+    directory = os.path.abspath(archive_dir)
+    batches = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+    agents, contacts = [], {}
+    with ParserPool(workers) as pool:
+        futures = [pool.submit(parse_batch, directory,
+                               [(r.segment, r.offset, r.length, r.parser, r.args) for r in batch])
+                   for batch in batches]
+        for batch, future in zip(batches, futures):
+            for record, (result, error) in zip(batch, future.result()):
+                if error is not None:
+                    stats["failed"] += 1
+                    logger.warning(f"Could not re-parse {record.url}: {error}")
+                elif record.parser == profile_parser:
+                    stats["profiles"] += 1
+                    contacts[record.url] = result
+                else:
+                    # List parsers return agents, or (agents, pager/total info)
+                    page_agents = result[0] if isinstance(result, tuple) else result
+                    for agent in page_agents:
+                        agent.scraped_at = record.fetched_at
+                    agents.extend(page_agents)
+    stats["agents"] = len(agents)
+
+    for agent in agents:
+        if agent.email or not agent.source_url:
+            continue
+        contact = contacts.get(agent.source_url) or (contact_cache.get(agent.source_url) if contact_cache else None)
+        if contact is not None and contact[0]:
+            agent.email = contact[0]
+            agent.phone = agent.phone or contact[1]
+            stats["emails_filled"] += 1
+
+    index = DedupIndex()
+    # Later duplicates can still donate an email or phone to a survivor, so write once all are merged
+    unique = [agent for agent in agents if index.merge(agent)]
+    stats["unique"] = write_csv(unique, output_file)
+    stats["seconds"] = round(time.monotonic() - started, 2)
+    logger.info(
+        f"Re-parse: {stats['pages']} pages ({stats['profiles']} profiles, {stats['failed']} failed), "
+        f"{stats['agents']} agents, {stats['emails_filled']} emails from profiles, "
+        f"{stats['unique']} unique written to {output_file} in {stats['seconds']}s"
+    )
+    return stats
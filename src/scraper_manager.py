@@ -1,76 +1,306 @@
-import pandas as pd
-from typing import List, Dict
+import csv
+import gc
+from contextlib import closing, nullcontext
+from typing import Iterable, List, Optional, Tuple
 from src.models import Agent
 from src.connectors.base_connector import BaseConnector
-from src.connectors.compass import CompassConnector
+from src.progress import ScrapeProgress, DONE, FAILED, CANCELLED
+from src.planner import ScrapePlan, build_targets, plan_scrape
+from src.parsers import ParserPool
+from src.budget import BudgetTracker, ScrapeBudget
+from src.dedup import DedupIndex, SpillingDedupIndex
+from src.enrichment import ContactCache, EmailEnricher
+from src.navigation import CircuitBreaker, Navigator
+from src.archive import PageArchive
+from src.change_index import ChangeIndex, DeltaWriter
+from src.contact_store import ContactStore
+from src.memory import MemoryMonitor
+from src.config import (
+    BROWSER_CONTEXT_MAX_MB,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_PARSER_WORKERS,
+    DEFAULT_RATE_LIMIT,
+    MEMORY_CHECK_EVERY,
+)
 from loguru import logger
+import threading
 import time
 import os
 
+
+def write_csv(agents: Iterable[Agent], path: str) -> int:
+    """Stream agents to a CSV at `path`; returns how many were written (no file for none)."""
+    agents = iter(agents)
+    first = next(agents, None)
+    if first is None:
+        return 0
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        row = first.to_dict()
+        writer = csv.DictWriter(f, fieldnames=list(row))
+        writer.writeheader()
+        writer.writerow(row)
+        count = 1
+        for agent in agents:
+            writer.writerow(agent.to_dict())
+            count += 1
+    return count
+
+
 class ScraperManager:
-    def __init__(self, towns: List[str], zips: List[str], max_pages: int = 5, output_file: str = "contacts.csv"):
+    def __init__(self, towns: List[str], zips: List[str], max_pages: int = 5, output_file: str = "contacts.csv",
+                 progress: Optional[ScrapeProgress] = None, browser_endpoint: Optional[str] = None,
+                 area: Optional[str] = None, parser_workers: int = DEFAULT_PARSER_WORKERS,
+                 budget: Optional[ScrapeBudget] = None, enrich: bool = True,
+                 enrich_concurrency: int = DEFAULT_CONCURRENCY, contact_cache: Optional[ContactCache] = None,
+                 index_path: Optional[str] = None, delta_file: Optional[str] = None,
+                 memory_limit_mb: Optional[float] = None, parser_pool: Optional[ParserPool] = None,
+                 breaker: Optional[CircuitBreaker] = None, archive_dir: Optional[str] = None,
+                 contacts_path: Optional[str] = None):
         self.towns = towns
         self.zips = zips
+        self.area = area
+        self.plan: Optional[ScrapePlan] = None
+        self.parser_workers = parser_workers
+        # A long-lived pool (the scrape service's) is borrowed, not shut down after the run
+        self.parser_pool = parser_pool
         self.max_pages = max_pages
         self.output_file = output_file
         self.connectors: List[BaseConnector] = []
         self.agents: List[Agent] = []
-        
+        self.progress = progress or ScrapeProgress()
+        self.cancel_event = threading.Event()
+        self.browser_endpoint = browser_endpoint
+        self.budget = BudgetTracker(budget)
+        # Uniques seen so far, so budgets can react while the run is still going
+        self.dedup = DedupIndex()
+        # Profile visits for emails happen after dedup, only for agents still missing one
+        self.enrich = enrich
+        self.enrich_concurrency = enrich_concurrency
+        self.contact_cache = contact_cache
+        # One retry policy and circuit breaker for every page load in the run; the
+        # breaker can be shared so a service remembers failing hosts between jobs
+        self.navigator = Navigator(breaker=breaker, cancel_event=self.cancel_event)
+        # Cross-run change detection; disabled when index_path is None
+        self.index_path = index_path
+        self.delta_file = delta_file or f"{os.path.splitext(output_file)[0]}_delta.csv"
+        # False once any source stopped short, so the index doesn't report its agents as disappeared
+        self.complete = True
+        self.collected = 0
+        # Memory-bounded mode: agents are deduplicated as they arrive into an index that
+        # can spill to disk, instead of all being held in self.agents until the end
+        self.memory = MemoryMonitor(memory_limit_mb) if memory_limit_mb else None
+        self.memory_exceeded = False
+        if self.bounded:
+            self.dedup = SpillingDedupIndex()
+            self.progress.keep_agents = False
+        # Raw page bodies kept for offline re-parsing (main.py reparse)
+        self.archive = PageArchive(archive_dir) if archive_dir else None
+        # Every run's agents accumulate here for querying (main.py query); off when None
+        self.contacts_path = contacts_path
+
+    @property
+    def bounded(self) -> bool:
+        return self.memory is not None
+
     def add_connector(self, connector: BaseConnector):
+        connector.cancel_event = self.cancel_event
+        connector.progress = self.progress
+        connector.budget = self.budget
+        connector.defer_profiles = self.enrich
+        connector.navigator = self.navigator
+        connector.archive = self.archive
+        if self.bounded:
+            connector.context_memory_limit_mb = BROWSER_CONTEXT_MAX_MB
+        if self.browser_endpoint:
+            connector.browser_endpoint = self.browser_endpoint
+        self.progress.register(connector.name)
         self.connectors.append(connector)
+
+    def cancel(self):
+        """Ask the running scrape to stop; connectors exit at their next checkpoint."""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
         
+    def build_plan(self) -> ScrapePlan:
+        """Expand area/towns/zips and hand each connector its de-duplicated roster URLs."""
+        targets = build_targets(self.towns, self.zips, self.area)
+        self.plan = plan_scrape(targets, self.connectors, self.max_pages)
+        for connector in self.connectors:
+            connector.planned_requests = self.plan.connectors[connector.name].requests
+        return self.plan
+
     def run(self):
-        logger.info(f"Starting scrape for {len(self.towns)} towns and {len(self.zips)} zips.")
-        
+        if self.plan is None:
+            self.build_plan()
+        logger.info(f"Starting scrape for {len(self.plan.targets)} towns ({len(self.towns)} towns and {len(self.zips)} zips requested).")
+        logger.info(self.plan.summary())
+
+        # One parser pool for the whole run; fetch threads only capture HTML
+        pool = nullcontext(self.parser_pool) if self.parser_pool else ParserPool(self.parser_workers)
+        with pool as parser_pool:
+            for connector in self.connectors:
+                connector.parser_pool = parser_pool
+            self._run_connectors()
+                
+        if self.cancelled:
+            logger.warning("Scrape cancelled; keeping agents collected so far.")
+        logger.info(f"Total raw agents collected: {self.collected}")
+        try:
+            if self.bounded:
+                logger.info(f"Unique agents after deduplication: {len(self.dedup)}")
+            else:
+                self.deduplicate()
+            if self.enrich and not self.cancelled:
+                self.enrich_emails()
+            logger.info(f"Navigation: {self.navigator.summary()}")
+            self.save_csv()
+            if self.index_path:
+                self.update_index()
+            if self.contacts_path:
+                self.update_contacts()
+        finally:
+            if self.archive is not None:
+                logger.info(f"Archive: {self.archive.summary()}")
+                self.archive.close()
+            if self.bounded:
+                logger.info(f"Peak RSS {self.memory.peak_mb:.0f} MB (budget {self.memory.limit_mb:.0f} MB)")
+                self.dedup.close()
+
+    def _run_connectors(self):
         for connector in self.connectors:
+            if self.cancelled:
+                self.progress.finish_connector(connector.name, CANCELLED)
+                continue
+
+            reason = self.budget.run_exhausted()
+            if reason:
+                logger.info(f"Skipping {connector.name}: {reason}")
+                self.progress.finish_connector(connector.name, DONE)
+                continue
+
             logger.info(f"Running connector: {connector.name}")
+            self.progress.start_connector(connector.name)
+            self.budget.start_source(connector.name)
             try:
-                for agent in connector.scrape(self.towns, self.zips, self.max_pages):
-                    self.agents.append(agent)
-                    logger.debug(f"Collected: {agent.full_name}")
+                with closing(connector.scrape(self.towns, self.zips, self.max_pages)) as agents:
+                    for agent in agents:
+                        self.collected += 1
+                        if self.bounded:
+                            is_new = self.dedup.merge(agent)
+                            if self.collected % MEMORY_CHECK_EVERY == 0:
+                                self._check_memory()
+                        else:
+                            self.agents.append(agent)
+                            is_new = self.dedup.add(agent)
+                        self.budget.record(is_new)
+                        self.progress.add_agent(connector.name, agent)
+                        logger.debug(f"Collected: {agent.full_name}")
+                        if self.cancelled:
+                            break
+                        reason = self.budget.stop_reason()
+                        if reason:
+                            logger.info(f"Stopping {connector.name}: {reason}")
+                            break
+                if self.cancelled or self.budget.stop_reason():
+                    self.complete = False
+                self.progress.finish_connector(connector.name, CANCELLED if self.cancelled else DONE)
             except Exception as e:
                 logger.error(f"Connector {connector.name} failed: {e}")
-                
-        logger.info(f"Total raw agents collected: {len(self.agents)}")
-        self.deduplicate()
-        self.save_csv()
-        
+                self.progress.finish_connector(connector.name, FAILED, str(e))
+                self.complete = False
+
+        if not self.budget.budget.unlimited:
+            logger.info(f"Budget: {self.budget.unique} unique agents, {self.budget.profile_visits} profile visits.")
+
+    def _check_memory(self):
+        current = self.memory.sample()
+        if not self.dedup.spilled and self.memory.should_spill(current):
+            logger.info(f"RSS {current:.0f} MB is nearing the {self.memory.limit_mb:.0f} MB budget; moving the dedup index to disk.")
+            self.dedup.spill()
+            gc.collect()
+            current = self.memory.sample()
+        if self.memory.exceeded(current):
+            logger.error(f"RSS {current:.0f} MB is over the {self.memory.limit_mb:.0f} MB budget; stopping with what was collected.")
+            self.memory_exceeded = True
+            self.complete = False
+            self.cancel()
+
+    def results(self) -> Iterable[Agent]:
+        """The run's unique agents; streamed from the dedup index in memory-bounded mode."""
+        return self._sampled(iter(self.dedup)) if self.bounded else self.agents
+
+    def _sampled(self, agents: Iterable[Agent]) -> Iterable[Agent]:
+        # Keeps the peak RSS honest through the output, index and contacts passes
+        for n, agent in enumerate(agents, 1):
+            if n % MEMORY_CHECK_EVERY == 0:
+                self.memory.sample()
+            yield agent
+
     def deduplicate(self):
         """Deduplicate agents based on email, phone, or name+brokerage."""
+        index = DedupIndex()
         unique_agents = []
-        seen_emails = set()
-        seen_phones = set()
-        seen_names = set() # full_name + brokerage
-        
         for agent in self.agents:
-            # Key checks
-            email_exists = agent.email and agent.email in seen_emails
-            phone_exists = agent.phone and agent.phone in seen_phones
-            name_key = f"{agent.full_name}|{agent.brokerage}"
-            name_exists = name_key in seen_names
-            
-            if not (email_exists or phone_exists or name_exists):
+            # Duplicates from other sources donate emails/phones the survivor lacks
+            if index.merge(agent):
                 unique_agents.append(agent)
-                if agent.email:
-                    seen_emails.add(agent.email)
-                if agent.phone:
-                    seen_phones.add(agent.phone)
-                seen_names.add(name_key)
             else:
                 logger.debug(f"Duplicate filtered: {agent.full_name}")
-                
+
         self.agents = unique_agents
         logger.info(f"Unique agents after deduplication: {len(self.agents)}")
-        
+
+    def enrich_emails(self):
+        """Visit profiles for surviving agents that no source gave an email."""
+        enricher = EmailEnricher(
+            concurrency=self.enrich_concurrency,
+            rate_limit=DEFAULT_RATE_LIMIT,
+            cache=self.contact_cache,
+            browser_endpoint=self.browser_endpoint,
+            cancel_event=self.cancel_event,
+            budget=self.budget,
+            progress=self.progress,
+            navigator=self.navigator,
+            archive=self.archive,
+        )
+        if not self.bounded:
+            return enricher.enrich(self.agents)
+        # One enrichment pass over the spilled survivors, a batch at a time
+        return enricher.enrich_batches(self.dedup.batches(), agents=lambda batch: [agent for _, agent in batch],
+                                       done=self.dedup.replace)
+
+    def update_index(self):
+        """Compare this run against the persistent index and write the delta file."""
+        # Changes stream to the delta file; nothing per agent is kept in memory
+        with ChangeIndex(self.index_path) as index, DeltaWriter(self.delta_file) as writer:
+            delta = index.apply(self.results(), complete=self.complete and not self.cancelled,
+                                incomplete=self.failed_scopes(), sink=writer)
+        logger.info(f"Changes since last run: {delta.summary()} (written to {self.delta_file})")
+        return delta
+
+    def failed_scopes(self) -> List[Tuple[str, str, str]]:
+        """(source, town, state) scopes that lost roster pages to load failures this run."""
+        scopes = [(c.name, town, state) for c in self.connectors for town, state in sorted(c.failed_scopes)]
+        if scopes:
+            logger.warning(f"Roster pages failed for {len(scopes)} source/town scopes; "
+                           f"their missing agents won't be reported as disappeared.")
+        return scopes
+
+    def update_contacts(self) -> int:
+        """Add this run's agents to the persistent contacts store."""
+        with ContactStore(self.contacts_path) as store:
+            count = store.upsert(self.results())
+            logger.info(f"Contacts store: {count} agents added or refreshed, {len(store)} in total ({self.contacts_path})")
+        return count
+
     def save_csv(self):
-        if not self.agents:
+        """Write the unique agents to `output_file`, one row at a time."""
+        count = write_csv(self.results(), self.output_file)
+        if count:
+            logger.info(f"Saved {count} agents to {self.output_file}")
+        else:
             logger.warning("No agents to save.")
-            return
-            
-        df = pd.DataFrame([a.to_dict() for a in self.agents])
-        
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(self.output_file) if os.path.dirname(self.output_file) else ".", exist_ok=True)
-        
-        df.to_csv(self.output_file, index=False)
-        logger.info(f"Saved {len(df)} agents to {self.output_file}")
@@ -0,0 +1,435 @@
+"""Long-running scrape service: a bounded job queue behind a local HTTP/JSON API.
+
+`main.py serve` pays the startup costs once: imports, the shared Chromium,
+the parser process pool, the profile contact cache and the per-host circuit
+breaker all stay warm between jobs. Jobs are queued, and at most
+`max_concurrent` of them scrape at a time.
+
+    POST   /jobs                       submit {"towns": [...], "sources": [...], ...} -> 202 job
+    GET    /jobs                       all known jobs
+    GET    /jobs/<id>                  status and per-source progress
+    GET    /jobs/<id>/agents?since=N   agents collected after offset N (poll with "next")
+    GET    /jobs/<id>/stream           the same agents as NDJSON, streamed until the job ends
+                                       (409 for memory-bounded jobs, which don't keep agents)
+    GET    /jobs/<id>/results          the deduplicated CSV, once the job is done
+    DELETE /jobs/<id>                  cancel a queued or running job
+    GET    /health                     queue depth, running jobs, browser endpoint
+"""
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+from loguru import logger
+from src.browser import SharedBrowser
+from src.budget import ScrapeBudget
+from src.config import (
+    CHANGE_INDEX_PATH,
+    CONTACTS_DB_PATH,
+    DEFAULT_MAX_PAGES,
+    DEFAULT_PARSER_WORKERS,
+    SERVICE_JOB_HISTORY,
+    SERVICE_MAX_CONCURRENT_JOBS,
+    SERVICE_MAX_QUEUED_JOBS,
+    SERVICE_OUTPUT_DIR,
+)
+from src.connectors import create_connector, default_sources, resolve_source
+from src.enrichment import ContactCache
+from src.identity import utc_now
+from src.navigation import CircuitBreaker
+from src.parsers import ParserPool
+from src.planner import split_town_list
+from src.progress import CANCELLED, PENDING
+from src.scraper_manager import ScraperManager
+from src.worker import ScrapeWorker
+
+
+class ServiceBusy(Exception):
+    """The job queue is full."""
+
+
+# JSON types accepted for each JobRequest field; None is also accepted where the default is None
+_NUMBER = (int, float)
+FIELD_TYPES = {
+    "towns": list, "zips": list, "sources": list, "area": str,
+    "max_pages": int, "target_unique": int, "max_profile_visits": int,
+    "source_deadline": _NUMBER, "min_new_rate": _NUMBER, "memory_limit_mb": _NUMBER,
+    "enrich": bool,
+}
+
+
+def _check_field(cls, name: str, value):
+    default = next(f.default for f in fields(cls) if f.name == name)
+    if value is None and default is None:
+        return
+    expected = FIELD_TYPES[name]
+    # bool is an int subclass; true isn't a page count
+    if not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool):
+        raise ValueError(f"{name} has the wrong type")
+    if expected is list and not all(isinstance(v, str) for v in value):
+        raise ValueError(f"{name} must be a list of strings")
+    if expected in (int, _NUMBER) and value < (1 if name == "max_pages" else 0):
+        raise ValueError(f"{name} must be {'at least 1' if name == 'max_pages' else 'non-negative'}")
+
+
+@dataclass
+class JobRequest:
+    """What a client can ask for; mirrors the scrape CLI flags."""
+    towns: List[str] = field(default_factory=list)
+    zips: List[str] = field(default_factory=list)
+    area: Optional[str] = None
+    sources: List[str] = field(default_factory=default_sources)
+    max_pages: int = DEFAULT_MAX_PAGES
+    target_unique: Optional[int] = None
+    source_deadline: Optional[float] = None
+    max_profile_visits: Optional[int] = None
+    min_new_rate: Optional[float] = None
+    enrich: bool = True
+    memory_limit_mb: Optional[float] = None
+
+    @classmethod
+    def from_json(cls, data: dict) -> "JobRequest":
+        """Validate a submitted job; raises ValueError with a message for the client."""
+        if not isinstance(data, dict):
+            raise ValueError("job must be a JSON object")
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+        data = dict(data)
+        # Comma-separated strings are accepted like on the command line
+        if isinstance(data.get("towns"), str):
+            data["towns"] = split_town_list(data["towns"])
+        for key in ("zips", "sources"):
+            if isinstance(data.get(key), str):
+                data[key] = [v.strip() for v in data[key].split(",") if v.strip()]
+        for name, value in data.items():
+            _check_field(cls, name, value)
+        request = cls(**data)
+        if not request.towns and not request.zips and not request.area:
+            raise ValueError("give towns, zips or an area")
+        try:
+            request.sources = list(dict.fromkeys(resolve_source(s) for s in request.sources))
+        except KeyError as e:
+            raise ValueError(e.args[0]) from e
+        if not request.sources:
+            raise ValueError("no sources selected")
+        return request
+
+    @property
+    def budget(self) -> ScrapeBudget:
+        return ScrapeBudget(target_unique=self.target_unique, source_deadline=self.source_deadline,
+                            max_profile_visits=self.max_profile_visits, min_new_rate=self.min_new_rate)
+
+
+@dataclass
+class Job:
+    id: str
+    request: JobRequest
+    manager: ScraperManager
+    submitted_at: str = field(default_factory=utc_now)
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    @property
+    def status(self) -> str:
+        return self.manager.progress.status
+
+    @property
+    def finished(self) -> bool:
+        return self.manager.progress.finished
+
+    def to_dict(self) -> dict:
+        progress = self.manager.progress
+        return {
+            "id": self.id,
+            "status": self.status,
+            "error": progress.error,
+            "towns": self.request.towns,
+            "zips": self.request.zips,
+            "area": self.request.area,
+            "sources": self.request.sources,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "agents_collected": progress.total_agents,
+            "unique_agents": len(self.manager.dedup) if self.finished else None,
+            "output_file": self.manager.output_file,
+            "progress": [vars(p) for p in progress.snapshot()],
+        }
+
+
+class ScrapeService:
+    def __init__(self, max_concurrent: int = SERVICE_MAX_CONCURRENT_JOBS, max_queued: int = SERVICE_MAX_QUEUED_JOBS,
+                 output_dir: str = SERVICE_OUTPUT_DIR, parser_workers: int = DEFAULT_PARSER_WORKERS,
+                 shared_browser: bool = True, index_path: Optional[str] = CHANGE_INDEX_PATH,
+                 history: int = SERVICE_JOB_HISTORY, connector_factory: Callable = create_connector,
+                 contacts_path: Optional[str] = CONTACTS_DB_PATH):
+        self.max_concurrent = max(max_concurrent, 1)
+        self.output_dir = output_dir
+        self.index_path = index_path
+        self.contacts_path = contacts_path
+        self.history = history
+        self.connector_factory = connector_factory
+        # Warm between jobs
+        self.browser = SharedBrowser() if shared_browser else None
+        self.parser_pool = ParserPool(parser_workers)
+        self.contact_cache = ContactCache()
+        self.breaker = CircuitBreaker()
+
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max_queued)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._running: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._runners: List[threading.Thread] = []
+
+    def start(self):
+        if self.browser is not None:
+            try:
+                self.browser.start()
+            except Exception as e:
+                # Connectors fall back to launching their own Chromium per job
+                logger.warning(f"Shared browser unavailable ({e}); jobs will launch their own.")
+                self.browser = None
+        for n in range(self.max_concurrent):
+            runner = threading.Thread(target=self._run_jobs, name=f"job-runner-{n}", daemon=True)
+            runner.start()
+            self._runners.append(runner)
+        logger.info(f"Scrape service ready: {self.max_concurrent} concurrent, {self._queue.maxsize} queued")
+
+    def stop(self, timeout: float = 30):
+        """Cancel everything, let runners finish their current job, and release warm resources."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            if not job.finished:
+                job.manager.cancel()
+        for _ in self._runners:
+            # Sentinels go in behind whatever is queued; cancelled jobs are skipped quickly
+            self._queue.put(None)
+        for runner in self._runners:
+            runner.join(timeout)
+        self._runners = []
+        self.parser_pool.shutdown()
+        self.contact_cache.save()
+        if self.browser is not None:
+            self.browser.stop()
+
+    # Jobs
+
+    def submit(self, request: JobRequest) -> Job:
+        job_id = uuid.uuid4().hex[:12]
+        manager = ScraperManager(
+            request.towns, request.zips, request.max_pages, os.path.join(self.output_dir, f"{job_id}.csv"),
+            browser_endpoint=self.browser.endpoint if self.browser is not None else None,
+            area=request.area, budget=request.budget, enrich=request.enrich,
+            contact_cache=self.contact_cache, index_path=self.index_path,
+            memory_limit_mb=request.memory_limit_mb, parser_pool=self.parser_pool, breaker=self.breaker,
+            contacts_path=self.contacts_path,
+        )
+        for source in request.sources:
+            manager.add_connector(self.connector_factory(source))
+        job = Job(job_id, request, manager)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise ServiceBusy(f"{self._queue.maxsize} jobs already queued")
+        with self._lock:
+            self._jobs[job_id] = job
+            self._trim_history()
+        logger.info(f"Queued job {job_id}: {len(request.towns)} towns, sources {', '.join(request.sources)}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.manager.cancel()
+            if job.status == PENDING:
+                # Still queued: the runner will skip it, but report it cancelled now
+                job.manager.progress.set_status(CANCELLED)
+                job.finished_at = utc_now()
+        return job
+
+    def health(self) -> dict:
+        with self._lock:
+            running = list(self._running)
+        return {
+            "status": "ok",
+            "queued": self._queue.qsize(),
+            "running": running,
+            "max_concurrent": self.max_concurrent,
+            "browser": self.browser.endpoint if self.browser is not None else None,
+        }
+
+    def _trim_history(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(len(self._jobs) - self.history, 0)]:
+            del self._jobs[job_id]
+
+    def _run_jobs(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if job.manager.cancelled:
+                continue
+            if self.browser is not None and not self.browser.running:
+                # Chromium died between jobs; bring it back before this one connects
+                try:
+                    endpoint = self.browser.start()
+                    for connector in job.manager.connectors:
+                        connector.browser_endpoint = endpoint
+                except Exception as e:
+                    logger.warning(f"Could not restart the shared browser: {e}")
+            with self._lock:
+                self._running[job.id] = job
+            job.started_at = utc_now()
+            try:
+                worker = ScrapeWorker(job.manager)
+                worker.start()
+                worker.join()
+            finally:
+                job.finished_at = utc_now()
+                with self._lock:
+                    self._running.pop(job.id, None)
+                self.contact_cache.save()
+                logger.info(f"Job {job.id} {job.status}")
+
+
+# HTTP API
+
+def _send_json(handler: BaseHTTPRequestHandler, status: int, payload):
+    body = json.dumps(payload).encode("utf-8")
+    handler.send_response(status)
+    handler.send_header("Content-Type", "application/json")
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def _error(handler: BaseHTTPRequestHandler, status: int, message: str):
+    _send_json(handler, status, {"error": message})
+
+
+def make_server(service: ScrapeService, host: str, port: int) -> ThreadingHTTPServer:
+    """HTTP server exposing `service`; call `serve_forever()` on it."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            logger.debug(f"API {self.address_string()} {format % args}")
+
+        def _job(self, job_id: str) -> Optional[Job]:
+            job = service.get(job_id)
+            if job is None:
+                _error(self, 404, f"no job {job_id}")
+            return job
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            segments = [s for s in parts.path.split("/") if s]
+            query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+
+            if segments == ["health"]:
+                return _send_json(self, 200, service.health())
+            if segments == ["jobs"]:
+                return _send_json(self, 200, {"jobs": [job.to_dict() for job in service.jobs()]})
+            if len(segments) < 2 or segments[0] != "jobs":
+                return _error(self, 404, "not found")
+            job = self._job(segments[1])
+            if job is None:
+                return
+            if len(segments) == 2:
+                return _send_json(self, 200, job.to_dict())
+            action = segments[2]
+            if action in ("agents", "stream") and job.request.memory_limit_mb:
+                return _error(self, 409, "memory-bounded jobs don't keep agents in memory; "
+                                         "fetch /results once the job is done")
+            if action == "agents":
+                try:
+                    since = int(query.get("since", 0))
+                except ValueError:
+                    return _error(self, 400, "since must be an integer")
+                agents, offset = job.manager.progress.agents_since(since)
+                return _send_json(self, 200, {"agents": [a.to_dict() for a in agents], "next": offset,
+                                              "finished": job.finished})
+            if action == "stream":
+                return self._stream(job)
+            if action == "results":
+                return self._results(job)
+            return _error(self, 404, "not found")
+
+        def do_POST(self):
+            if urlsplit(self.path).path.rstrip("/") != "/jobs":
+                return _error(self, 404, "not found")
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = JobRequest.from_json(json.loads(self.rfile.read(length) or b"{}"))
+            except (ValueError, TypeError) as e:
+                return _error(self, 400, str(e))
+            try:
+                job = service.submit(request)
+            except ServiceBusy as e:
+                return _error(self, 503, str(e))
+            _send_json(self, 202, job.to_dict())
+
+        def do_DELETE(self):
+            segments = [s for s in urlsplit(self.path).path.split("/") if s]
+            if len(segments) != 2 or segments[0] != "jobs":
+                return _error(self, 404, "not found")
+            job = self._job(segments[1])
+            if job is not None:
+                service.cancel(job.id)
+                _send_json(self, 200, job.to_dict())
+
+        def _stream(self, job: Job):
+            """NDJSON of agents as they arrive; the response ends when the job does."""
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            offset = 0
+            try:
+                while True:
+                    finished = job.finished
+                    agents, offset = job.manager.progress.agents_since(offset)
+                    for agent in agents:
+                        self.wfile.write((json.dumps(agent.to_dict()) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+                    if finished:
+                        return
+                    time.sleep(0.5)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _results(self, job: Job):
+            path = job.manager.output_file
+            if not job.finished:
+                return _error(self, 409, f"job is {job.status}")
+            if not os.path.exists(path):
+                return _error(self, 404, "job wrote no results")
+            with open(path, "rb") as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
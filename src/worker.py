@@ -0,0 +1,48 @@
+import itertools
+import threading
+from src.scraper_manager import ScraperManager
+from src.progress import RUNNING, DONE, FAILED, CANCELLED
+from loguru import logger
+
+LOG_FORMAT = "{time:HH:mm:ss} | {level} | {message}"
+
+_run_ids = itertools.count(1)
+
+
+class ScrapeWorker(threading.Thread):
+    """Runs a ScraperManager in a background thread.
+
+    Callers poll `manager.progress` for per-connector status, log lines and the
+    agents yielded so far, and call `cancel()` to stop the run early.
+    """
+
+    def __init__(self, manager: ScraperManager):
+        super().__init__(daemon=True)
+        self.manager = manager
+        self.progress = manager.progress
+        self.run_id = f"run-{next(_run_ids)}"
+
+    def cancel(self):
+        self.manager.cancel()
+
+    def run(self):
+        # Capture records tagged with this run's id, so concurrent runs don't mix. The tag is a
+        # context variable: threads the run starts (enrichment workers) carry it over, while
+        # parser-pool processes don't log and their records couldn't reach this sink anyway.
+        sink_id = logger.add(
+            self.progress.log,
+            format=LOG_FORMAT,
+            level="INFO",
+            filter=lambda record: record["extra"].get("run_id") == self.run_id,
+        )
+        self.progress.set_status(RUNNING)
+        try:
+            with logger.contextualize(run_id=self.run_id):
+                try:
+                    self.manager.run()
+                    self.progress.set_status(CANCELLED if self.manager.cancelled else DONE)
+                except Exception as e:
+                    logger.error(f"Scrape failed: {e}")
+                    self.progress.set_status(FAILED, str(e))
+        finally:
+            logger.remove(sink_id)
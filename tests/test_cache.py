@@ -0,0 +1,41 @@
+import time
+from src.cache import ResultCache
+from src.models import Agent
+
+
+def make_agents(n):
+    return [Agent(first_name="A", last_name=str(i), full_name=f"A {i}") for i in range(n)]
+
+
+def test_key_ignores_order_case_and_whitespace():
+    a = ResultCache.make_key(["Wayne, PA", "Devon, PA"], ["19087"], ["cb", "bhhs"], 5)
+    b = ResultCache.make_key([" devon, pa", "wayne, pa"], ["19087", ""], ["BHHS", "cb"], 5)
+    assert a == b
+    assert a != ResultCache.make_key(["Wayne, PA"], ["19087"], ["cb", "bhhs"], 5)
+
+
+def test_entries_expire_after_ttl():
+    cache = ResultCache(ttl=60)
+    key = ResultCache.make_key(["Wayne, PA"], [], ["cb"], 1)
+    result = cache.put(key, make_agents(2))
+    assert cache.get(key) is result
+
+    result.created_at = time.time() - 61
+    assert cache.get(key) is None
+
+
+def test_csv_bytes_built_once():
+    cache = ResultCache()
+    result = cache.put(ResultCache.make_key([], [], [], 1), make_agents(3))
+    first = result.csv_bytes
+    assert first.startswith(b"first_name,last_name")
+    assert result.csv_bytes is first
+
+
+def test_oldest_entry_evicted():
+    cache = ResultCache(max_entries=2)
+    keys = [ResultCache.make_key([str(i)], [], [], 1) for i in range(3)]
+    for key in keys:
+        cache.put(key, [])
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) is not None
@@ -0,0 +1,192 @@
+import csv
+import threading
+from dataclasses import replace
+from src.change_index import ChangeIndex, write_delta
+from src.connectors.base_connector import BaseConnector
+from src.connectors.compass import CompassConnector
+from src.connectors.spec_connector import SpecConnector
+from src.fixture_server import FixtureConfig, FixtureServer
+from src.models import Agent
+from src.parsers import parse_bhhs_roster
+from src.planner import RosterRequest, Target
+from src.scraper_manager import ScraperManager
+from tests.test_scraper_manager import FakeConnector
+from tests.test_spec_connector import CB_SPEC
+
+
+def agent(name, email=None, city="Wayne", source="Coldwell Banker", url=None):
+    slug = name.lower().replace(" ", "-")
+    return Agent(first_name=name.split()[0], last_name=name.split()[-1], full_name=name, email=email,
+                 city=city, state="PA", source=source,
+                 source_url=url if url is not None else f"https://cb.example/agent/{slug}/")
+
+
+def test_agent_id_is_stable_and_source_scoped():
+    a = agent("Mary Jones")
+    same_profile = agent("Mary  Jones", email="mary@x.com", url="https://CB.example/agent/mary-jones")
+    assert a.agent_id == same_profile.agent_id
+    assert a.agent_id != agent("Mary Jones", source="Compass").agent_id
+
+    # Without a profile URL the normalized contact details identify the agent
+    by_phone = Agent(first_name="T", last_name="L", full_name="T L", phone="(610) 555-0100", source="BHHS")
+    assert by_phone.agent_id == Agent(first_name="T", last_name="L", full_name="Tom L", phone="1-610-555-0100", source="BHHS").agent_id
+
+
+def test_cards_without_profile_links_get_their_own_ids():
+    # Neither card links a profile; the roster URL must not stand in as their identity
+    html = """
+    <div class="rn-agent-roster-card"><h1 class="rn-agent-roster-name">Ann Lee</h1>
+      <a href="tel:6105550100">610-555-0100</a></div>
+    <div class="rn-agent-roster-card"><h1 class="rn-agent-roster-name">Bob Ray</h1>
+      <a href="tel:6105550101">610-555-0101</a></div>
+    """
+    ann, bob = parse_bhhs_roster(html, "https://www.foxroach.com/roster/agents?city=Wayne&state=PA", Target("Wayne", "PA"))
+    assert ann.source_url == bob.source_url == ""
+    assert ann.agent_id != bob.agent_id
+
+
+def test_runs_are_classified_against_the_index(tmp_path):
+    path = str(tmp_path / "agents.sqlite")
+    with ChangeIndex(path) as index:
+        first = index.apply([agent("Mary Jones"), agent("Tom Lee"), agent("Ann Roe")])
+    assert len(first.new) == 3 and not first.disappeared
+
+    with ChangeIndex(path) as index:
+        second = index.apply([
+            agent("Mary Jones"),
+            agent("Tom Lee", email="tom@x.com"),
+            agent("New Person"),
+            agent("Other Town", city="Devon"),
+        ])
+    assert second.unchanged == 1
+    assert [r["full_name"] for r in second.changed] == ["Tom Lee"]
+    assert [r["full_name"] for r in second.new] == ["New Person", "Other Town"]
+    assert [r["full_name"] for r in second.disappeared] == ["Ann Roe"]
+
+
+def test_incomplete_run_reports_no_disappearances(tmp_path):
+    path = str(tmp_path / "agents.sqlite")
+    with ChangeIndex(path) as index:
+        index.apply([agent("Mary Jones"), agent("Tom Lee")])
+        partial = index.apply([agent("Mary Jones")], complete=False)
+        assert partial.disappeared == []
+        # Tom is still active, so a later complete run can still report him
+        assert [r["full_name"] for r in index.apply([agent("Mary Jones")]).disappeared] == ["Tom Lee"]
+
+
+def test_scopes_with_failed_roster_pages_report_no_disappearances(tmp_path):
+    with ChangeIndex(str(tmp_path / "agents.sqlite")) as index:
+        index.apply([agent("Mary Jones"), agent("Tom Lee"), agent("Ann Roe", city="Devon")])
+        # Source names are matched with spacing and case folded
+        delta = index.apply([agent("Mary Jones")], incomplete=[("ColdwellBanker", "Wayne", "PA")])
+    assert delta.disappeared == []
+    with ChangeIndex(str(tmp_path / "agents.sqlite")) as index:
+        delta_devon = index.apply([agent("Mary Jones"), agent("Dan Poe", city="Devon")],
+                                  incomplete=[("ColdwellBanker", "Wayne", "PA")])
+    assert [r["full_name"] for r in delta_devon.disappeared] == ["Ann Roe"]
+
+
+class FlakyRosterConnector(BaseConnector):
+    """Returns Mary, then loses the rest of the Wayne roster when `fail` is set."""
+
+    def __init__(self, fail):
+        super().__init__("ColdwellBanker", rate_limit=0)
+        self.fail = fail
+
+    def scrape(self, towns, zips, max_pages):
+        yield agent("Mary Jones")
+        if self.fail:
+            self._roster_failed(RosterRequest("https://cb.example/pa/wayne/agents/", [Target("Wayne", "PA")]))
+        else:
+            yield agent("Tom Lee")
+
+
+def test_manager_passes_failed_roster_scopes_to_the_index(tmp_path):
+    for fail in (False, True):
+        manager = ScraperManager(["Wayne, PA"], [], 1, str(tmp_path / "contacts.csv"), parser_workers=0,
+                                 enrich=False, index_path=str(tmp_path / "agents.sqlite"))
+        manager.add_connector(FlakyRosterConnector(fail))
+        manager.run()
+    assert manager.complete
+    with open(tmp_path / "contacts_delta.csv", newline="") as f:
+        assert [r["change"] for r in csv.DictReader(f)] == []
+
+
+def test_delta_file_lists_only_changes(tmp_path):
+    with ChangeIndex(str(tmp_path / "agents.sqlite")) as index:
+        index.apply([agent("Mary Jones"), agent("Tom Lee")])
+        delta = index.apply([agent("Mary Jones", email="m@x.com")])
+    path = tmp_path / "delta.csv"
+    write_delta(delta, str(path))
+
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [(r["change"], r["full_name"]) for r in rows] == [("changed", "Mary Jones"), ("disappeared", "Tom Lee")]
+    assert rows[0]["agent_id"] == agent("Mary Jones").agent_id
+
+
+def test_manager_writes_delta_next_to_output(tmp_path):
+    out = tmp_path / "contacts.csv"
+    manager = ScraperManager(["Wayne, PA"], [], 1, str(out), index_path=str(tmp_path / "agents.sqlite"))
+    manager.add_connector(FakeConnector("A", count=3))
+    manager.run()
+    assert (tmp_path / "contacts_delta.csv").exists()
+    assert manager.complete
+
+
+def test_concurrent_applies_to_one_index_both_succeed(tmp_path):
+    # Scrape service jobs finishing together update the same index
+    path = str(tmp_path / "agents.sqlite")
+    errors = []
+
+    def apply(source):
+        try:
+            with ChangeIndex(path) as index:
+                index.apply(agent(f"Agent {n}", source=source) for n in range(8000))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=apply, args=(source,)) for source in ("A", "B")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    with ChangeIndex(path) as index:
+        assert len(index) == 16000
+
+
+def test_compass_runs_over_different_towns_keep_their_own_scopes(tmp_path):
+    deltas = []
+    with FixtureServer(FixtureConfig(agents_per_town=5, overlap=0)) as server:
+        for town in ("Wayne, PA", "Ridgewood, NJ"):
+            manager = ScraperManager([town], [], 1, str(tmp_path / "contacts.csv"), parser_workers=0, enrich=False,
+                                     index_path=str(tmp_path / "agents.sqlite"))
+            manager.add_connector(CompassConnector(rate_limit=0, fetch_mode="api", site=server.base_url))
+            manager.run()
+            with open(tmp_path / "contacts_delta.csv", newline="") as f:
+                deltas.append([r["change"] for r in csv.DictReader(f)])
+    assert {(a.city, a.state) for a in manager.results()} == {("Ridgewood", "NJ")}
+    # Ridgewood's run says nothing about Wayne's agents
+    assert deltas == [["new"] * 5, ["new"] * 5]
+
+    # An agent with no town can't be scoped, so it is never reported as gone
+    with ChangeIndex(str(tmp_path / "agents.sqlite")) as index:
+        index.apply([agent("Mary Jones", city="")])
+        assert index.apply([agent("Tom Lee", city="")]).disappeared == []
+
+
+def test_collapsed_rosters_keep_their_city_whatever_the_request_order(tmp_path):
+    deltas = []
+    with FixtureServer(FixtureConfig(agents_per_town=5, overlap=0)) as server:
+        # Strafford and Wayne share Wayne's roster; the run's first town differs
+        for towns in (["Strafford, PA", "Wayne, PA"], ["Wayne, PA", "Strafford, PA"], ["Strafford, PA"]):
+            manager = ScraperManager(towns, [], 1, str(tmp_path / "contacts.csv"), parser_workers=0, enrich=False,
+                                     index_path=str(tmp_path / "agents.sqlite"))
+            connector = SpecConnector(replace(CB_SPEC, visit_profiles=False), rate_limit=0, site=server.base_url)
+            manager.add_connector(connector)
+            manager.run()
+            with open(tmp_path / "contacts_delta.csv", newline="") as f:
+                deltas.append([r["change"] for r in csv.DictReader(f)])
+    assert {a.city for a in manager.results()} == {"Wayne"}
+    assert deltas == [["new"] * 5, [], []]
@@ -1,6 +1,9 @@
 import pytest
 import os
+import json
+import requests
 from playwright.sync_api import sync_playwright
+from src.connectors.compass import CompassConnector, parse_agent_search_response
 from src.utils import normalize_phone
 
 def test_compass_parsing():
@@ -60,3 +63,78 @@ def test_compass_parsing():
         assert john_records[0]["email"] == ""
         
         browser.close()
+
+
+def load_feed_page(name):
+    with open(os.path.join("tests/fixtures", name)) as f:
+        return json.load(f)
+
+
+class FakeResponse:
+    def __init__(self, payload=None, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+    def json(self):
+        return self.payload
+
+
+class RecordedFeed:
+    """Replays recorded agent-search responses keyed by the `start` offset."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.calls.append(params)
+        return self.pages.get(params["start"], FakeResponse(status_code=404))
+
+
+def test_parse_agent_search_response():
+    agents, total = parse_agent_search_response(load_feed_page("compass_agents_page1.json"))
+    assert total == 3
+    jane, team = agents
+    assert (jane.first_name, jane.last_name) == ("Jane", "Doe")
+    assert jane.email == "jane.doe@compass.com"
+    assert jane.phone == "555-123-4567"
+    assert jane.source_url == "https://www.compass.com/agents/jane-doe/"
+    assert team.full_name == "The Dyer Nixon Team"
+    assert team.phone == "267-278-6591"
+
+
+def test_api_mode_pages_through_feed():
+    feed = RecordedFeed({
+        0: FakeResponse(load_feed_page("compass_agents_page1.json")),
+        2: FakeResponse(load_feed_page("compass_agents_page2.json")),
+    })
+    connector = CompassConnector(rate_limit=0, fetch_mode="api", session=feed, page_size=2)
+
+    agents = list(connector.scrape(["Wayne, PA"], [], max_pages=10))
+
+    assert [a.full_name for a in agents] == ["Jane Doe", "The Dyer Nixon Team", "John Smith"]
+    assert [c["start"] for c in feed.calls] == [0, 2]
+    assert feed.calls[0]["location"] == "wayne-pa"
+    assert agents[2].email == ""
+
+
+def test_auto_mode_falls_back_to_dom(monkeypatch):
+    feed = RecordedFeed({})
+    connector = CompassConnector(rate_limit=0, fetch_mode="auto", session=feed)
+    fallback_urls = []
+
+    def fake_dom(urls, max_pages):
+        fallback_urls.extend(urls)
+        yield from []
+
+    monkeypatch.setattr(connector, "_scrape_dom", fake_dom)
+    list(connector.scrape(["Wayne, PA", "Devon, PA"], [], max_pages=1))
+
+    assert fallback_urls == [
+        "https://www.compass.com/agents/locations/wayne-pa/",
+        "https://www.compass.com/agents/locations/devon-pa/",
+    ]
@@ -0,0 +1,91 @@
+import json
+import main
+from src.contact_store import ContactQuery, ContactStore, normalize
+from src.models import Agent
+from src.scraper_manager import ScraperManager, write_csv
+from tests.test_scraper_manager import FakeConnector
+
+
+def agent(name, city="Wayne", state="PA", zip_code="19087", brokerage="Coldwell Banker - Wayne",
+          source="ColdwellBanker", email=None, phone=None):
+    first, last = name.split()[0], name.split()[-1]
+    return Agent(first_name=first, last_name=last, full_name=name, email=email, phone=phone,
+                 brokerage=brokerage, city=city, state=state, zip_code=zip_code, source=source,
+                 source_url=f"https://example.com/{source}/{name.lower().replace(' ', '-')}")
+
+
+AGENTS = [
+    agent("Mary Sullivan", email="mary@cbmoves.com"),
+    agent("Tom O'Brien", city="Devon", zip_code="19333", email="tom@compass.com",
+          brokerage="Compass", source="Compass"),
+    agent("Ann Núñez", city="Berwyn", zip_code="19312", brokerage="BHHS Fox & Roach", source="BHHS"),
+    agent("Sully Park", city="Wayne", zip_code="19087", email="sully@compass.com", brokerage="Compass", source="Compass"),
+]
+
+
+def names(page):
+    return [row["full_name"] for row in page.rows]
+
+
+def test_filters_and_prefix_search(tmp_path):
+    with ContactStore(str(tmp_path / "contacts.sqlite")) as store:
+        assert store.upsert(AGENTS) == 4
+        # Full-name or last-name prefix, accents and punctuation folded
+        assert names(store.query(ContactQuery(name="sul"))) == ["Mary Sullivan", "Sully Park"]
+        assert names(store.query(ContactQuery(name="nunez"))) == ["Ann Núñez"]
+        assert names(store.query(ContactQuery(name="o'brien"))) == ["Tom O'Brien"]
+        assert names(store.query(ContactQuery(town="wayne", state="pa"))) == ["Mary Sullivan", "Sully Park"]
+        assert names(store.query(ContactQuery(zip_code="193"))) == ["Ann Núñez", "Tom O'Brien"]
+        assert names(store.query(ContactQuery(brokerage="coldwell"))) == ["Mary Sullivan"]
+        assert names(store.query(ContactQuery(source="compass", town="Wayne"))) == ["Sully Park"]
+        assert names(store.query(ContactQuery(email_domain="@Compass.com"))) == ["Sully Park", "Tom O'Brien"]
+        assert len(store.query(ContactQuery(has_email=True)).rows) == 3
+        assert store.sources() == ["BHHS", "ColdwellBanker", "Compass"]
+
+
+def test_pagination_counts_every_match(tmp_path):
+    with ContactStore(str(tmp_path / "contacts.sqlite")) as store:
+        store.upsert(agent(f"Agent Number{n:03d}") for n in range(120))
+        page = store.query(ContactQuery(name="agent", page=3, page_size=50))
+        assert page.total == 120 and page.pages == 3
+        assert (page.first, page.last) == (101, 120)
+        assert page.rows[0]["full_name"] == "Agent Number100"
+        assert store.query(ContactQuery(page=4, page_size=50)).rows == []
+
+
+def test_later_runs_refresh_without_losing_contact_details(tmp_path):
+    path = str(tmp_path / "contacts.sqlite")
+    with ContactStore(path) as store:
+        store.upsert([agent("Mary Sullivan", email="mary@cbmoves.com", phone="610-555-0100")])
+    with ContactStore(path) as store:
+        store.upsert([agent("Mary Sullivan", brokerage="Coldwell Banker - Devon")])
+        row = store.query(ContactQuery(email_domain="cbmoves.com")).rows[0]
+    assert row["email"] == "mary@cbmoves.com" and row["phone"] == "610-555-0100"
+    assert row["brokerage"] == "Coldwell Banker - Devon"
+    assert normalize("  O'Brien-NÚÑEZ ") == "o brien nunez"
+
+
+def test_runs_accumulate_in_the_store(tmp_path):
+    path = str(tmp_path / "contacts.sqlite")
+    for name in ("A", "B"):
+        manager = ScraperManager(["Wayne, PA"], [], 1, str(tmp_path / f"{name}.csv"), parser_workers=0,
+                                 enrich=False, contacts_path=path)
+        manager.add_connector(FakeConnector(name, count=3))
+        manager.run()
+    with ContactStore(path) as store:
+        assert len(store) == 6
+        assert store.query(ContactQuery(source="b")).total == 3
+
+
+def test_query_command_imports_csv_and_prints_json(tmp_path, capsys):
+    csv_path = tmp_path / "contacts.csv"
+    write_csv(AGENTS, str(csv_path))
+    db = str(tmp_path / "contacts.sqlite")
+    main.main(["query", "--db", db, "--import_csv", str(csv_path), "--town", "Wayne, PA", "--format", "json"])
+    result = json.loads(capsys.readouterr().out)
+    assert result["total"] == 2
+    assert [row["full_name"] for row in result["rows"]] == ["Mary Sullivan", "Sully Park"]
+
+    main.main(["query", "--db", db, "--brokerage", "bhhs"])
+    out = capsys.readouterr().out
+    assert "Ann Núñez" in out and "1-1 of 1 agents" in out
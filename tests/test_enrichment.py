@@ -0,0 +1,149 @@
+import threading
+from src.dedup import DedupIndex
+from src.enrichment import ContactCache, EmailEnricher
+from src.models import Agent
+
+
+class RecordingEnricher(EmailEnricher):
+    """Serves profile contacts from a dict instead of a browser and records what it visited."""
+
+    def __init__(self, profiles, **kwargs):
+        super().__init__(**kwargs)
+        self.profiles = profiles
+        self.visited = []
+
+    def _fetch_all(self, urls):
+        self.visited.extend(urls)
+        return {url: self.profiles[url] for url in urls if url in self.profiles}
+
+
+def agent(name, url="", email=None, phone=None, brokerage=None):
+    return Agent(first_name=name, last_name="", full_name=name, email=email, phone=phone,
+                 brokerage=brokerage, source_url=url)
+
+
+def test_only_agents_without_email_are_visited(tmp_path):
+    agents = [
+        agent("Has Email", "https://cb/a", email="a@x.com"),
+        agent("Needs Email", "https://cb/b"),
+        agent("No Profile"),
+    ]
+    enricher = RecordingEnricher({"https://cb/b": ("b@x.com", "610-555-0101")},
+                                 cache=ContactCache(str(tmp_path / "contacts.json")))
+    stats = enricher.enrich(agents)
+
+    assert enricher.visited == ["https://cb/b"]
+    assert agents[1].email == "b@x.com" and agents[1].phone == "610-555-0101"
+    assert stats["needed"] == 1 and stats["visited"] == 1
+
+
+def test_cache_persists_between_runs(tmp_path):
+    path = str(tmp_path / "contacts.json")
+    profiles = {"https://lf/a": ("a@x.com", None), "https://lf/b": (None, None)}
+    RecordingEnricher(profiles, cache=ContactCache(path)).enrich([agent("A", "https://lf/a"), agent("B", "https://lf/b")])
+
+    second = RecordingEnricher(profiles, cache=ContactCache(path))
+    agents = [agent("A", "https://lf/a"), agent("B", "https://lf/b")]
+    stats = second.enrich(agents)
+
+    # Profiles without an email are remembered too
+    assert second.visited == []
+    assert stats["cached"] == 2
+    assert agents[0].email == "a@x.com" and agents[1].email is None
+
+
+def test_expired_cache_entries_are_refetched(tmp_path):
+    cache = ContactCache(str(tmp_path / "contacts.json"), ttl=-1)
+    cache.put("https://cb/a", ("a@x.com", None))
+    enricher = RecordingEnricher({"https://cb/a": ("new@x.com", None)}, cache=cache)
+    enricher.enrich([agent("A", "https://cb/a")])
+    assert enricher.visited == ["https://cb/a"]
+
+
+def test_dedup_merge_fills_missing_email_from_duplicate():
+    cb = agent("Mary Jones", "https://cb/mary", phone="610-555-0100", brokerage="Coldwell Banker - Wayne")
+    compass = agent("Mary Jones", email="mary@compass.com", phone="610-555-0100", brokerage="Compass")
+
+    survivors = DedupIndex().filter([cb, compass])
+
+    assert survivors == [cb]
+    assert cb.email == "mary@compass.com"
+    assert not EmailEnricher.needs_email(cb)
+
+
+def test_urls_shared_by_different_agents_are_not_enriched(tmp_path):
+    # A roster page standing in as source_url; its first mailto: is nobody's in particular
+    roster = "https://bhhs/roster/agents?city=Wayne"
+    agents = [agent("Ann Lee", roster), agent("Bob Ray", roster), agent("Cy Fox", "https://bhhs/bio/cy")]
+    enricher = RecordingEnricher({roster: ("office@x.com", None), "https://bhhs/bio/cy": ("cy@x.com", None)},
+                                 cache=ContactCache(str(tmp_path / "contacts.json")))
+    stats = enricher.enrich(agents)
+
+    assert enricher.visited == ["https://bhhs/bio/cy"]
+    assert agents[0].email is None and agents[1].email is None and agents[2].email == "cy@x.com"
+    assert stats["shared"] == 1
+
+
+class CountingCache(ContactCache):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.saves = 0
+
+    def save(self):
+        self.saves += 1
+        super().save()
+
+
+def test_batches_share_one_set_of_browser_workers(tmp_path, monkeypatch):
+    launched = []
+
+    class FakeBrowser:
+        def new_context(self, **kwargs):
+            return self
+
+        def new_page(self):
+            return self
+
+        def close(self):
+            pass
+
+    def fake_launch(p, endpoint):
+        launched.append(endpoint)
+        return FakeBrowser()
+
+    monkeypatch.setattr("src.enrichment.launch_browser", fake_launch)
+    monkeypatch.setattr(EmailEnricher, "_visit", lambda self, page, url: (url.rsplit("/", 1)[1] + "@x.com", None))
+    cache = CountingCache(str(tmp_path / "contacts.json"))
+    enricher = EmailEnricher(concurrency=2, rate_limit=0, cache=cache)
+    batches = [[agent(f"A{b}{n}", f"https://cb/{b}{n}") for n in range(3)] for b in range(3)]
+    batches[1].append(agent("Has Email", "https://cb/e", email="e@x.com"))
+    finished = []
+    stats = enricher.enrich_batches(batches, done=finished.append)
+
+    assert len(launched) == 2 and cache.saves == 1
+    assert finished == batches
+    assert all(a.email == a.source_url.rsplit("/", 1)[1] + "@x.com" for batch in batches for a in batch)
+    # Counts cover every batch, not just the last one
+    assert stats["needed"] == 9 and stats["visited"] == 9 and stats["skipped"] == 0
+
+
+def test_concurrent_cache_saves_leave_a_readable_file(tmp_path):
+    path = str(tmp_path / "contacts.json")
+    cache = ContactCache(path)
+    errors = []
+
+    def save(n):
+        try:
+            for i in range(50):
+                cache.put(f"https://cb/{n}/{i}", (f"{n}{i}@x.com", None))
+                cache.save()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(ContactCache(path)) == 200
@@ -0,0 +1,100 @@
+import urllib.error
+import urllib.request
+import pytest
+from src.connectors.bhhs import BHHSConnector
+from src.connectors.coldwell_banker import CBConnector
+from src.connectors.compass import CompassConnector
+from src.connectors.long_and_foster import LongAndFosterConnector
+from src.fixture_server import FixtureConfig, FixtureServer
+from src.parsers import (
+    parse_bhhs_roster,
+    parse_cb_page,
+    parse_compass_cards,
+    parse_lf_roster,
+    parse_profile_contact,
+)
+from src.planner import Target
+from src.scraper_manager import ScraperManager
+
+WAYNE = Target("Wayne", "PA")
+
+
+def get(url: str) -> str:
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return response.read().decode("utf-8")
+
+
+@pytest.fixture
+def server():
+    with FixtureServer(FixtureConfig(agents_per_town=50, cb_page_size=20, compass_batch=20)) as server:
+        yield server
+
+
+def test_connector_urls_parse_with_the_real_parsers(server):
+    base = server.base_url
+
+    cb_url = CBConnector(base_url=base).roster_url(WAYNE)
+    agents, last_page = parse_cb_page(get(cb_url), cb_url, WAYNE, 1)
+    assert len(agents) == 20 and last_page == 3
+    page_3 = f"{cb_url}p_3/"
+    agents, last_page = parse_cb_page(get(page_3), page_3, WAYNE, 3)
+    assert len(agents) == 10 and last_page == 3
+    assert parse_profile_contact(get(agents[0].source_url))[0]
+
+    lf_url = LongAndFosterConnector(site=base).roster_url(WAYNE)
+    lf_agents = parse_lf_roster(get(lf_url), lf_url, WAYNE)
+    assert len(lf_agents) == 50 and all(a.phone for a in lf_agents)
+    assert parse_profile_contact(get(lf_agents[-1].source_url))[0].endswith("@lnf.example")
+
+    bhhs_url = BHHSConnector(site=base).roster_url(WAYNE)
+    bhhs_agents = parse_bhhs_roster(get(bhhs_url), bhhs_url, WAYNE)
+    assert len(bhhs_agents) == 50 and "Sales Associate" not in bhhs_agents[0].full_name
+    assert parse_profile_contact(get(bhhs_agents[-1].source_url))[0]
+
+    compass_url = CompassConnector(site=base).roster_url(WAYNE)
+    cards = parse_compass_cards(get(compass_url), compass_url)
+    assert len(cards) == 20 and all(a.email and a.phone for a in cards)
+
+
+def test_shared_pool_overlaps_sources_and_towns(server):
+    cb = parse_cb_page(get(f"{server.base_url}/pa/wayne/agents/"), server.base_url, WAYNE, 1)[0]
+    lf = parse_lf_roster(get(f"{server.base_url}/real-estate-agents/Devon-PA"), server.base_url, Target("Devon", "PA"))
+    shared = {a.phone for a in cb} & {a.phone for a in lf}
+    # overlap=0.2 of 50 agents; the first CB page shows all of them
+    assert len(shared) == 10
+
+
+def test_unknown_paths_404(server):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        get(f"{server.base_url}/nowhere")
+    assert error.value.code == 404
+
+
+def test_compass_feed_load_through_manager(tmp_path):
+    towns = [f"Town{i}, PA" for i in range(300)]
+    config = FixtureConfig(agents_per_town=40, overlap=0.25, error_rate=0.05, seed=7)
+    with FixtureServer(config) as server:
+        manager = ScraperManager(towns, [], 1, str(tmp_path / "out.csv"), enrich=False)
+        manager.navigator.backoff = 0.001
+        manager.navigator.retries = 6
+        manager.navigator.breaker.threshold = 50
+        manager.add_connector(CompassConnector(rate_limit=0, fetch_mode="api", site=server.base_url))
+        manager.run()
+
+    # 10 region-wide agents appear in every town; the other 30 per town are local
+    assert manager.collected == 300 * 40
+    assert len(manager.dedup) == 10 + 300 * 30
+    assert server.stats["compass_api"] == 300
+    assert server.stats["error"] == manager.navigator.stats["http_5xx"] > 0
+
+
+def test_rate_limit_spaces_requests(tmp_path):
+    with FixtureServer(FixtureConfig(agents_per_town=10)) as server:
+        manager = ScraperManager([f"Town{i}, PA" for i in range(3)], [], 2, str(tmp_path / "out.csv"), enrich=False)
+        # page_size=4 splits each town's 10 agents into feed pages, with a rate-limit pause after each
+        manager.add_connector(CompassConnector(rate_limit=0.2, fetch_mode="api", page_size=4, site=server.base_url))
+        manager.run()
+
+    assert server.stats["compass_api"] == 6
+    assert min(server.intervals()) >= 0.2
+    assert manager.collected == 3 * 8
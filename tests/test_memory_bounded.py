@@ -0,0 +1,90 @@
+import json
+import os
+import subprocess
+import sys
+from src.connectors.base_connector import BaseConnector
+from src.dedup import DedupIndex, SpillingDedupIndex
+from src.models import Agent
+from src.scraper_manager import ScraperManager
+
+# Scaled down for the default suite; SYNTHETIC_AGENTS=1000000 runs the size the memory cap is meant for
+SYNTHETIC_AGENTS = int(os.environ.get("SYNTHETIC_AGENTS", 50_000))
+MEMORY_CAP_MB = 192
+
+
+class SyntheticConnector(BaseConnector):
+    """Generates a region's worth of agents; every 10th repeats an earlier one, a third have emails."""
+
+    def __init__(self, count: int):
+        super().__init__("Synthetic", rate_limit=0)
+        self.count = count
+
+    def scrape(self, towns, zips, max_pages):
+        for i in range(self.count):
+            if self.should_stop():
+                break
+            n = i if i % 10 else i // 2
+            yield Agent(first_name="Agent", last_name=str(n), full_name=f"Agent {n}", phone=f"{n:010d}",
+                        email=f"agent{n}@example.com" if n % 3 == 0 else None, brokerage="Synthetic Realty",
+                        city="Springfield", state="PA", source="Synthetic",
+                        source_url=f"https://synthetic.example/agent/{n}/")
+
+
+def expected_unique(count: int) -> int:
+    return len({i if i % 10 else i // 2 for i in range(count)})
+
+
+def test_spilled_index_matches_in_memory_dedup():
+    agents = list(SyntheticConnector(500).scrape([], [], 1))
+    agents += [Agent(first_name="X", last_name="", full_name="Agent 7", phone="0000000007",
+                     email="late@example.com", brokerage="Other")]
+    spilling = SpillingDedupIndex(max_in_memory=100)
+    try:
+        flags = [spilling.merge(a) for a in agents]
+        assert spilling.spilled
+        assert flags == [a for a in map(DedupIndex().merge, agents)]
+        survivors = list(spilling)
+        assert len(survivors) == len(spilling) == expected_unique(500)
+        # The late duplicate's email reached the spilled survivor
+        assert next(a for a in survivors if a.full_name == "Agent 7").email == "late@example.com"
+    finally:
+        spilling.close()
+
+
+def test_synthetic_region_stays_under_memory_cap(tmp_path):
+    out = tmp_path / "contacts.csv"
+    script = f"""
+import json, sys
+from loguru import logger
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+from src.memory import peak_rss_mb
+from src.scraper_manager import ScraperManager
+from tests.test_memory_bounded import SyntheticConnector
+manager = ScraperManager([], [], 1, {str(out)!r}, enrich=False, parser_workers=0, memory_limit_mb={MEMORY_CAP_MB},
+                         index_path={str(tmp_path / "agents.sqlite")!r}, contacts_path={str(tmp_path / "contacts.sqlite")!r})
+manager.add_connector(SyntheticConnector({SYNTHETIC_AGENTS}))
+manager.run()
+print(json.dumps({{"peak": peak_rss_mb(), "exceeded": manager.memory_exceeded, "collected": manager.collected}}))
+"""
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=900)
+    assert result.returncode == 0, result.stderr[-2000:]
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert stats["collected"] == SYNTHETIC_AGENTS
+    assert not stats["exceeded"]
+    assert stats["peak"] < MEMORY_CAP_MB
+    with open(out, encoding="utf-8") as f:
+        assert sum(1 for _ in f) - 1 == expected_unique(SYNTHETIC_AGENTS)
+    # A first run with the change index on: every agent is new, streamed to the delta file
+    with open(tmp_path / "contacts_delta.csv", encoding="utf-8") as f:
+        assert sum(1 for _ in f) - 1 == expected_unique(SYNTHETIC_AGENTS)
+
+
+def test_progress_only_counts_agents_when_bounded(tmp_path):
+    manager = ScraperManager([], [], 1, str(tmp_path / "out.csv"), enrich=False, memory_limit_mb=4096)
+    manager.add_connector(SyntheticConnector(50))
+    manager.run()
+    assert manager.progress.total_agents == 50
+    assert manager.progress.agents_since(0) == ([], 0)
+    assert manager.agents == []
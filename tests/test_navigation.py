@@ -0,0 +1,121 @@
+import threading
+import time
+import pytest
+from src.navigation import HTTP_4XX, CircuitBreaker, CircuitOpen, NavigationError, Navigator
+
+
+class Response:
+    def __init__(self, status):
+        self.status = status
+
+
+class TimeoutError(Exception):
+    """Stands in for playwright's TimeoutError, which is classified by name."""
+
+
+def scripted(*outcomes):
+    """An attempt function returning/raising each outcome in turn."""
+    outcomes = list(outcomes)
+    calls = []
+
+    def attempt():
+        calls.append(1)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return Response(outcome)
+
+    return attempt, calls
+
+
+def test_server_errors_and_timeouts_are_retried():
+    navigator = Navigator(retries=2, backoff=0)
+    attempt, calls = scripted(503, TimeoutError("30000ms exceeded"), 200)
+
+    assert navigator.fetch("https://a.example/x", attempt).status == 200
+    assert len(calls) == 3
+    assert navigator.stats["http_5xx"] == 1 and navigator.stats["timeout"] == 1 and navigator.stats["retries"] == 2
+
+
+def test_client_errors_are_not_retried():
+    navigator = Navigator(retries=2, backoff=0)
+    attempt, calls = scripted(404)
+
+    with pytest.raises(NavigationError) as error:
+        navigator.fetch("https://a.example/missing", attempt)
+    assert error.value.kind == HTTP_4XX and len(calls) == 1
+
+
+def test_breaker_short_circuits_failing_host():
+    navigator = Navigator(retries=1, backoff=0, breaker=CircuitBreaker(threshold=3, cooldown=60))
+    with pytest.raises(NavigationError):
+        navigator.fetch("https://down.example/1", scripted(ConnectionError(), ConnectionError())[0])
+    with pytest.raises(CircuitOpen):
+        navigator.fetch("https://down.example/2", scripted(ConnectionError(), ConnectionError())[0])
+
+    attempt, calls = scripted(200)
+    with pytest.raises(CircuitOpen):
+        navigator.fetch("https://down.example/3", attempt)
+    assert calls == []
+    assert navigator.stats["circuit_trips"] == 1 and navigator.stats["short_circuited"] == 1
+
+    # Other hosts are unaffected
+    assert navigator.fetch("https://up.example/", scripted(200)[0]).status == 200
+
+
+def test_breaker_probes_again_after_cooldown():
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    navigator = Navigator(retries=0, backoff=0, breaker=breaker)
+    with pytest.raises(CircuitOpen):
+        navigator.fetch("https://flaky.example/", scripted(500)[0])
+
+    assert navigator.fetch("https://flaky.example/", scripted(200)[0]).status == 200
+    assert not breaker.is_open("flaky.example")
+
+
+def test_half_open_breaker_lets_one_probe_through():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.05)
+    navigator = Navigator(retries=0, backoff=0, breaker=breaker)
+    with pytest.raises(CircuitOpen):
+        navigator.fetch("https://flaky.example/", scripted(500)[0])
+    time.sleep(0.06)
+
+    # Several threads (enrichment workers, service jobs) hit the host as the cooldown ends
+    release = threading.Event()
+    calls = []
+
+    def probe():
+        calls.append(1)
+        release.wait(5)
+        return Response(200)
+
+    outcomes = []
+
+    def fetch():
+        try:
+            outcomes.append(navigator.fetch("https://flaky.example/", probe).status)
+        except CircuitOpen:
+            outcomes.append("short")
+
+    threads = [threading.Thread(target=fetch) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    deadline = time.time() + 5
+    while outcomes.count("short") < 4 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and sorted(outcomes, key=str) == [200, "short", "short", "short", "short"]
+    assert breaker.acquire("flaky.example") and breaker.acquire("flaky.example")
+
+
+def test_failed_probe_reopens_for_another_cooldown():
+    breaker = CircuitBreaker(threshold=3, cooldown=0.05)
+    for _ in range(3):
+        breaker.failure("down.example")
+    time.sleep(0.06)
+    assert breaker.acquire("down.example")
+    assert not breaker.acquire("down.example")
+    assert breaker.failure("down.example")
+    assert not breaker.allows("down.example")
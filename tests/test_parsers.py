@@ -0,0 +1,152 @@
+import re
+import pytest
+from src.parsers import (
+    ParserPool,
+    iter_bhhs_roster,
+    iter_cb_agent_list,
+    iter_compass_cards,
+    iter_lf_roster,
+    parse_bhhs_roster,
+    parse_cb_agent_list,
+    parse_cb_page,
+    parse_compass_cards,
+    parse_lf_roster,
+    parse_profile_contact,
+)
+from src.planner import Target
+
+WAYNE = Target("Wayne", "PA", "19087")
+COMPASS_URL = "https://www.compass.com/agents/locations/wayne-pa/"
+
+
+def read_fixture(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+# (parser, iterator, page, page_url, extra args, expected agent count)
+CONFORMANCE_CASES = [
+    (parse_compass_cards, iter_compass_cards, "tests/fixtures/compass.html", "https://www.compass.com/agents/locations/wayne-pa/", (), 2),
+    (parse_cb_agent_list, iter_cb_agent_list, "tests/fixtures/cb_agents.html", "https://www.coldwellbankerhomes.com/pa/wayne/agents/", (WAYNE,), 2),
+    (parse_lf_roster, iter_lf_roster, "lf_dump.html", "https://www.longandfoster.com/real-estate-agents/Wayne-PA", (WAYNE,), 24),
+    (parse_bhhs_roster, iter_bhhs_roster, "bhhs_dump.html", "https://wayne-devon.foxroach.com/roster/agents", (WAYNE,), 10),
+]
+
+
+@pytest.mark.parametrize("parse, iterate, path, page_url, extra, expected", CONFORMANCE_CASES,
+                         ids=["compass", "cb", "lf", "bhhs"])
+def test_parser_conformance(parse, iterate, path, page_url, extra, expected):
+    html = read_fixture(path)
+    agents = parse(html, page_url, *extra)
+
+    assert len(agents) == expected
+    # Generator and list forms agree, and accept bytes as well as str
+    assert [a.full_name for a in iterate(html.encode("utf-8"), page_url, *extra)] == [a.full_name for a in agents]
+    for agent in agents:
+        assert agent.full_name and agent.first_name
+        assert agent.source and agent.brokerage
+        assert agent.source_url.startswith("https://")
+        # Every source stamps records in the same UTC format
+        assert re.fullmatch(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\dZ", agent.scraped_at)
+        assert not agent.phone or len(agent.phone) == 12
+    # Profile URLs are unique per page
+    assert len({a.source_url for a in agents}) == len(agents)
+
+
+def test_compass_cards_one_record_per_card():
+    agents = parse_compass_cards(read_fixture("tests/fixtures/compass.html"))
+    assert [a.full_name for a in agents] == ["Jane Doe", "John Smith"]
+    jane, john = agents
+    assert jane.email == "jane.doe@compass.com"
+    assert jane.phone == "555-123-4567"
+    assert jane.source_url == "https://www.compass.com/agents/jane-doe/"
+    assert john.email == "" and john.phone == ""
+    # Cards don't say where the agent works; the location page being parsed does
+    located = parse_compass_cards(read_fixture("tests/fixtures/compass.html"), COMPASS_URL, WAYNE)
+    assert {(a.city, a.state, a.zip_code) for a in located} == {("Wayne", "PA", "19087")}
+
+
+def test_cb_prefers_mobile_and_reads_office():
+    mary, tom = parse_cb_agent_list(read_fixture("tests/fixtures/cb_agents.html"),
+                                    "https://www.coldwellbankerhomes.com/pa/wayne/agents/", WAYNE)
+    assert mary.phone == "484-555-0199"
+    assert mary.brokerage == "Coldwell Banker - Wayne Office"
+    assert mary.source_url == "https://www.coldwellbankerhomes.com/pa/wayne/agent/mary-jones/aid_1001/"
+    assert (mary.city, mary.state, mary.zip_code) == ("Wayne", "PA", "19087")
+    assert tom.phone == "610-555-0100"
+    assert tom.brokerage == "Coldwell Banker - "
+
+
+def test_bhhs_dump_strips_titles_and_prefers_agent_line():
+    agents = parse_bhhs_roster(read_fixture("bhhs_dump.html"), "https://wayne-devon.foxroach.com/roster/agents", WAYNE)
+    carl = agents[0]
+    assert carl.full_name == "Carl Becht"
+    # Office line is listed first; the agent's own number carries the profile icon
+    assert carl.phone == "610-513-2637"
+    assert carl.source_url == "https://wayne-devon.foxroach.com/bio/carlbecht"
+    assert agents[-1].full_name == "Betty Angelucci"
+    assert all(a.email is None for a in agents)
+
+
+def test_lf_dump_dedupes_carousel_cards():
+    agents = parse_lf_roster(read_fixture("lf_dump.html"), "https://www.longandfoster.com/Office/x", WAYNE)
+    mark = next(a for a in agents if a.full_name == "Mark Stone")
+    assert mark.phone == "267-253-8544"
+    assert mark.source_url == "https://www.longandfoster.com/bio/markstone"
+    assert (mark.first_name, mark.last_name) == ("Mark", "Stone")
+    assert any(a.full_name == "Rhoda O'Donnell" for a in agents)
+
+
+def test_profile_contact():
+    html = '<a href="tel:610.555.0100">Call</a><a href="mailto:a.b@cb.com?subject=Hi">Email</a>'
+    assert parse_profile_contact(html) == ("a.b@cb.com", "610-555-0100")
+    assert parse_profile_contact("<p>nothing</p>") == (None, None)
+
+
+def test_pool_parses_in_worker_processes():
+    html = read_fixture("lf_dump.html")
+    with ParserPool(workers=2) as pool:
+        futures = [pool.submit(parse_lf_roster, html, "https://www.longandfoster.com/", WAYNE) for _ in range(4)]
+        results = [f.result(timeout=60) for f in futures]
+    assert all(len(agents) == 24 for agents in results)
+
+
+def test_inline_pool_reports_parser_errors():
+    pool = ParserPool(workers=0)
+    future = pool.submit(parse_compass_cards, None)
+    assert future.exception() is not None
+
+
+CB_PAGER = """
+<div class="agent-block"><div class="agent-content-name"><a href="/pa/wayne/agent/a/aid_1/">A B</a></div></div>
+<ul class="pagination">
+  <li><a href="/pa/wayne/agents/">1</a></li>
+  <li><a href="/pa/wayne/agents/p_2/">2</a></li>
+  <li><a href="/pa/wayne/agents/p_3/">3</a></li>
+  {next}
+</ul>
+"""
+
+
+def test_cb_page_reads_last_page_from_pager():
+    url = "https://www.coldwellbankerhomes.com/pa/wayne/agents/"
+    agents, last = parse_cb_page(CB_PAGER.format(next=""), url, WAYNE, 1)
+    assert len(agents) == 1 and last == 3
+
+    # On the last page the pager only links backwards
+    assert parse_cb_page(CB_PAGER.format(next=""), url, WAYNE, 4)[1] == 4
+
+    # A windowed pager with a Next link guarantees at least one more page
+    windowed = CB_PAGER.format(next='<li class="next"><a href="/pa/wayne/agents/p_4/">Next</a></li>')
+    assert parse_cb_page(windowed, url, WAYNE, 4)[1] == 5
+
+    # No pager at all: unknown, the connector falls back to stopping on an empty page
+    assert parse_cb_page(read_fixture("tests/fixtures/cb_agents.html"), url, WAYNE, 1)[1] is None
+
+
+def test_decoded_pages_ignore_their_declared_charset():
+    html = ('<html><head><meta charset="iso-8859-1"></head>'
+            '<body><div class="agent-block"><div class="agent-content-name"><a href="/a/1">Ann Núñez</a></div>'
+            '<p class="office"><a>Wayne</a></p></div></body></html>')
+    agents = parse_cb_agent_list(html, "https://www.coldwellbankerhomes.com/pa/wayne/agents/", WAYNE)
+    assert [a.full_name for a in agents] == ["Ann Núñez"]
@@ -0,0 +1,58 @@
+from src.connectors import create_connector
+from src.planner import Target, build_targets, canonical_url, plan_scrape, split_town_list
+
+
+def test_area_expands_from_gazetteer():
+    targets = build_targets([], [], area="main line")
+    labels = {t.label for t in targets}
+    assert {"Wayne, PA", "Bryn Mawr, PA", "Villanova, PA"} <= labels
+    wayne = next(t for t in targets if t.town == "Wayne")
+    assert wayne.zip_code == "19087"
+
+
+def test_zips_expand_to_towns_and_dedupe_with_towns():
+    targets = build_targets(["Wayne, PA", "wayne, pa"], ["19087", "99999"])
+    assert [t.label for t in targets] == ["Wayne, PA", "Radnor, PA", "St. Davids, PA", "Strafford, PA"]
+
+
+def test_unknown_town_keeps_input_state():
+    (target,) = build_targets(["Springfield, il"], [])
+    assert target == Target("Springfield", "IL")
+
+
+def test_split_town_list_keeps_state_pairs():
+    assert split_town_list("Wayne, PA,Devon, pa, Ridgewood") == ["Wayne, PA", "Devon, PA", "Ridgewood"]
+
+
+def test_canonical_url_ignores_case_slash_and_query_order():
+    assert canonical_url("https://www.foxroach.com/roster/agents?state=PA&city=Wayne") == \
+        canonical_url("HTTPS://WWW.FOXROACH.COM/roster/agents/?city=wayne&state=pa")
+
+
+def test_plan_collapses_towns_sharing_a_roster():
+    targets = build_targets(["Strafford, PA", "Wayne, PA", "Rosemont, PA", "Bryn Mawr, PA"], [])
+    plan = plan_scrape(targets, [create_connector("bhhs"), create_connector("cb")], max_pages=2)
+
+    bhhs = plan.connectors["BHHS"]
+    assert len(bhhs.requests) == 2 and bhhs.collapsed == 2
+    assert [t.town for t in bhhs.requests[0].targets] == ["Strafford", "Wayne"]
+    assert "city=Wayne" in bhhs.requests[0].url
+    # Agents from the shared roster are stamped with the roster's town, not whichever target came first
+    assert bhhs.requests[0].target == Target("Wayne", "PA", "19087")
+
+    cb = plan.connectors["ColdwellBanker"]
+    assert cb.requests[1].url == "https://www.coldwellbankerhomes.com/pa/bryn-mawr/agents/"
+    assert cb.est_page_loads > bhhs.est_page_loads
+
+
+def plan_output(monkeypatch, capsys, *args):
+    import main
+    monkeypatch.setattr("src.utils.setup_logger", lambda: None)
+    main.main([*args, "--sources", "bhhs", "--plan"])
+    return capsys.readouterr().out
+
+
+def test_default_towns_apply_only_without_inputs(monkeypatch, capsys):
+    assert "Ridgewood" not in plan_output(monkeypatch, capsys, "--towns", "Wayne, PA")
+    assert "Ridgewood" not in plan_output(monkeypatch, capsys, "--area", "Main Line")
+    assert "Ridgewood" in plan_output(monkeypatch, capsys)
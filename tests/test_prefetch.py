@@ -0,0 +1,134 @@
+import pytest
+from src.connectors.coldwell_banker import CBConnector
+from src.connectors.prefetch import TabPrefetcher
+from src.navigation import HTTP_5XX, CircuitBreaker, CircuitOpen, NavigationError, Navigator
+
+
+class FakeResponse:
+    def __init__(self, status, frame):
+        self.status = status
+        self.frame = frame
+        self.request = self
+
+    def is_navigation_request(self):
+        return True
+
+
+class FakeTab:
+    def __init__(self, log, status=200):
+        self.log = log
+        self.status = status
+        self.url = "about:blank"
+        self.closed = False
+        self.main_frame = object()
+        self.listeners = []
+
+    def on(self, event, callback):
+        assert event == "response"
+        self.listeners.append(callback)
+
+    def evaluate(self, script, url):
+        self.url = url
+        self.log.append(("start", url))
+        for callback in self.listeners:
+            callback(FakeResponse(self.status, self.main_frame))
+
+    def wait_for_url(self, predicate, timeout):
+        assert predicate(self.url)
+
+    def wait_for_load_state(self, state, timeout):
+        pass
+
+    def wait_for_timeout(self, ms):
+        pass
+
+    def content(self):
+        return f"<html>{self.url}</html>"
+
+    def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self, status=200):
+        self.log = []
+        self.tabs = []
+        self.status = status
+
+    def new_page(self):
+        tab = FakeTab(self.log, self.status)
+        self.tabs.append(tab)
+        return tab
+
+
+def test_prefetch_respects_depth_and_reuses_tab():
+    context = FakeContext()
+    prefetcher = TabPrefetcher(context, depth=1, settle_ms=0)
+    prefetcher.schedule("p2")
+    prefetcher.schedule("p3")  # depth used up
+    prefetcher.schedule("p2")  # already in flight
+    assert prefetcher.in_flight == ["p2"]
+
+    assert prefetcher.take("p2") == "<html>p2</html>"
+    assert context.log == [("start", "p2")]
+    assert context.tabs[0].closed
+
+
+def test_take_without_prefetch_loads_directly():
+    context = FakeContext()
+    prefetcher = TabPrefetcher(context, depth=0, settle_ms=0)
+    prefetcher.schedule("p1")
+    assert prefetcher.in_flight == []
+    assert prefetcher.take("p1") == "<html>p1</html>"
+
+
+def test_discard_closes_unwanted_tabs():
+    context = FakeContext()
+    prefetcher = TabPrefetcher(context, depth=2, settle_ms=0)
+    prefetcher.schedule("p2")
+    prefetcher.schedule("p3")
+    prefetcher.discard(keep={"p2"}.__contains__)
+    assert prefetcher.in_flight == ["p2"]
+    assert context.tabs[1].closed and not context.tabs[0].closed
+
+
+def test_error_status_in_a_prefetched_tab_raises():
+    context = FakeContext(status=503)
+    prefetcher = TabPrefetcher(context, depth=1, settle_ms=0)
+    prefetcher.schedule("https://cb.example/pa/wayne/agents/")
+    with pytest.raises(NavigationError) as error:
+        prefetcher.take("https://cb.example/pa/wayne/agents/")
+    assert error.value.kind == HTTP_5XX and context.tabs[0].closed
+
+
+class ListPage:
+    """The connector's own tab, used when the prefetched copy is unusable."""
+
+    status = 200
+
+    def goto(self, url, **kwargs):
+        self.url = url
+        return self
+
+    def wait_for_timeout(self, ms):
+        pass
+
+    def content(self):
+        return f"<html>direct {self.url}</html>"
+
+
+def test_cb_list_page_with_error_status_is_retried_and_counted():
+    connector = CBConnector(rate_limit=0, base_url="https://cb.example")
+    connector.navigator = Navigator(retries=0, backoff=0)
+    prefetcher = TabPrefetcher(FakeContext(status=503), depth=1, settle_ms=0)
+    url = "https://cb.example/pa/wayne/agents/"
+
+    assert connector._load_list_page(prefetcher, ListPage(), url) == f"<html>direct {url}</html>"
+    stats = connector.navigator.stats
+    assert stats[HTTP_5XX] == 1 and stats["ok"] == 1 and stats["attempts"] == 2
+
+    # The failed prefetch counts towards the breaker: at a threshold of one it opens straight away
+    connector.navigator = Navigator(retries=0, backoff=0, breaker=CircuitBreaker(threshold=1))
+    with pytest.raises(CircuitOpen):
+        connector._load_list_page(TabPrefetcher(FakeContext(status=503), settle_ms=0), ListPage(), url)
+    assert connector.navigator.stats["circuit_trips"] == 1
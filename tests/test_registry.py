@@ -0,0 +1,33 @@
+import subprocess
+import sys
+import pytest
+from src.connectors import create_connector, resolve_source
+
+
+def test_aliases_resolve_to_short_names():
+    assert resolve_source("ColdwellBanker") == "cb"
+    assert resolve_source(" longandfoster ") == "lf"
+    assert resolve_source("BHHS") == "bhhs"
+    with pytest.raises(KeyError):
+        resolve_source("zillow")
+
+
+def test_create_connector_loads_selected_module():
+    connector = create_connector("bhhs", rate_limit=0.5)
+    assert connector.name == "BHHS"
+    assert connector.rate_limit == 0.5
+
+
+def test_help_does_not_import_connectors_or_pandas():
+    code = (
+        "import sys; sys.argv = ['main.py', '--help']\n"
+        "import main\n"
+        "try:\n"
+        "    main.main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "heavy = [m for m in ('pandas', 'playwright', 'src.connectors.compass') if m in sys.modules]\n"
+        "print('HEAVY:' + ','.join(heavy))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "HEAVY:"
@@ -0,0 +1,169 @@
+import threading
+from loguru import logger
+from src.connectors.base_connector import BaseConnector
+from src.enrichment import ContactCache, EmailEnricher
+from src.models import Agent
+from src.budget import ScrapeBudget
+from src.progress import DONE, CANCELLED
+from src.scraper_manager import ScraperManager
+from src.worker import ScrapeWorker
+
+
+class FakeConnector(BaseConnector):
+    def __init__(self, name="Fake", count=5, gate=None, distinct=None):
+        super().__init__(name, rate_limit=0)
+        self.count = count
+        self.gate = gate
+        # Only the first `distinct` agents are new; the rest repeat them
+        self.distinct = distinct or count
+        self.yielded = 0
+
+    def scrape(self, towns, zips, max_pages):
+        self._set_pages_total(self.count)
+        for i in range(self.count):
+            if self.should_stop():
+                break
+            if self.gate is not None and i == 2:
+                self.gate.wait(5)
+            n = i % self.distinct
+            self.yielded += 1
+            yield Agent(first_name="Agent", last_name=f"{self.name}{n}", full_name=f"Agent {self.name}{n}",
+                        phone=f"555-{self.name}-{n:04d}", source=self.name)
+            self._advance()
+
+
+def test_run_reports_per_connector_progress(tmp_path):
+    manager = ScraperManager(["Wayne, PA"], [], 1, str(tmp_path / "out.csv"))
+    manager.add_connector(FakeConnector("A", count=3))
+    manager.add_connector(FakeConnector("B", count=2))
+
+    manager.run()
+
+    snapshot = {p.name: p for p in manager.progress.snapshot()}
+    assert snapshot["A"].status == DONE and snapshot["A"].agents == 3
+    assert snapshot["B"].pages_done == snapshot["B"].pages_total == 2
+    agents, offset = manager.progress.agents_since(0)
+    assert offset == 5 and len(agents) == 5
+    assert (tmp_path / "out.csv").exists()
+
+
+def test_worker_cancel_stops_remaining_connectors(tmp_path):
+    gate = threading.Event()
+    manager = ScraperManager(["Wayne, PA"], [], 1, str(tmp_path / "out.csv"))
+    manager.add_connector(FakeConnector("A", count=100, gate=gate))
+    manager.add_connector(FakeConnector("B", count=3))
+
+    worker = ScrapeWorker(manager)
+    worker.start()
+    worker.cancel()
+    gate.set()
+    worker.join(5)
+
+    assert not worker.is_alive()
+    assert worker.progress.status == CANCELLED
+    snapshot = {p.name: p for p in worker.progress.snapshot()}
+    assert snapshot["A"].agents < 100
+    assert snapshot["B"].status == CANCELLED and snapshot["B"].agents == 0
+
+
+def test_target_unique_ends_run_early(tmp_path):
+    manager = ScraperManager(["Wayne, PA"], [], 1, str(tmp_path / "out.csv"), budget=ScrapeBudget(target_unique=4))
+    a, b = FakeConnector("A", count=3), FakeConnector("B", count=100)
+    c = FakeConnector("C", count=5)
+    for connector in (a, b, c):
+        manager.add_connector(connector)
+
+    manager.run()
+
+    assert manager.budget.unique == 4
+    assert b.yielded == 1 and c.yielded == 0
+    assert {p.status for p in manager.progress.snapshot()} == {DONE}
+
+
+def test_source_stops_when_new_rate_drops(tmp_path):
+    budget = ScrapeBudget(min_new_rate=0.5, rate_window=10)
+    manager = ScraperManager(["Wayne, PA"], [], 1, str(tmp_path / "out.csv"), budget=budget)
+    stale = FakeConnector("Stale", count=1000, distinct=5)
+    fresh = FakeConnector("Fresh", count=20)
+    manager.add_connector(stale)
+    manager.add_connector(fresh)
+
+    manager.run()
+
+    # 5 new then repeats: the 10-agent window falls below 50% after 11 agents
+    assert stale.yielded == 11
+    # The rate window restarts for each source
+    assert fresh.yielded == 20
+
+
+def test_source_deadline(tmp_path):
+    manager = ScraperManager(["Wayne, PA"], [], 1, str(tmp_path / "out.csv"), budget=ScrapeBudget(source_deadline=0))
+    slow = FakeConnector("Slow", count=50)
+    manager.add_connector(slow)
+    manager.run()
+    # The connector checks the budget itself before producing anything
+    assert slow.yielded == 0
+
+
+def test_profile_visit_allowance_is_shared():
+    manager = ScraperManager(["Wayne, PA"], [], 1, budget=ScrapeBudget(max_profile_visits=3))
+    a, b = FakeConnector("A"), FakeConnector("B")
+    manager.add_connector(a)
+    manager.add_connector(b)
+    assert [a.allow_profile_visit(), a.allow_profile_visit(), b.allow_profile_visit(), b.allow_profile_visit()] == [True, True, True, False]
+
+
+class ProfileConnector(FakeConnector):
+    """Agents with profile links and no email, so the run has an enrichment stage."""
+
+    def scrape(self, towns, zips, max_pages):
+        for agent in super().scrape(towns, zips, max_pages):
+            agent.source_url = f"https://example.com/{agent.last_name}"
+            yield agent
+
+
+def test_worker_log_includes_enrichment_threads(tmp_path, monkeypatch):
+    class FakeBrowser:
+        def new_context(self, **kwargs):
+            return self
+
+        def new_page(self):
+            return self
+
+        def close(self):
+            pass
+
+    def visit(self, page, url):
+        logger.info(f"Visiting profile: {url}")
+        return None
+
+    monkeypatch.setattr("src.enrichment.launch_browser", lambda p, endpoint: FakeBrowser())
+    monkeypatch.setattr(EmailEnricher, "_visit", visit)
+    workers = []
+    for name in ("A", "B"):
+        manager = ScraperManager(["Wayne, PA"], [], 1, str(tmp_path / f"{name}.csv"), parser_workers=0,
+                                 enrich_concurrency=1, contact_cache=ContactCache(str(tmp_path / f"{name}.json")))
+        manager.add_connector(ProfileConnector(name, count=2))
+        workers.append(ScrapeWorker(manager))
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+
+    for worker, name, other in zip(workers, "AB", "BA"):
+        lines = "".join(worker.progress.logs(1000))
+        assert f"Visiting profile: https://example.com/{name}0" in lines
+        assert f"https://example.com/{other}0" not in lines
+
+
+def test_zero_limits_count_as_budgets(tmp_path):
+    assert ScrapeBudget().unlimited
+    assert not ScrapeBudget(max_profile_visits=0).unlimited
+    assert not ScrapeBudget(min_new_rate=0.0).unlimited
+
+    manager = ScraperManager(["Wayne, PA"], [], 1, str(tmp_path / "out.csv"), parser_workers=0, enrich=False,
+                             budget=ScrapeBudget(target_unique=0))
+    connector = FakeConnector("A", count=3)
+    manager.add_connector(connector)
+    manager.run()
+    assert connector.yielded == 0 and manager.collected == 0
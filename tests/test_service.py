@@ -0,0 +1,137 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import pytest
+from src.progress import CANCELLED, DONE
+from src.service import JobRequest, ScrapeService, ServiceBusy, make_server
+from tests.test_scraper_manager import FakeConnector
+
+GATE = threading.Event()
+
+
+def fake_connector(source):
+    # "bhhs" waits on GATE so tests can hold a job in the running state
+    return FakeConnector(source, count=4, gate=GATE if source == "bhhs" else None)
+
+
+@pytest.fixture
+def service(tmp_path):
+    GATE.clear()
+    service = ScrapeService(max_concurrent=1, max_queued=2, output_dir=str(tmp_path), parser_workers=0,
+                            shared_browser=False, index_path=None, contacts_path=None,
+                            connector_factory=fake_connector)
+    service.start()
+    yield service
+    GATE.set()
+    service.stop()
+
+
+@pytest.fixture
+def api(service):
+    server = make_server(service, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def call(method, url, payload=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, response.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode()
+
+
+def wait_for(job, timeout=10):
+    deadline = time.time() + timeout
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.05)
+    assert job.finished
+
+
+def test_job_lifecycle_over_http(api, service):
+    status, body = call("POST", f"{api}/jobs", {"towns": "Wayne, PA; Devon, PA", "sources": "cb,lf"})
+    assert status == 202
+    job_id = json.loads(body)["id"]
+    wait_for(service.get(job_id))
+
+    status, body = call("GET", f"{api}/jobs/{job_id}")
+    job = json.loads(body)
+    assert job["status"] == DONE and job["agents_collected"] == 8 and job["unique_agents"] == 8
+    assert {p["name"] for p in job["progress"]} == {"cb", "lf"}
+
+    page = json.loads(call("GET", f"{api}/jobs/{job_id}/agents?since=5")[1])
+    assert len(page["agents"]) == 3 and page["next"] == 8 and page["finished"]
+    streamed = call("GET", f"{api}/jobs/{job_id}/stream")[1].splitlines()
+    assert len(streamed) == 8 and json.loads(streamed[0])["source"] == "cb"
+    csv_text = call("GET", f"{api}/jobs/{job_id}/results")[1]
+    assert csv_text.startswith("first_name,") and len(csv_text.splitlines()) == 9
+
+    assert json.loads(call("GET", f"{api}/health")[1])["running"] == []
+    assert call("GET", f"{api}/jobs/nope")[0] == 404
+
+
+def test_invalid_jobs_are_rejected(api):
+    assert call("POST", f"{api}/jobs", {"towns": ["Wayne, PA"], "sources": ["zillow"]})[0] == 400
+    assert call("POST", f"{api}/jobs", {"towns": ["Wayne, PA"], "pages": 3})[0] == 400
+    assert call("POST", f"{api}/jobs", {"sources": ["cb"]})[0] == 400
+    # Wrong types are refused up front instead of failing inside the runner
+    for bad in ({"towns": 5}, {"max_pages": "abc"}, {"max_pages": 0}, {"zips": [19087]},
+                {"enrich": "yes"}, {"target_unique": True}, {"min_new_rate": -1}):
+        status, body = call("POST", f"{api}/jobs", {"towns": ["Wayne, PA"], **bad})
+        assert status == 400, bad
+    assert call("POST", f"{api}/jobs", {"towns": ["Wayne, PA"], "sources": ["cb"], "area": None,
+                                        "source_deadline": 30, "min_new_rate": 0.2})[0] == 202
+
+
+def test_memory_bounded_jobs_refuse_agent_polling(api, service):
+    status, body = call("POST", f"{api}/jobs", {"towns": ["Wayne, PA"], "sources": ["cb"], "memory_limit_mb": 4096})
+    job_id = json.loads(body)["id"]
+    wait_for(service.get(job_id))
+    assert call("GET", f"{api}/jobs/{job_id}/agents")[0] == 409
+    assert call("GET", f"{api}/jobs/{job_id}/stream")[0] == 409
+    assert len(call("GET", f"{api}/jobs/{job_id}/results")[1].splitlines()) == 5
+
+
+def test_queue_is_bounded_and_queued_jobs_cancel(service):
+    running = service.submit(JobRequest(towns=["Wayne, PA"], sources=["bhhs"]))
+    deadline = time.time() + 5
+    while running.id not in service.health()["running"] and time.time() < deadline:
+        time.sleep(0.05)
+    queued = [service.submit(JobRequest(towns=["Wayne, PA"], sources=["cb"])) for _ in range(2)]
+    with pytest.raises(ServiceBusy):
+        service.submit(JobRequest(towns=["Wayne, PA"], sources=["cb"]))
+
+    service.cancel(queued[0].id)
+    assert queued[0].status == CANCELLED
+    GATE.set()
+    wait_for(running)
+    wait_for(queued[1])
+    assert running.status == DONE and queued[1].status == DONE
+    # The cancelled job never ran
+    assert queued[0].started_at is None and queued[0].manager.collected == 0
+
+
+def test_jobs_share_warm_resources(service):
+    first = service.submit(JobRequest(towns=["Wayne, PA"], sources=["cb"]))
+    second = service.submit(JobRequest(towns=["Devon, PA"], sources=["lf"]))
+    wait_for(first)
+    wait_for(second)
+    assert first.manager.parser_pool is second.manager.parser_pool is service.parser_pool
+    assert first.manager.navigator.breaker is second.manager.navigator.breaker
+    assert first.manager.contact_cache is service.contact_cache
+
+
+def test_serve_subcommand_keeps_default_cli(capsys):
+    import main
+    with pytest.raises(SystemExit):
+        main.main(["serve", "--help"])
+    assert "--max_concurrent" in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        main.main(["--help"])
+    assert "--towns" in capsys.readouterr().out
@@ -0,0 +1,95 @@
+import pickle
+from dataclasses import replace
+import pytest
+import requests
+from src.connectors import CONNECTORS, create_connector, default_sources
+from src.connectors.sites import COLDWELL_BANKER
+from src.connectors.spec_connector import SpecConnector
+from src.fixture_server import FixtureConfig, FixtureServer
+from src.parsers import parse_cb_page
+from src.parsers.spec import NUMBERED, Field, SiteSpec, parse_spec_page
+from src.planner import Target
+from src.scraper_manager import ScraperManager
+
+# The ported Coldwell Banker spec, fetched over HTTP from the fixture server's CB pages
+CB_SPEC = replace(COLDWELL_BANKER, source="SpecCB", render=False)
+
+CARDS = """
+<ul>
+  <li class="card"><a class="who" href="/a/1">Jane  Doe</a><a href="tel:+1 (610) 555-0101">Call</a>
+      <a href="mailto:jane@example.com?subject=Hi">Email</a></li>
+  <li class="card"><a class="who" href="/a/1">Jane Doe</a></li>
+  <li class="card"><span class="who"></span></li>
+</ul>
+<a rel="next" href="?page=2">Next</a>
+"""
+
+
+def test_spec_parser_extracts_fields_and_next_link():
+    spec = SiteSpec(source="X", brokerage="X Realty", site="https://x.example", roster_url="{site}/{city_slug}",
+                    card="li.card", name=Field("a.who"), phone=Field('a[href^="tel:"]', "href"),
+                    email=Field('a[href^="mailto:"]', "href"), profile_url=Field("a.who", "href"),
+                    pagination=NUMBERED, next_link='a[rel="next"]', render=False)
+    agents, more = parse_spec_page(CARDS, "https://x.example/wayne", Target("Wayne", "PA"), spec)
+
+    assert more
+    assert len(agents) == 1  # the repeated card and the nameless one are dropped
+    agent = agents[0]
+    assert (agent.first_name, agent.last_name) == ("Jane", "Doe")
+    assert agent.phone == "610-555-0101" and agent.email == "jane@example.com"
+    assert agent.source_url == "https://x.example/a/1" and agent.brokerage == "X Realty"
+    # Specs travel to the parser pool's worker processes
+    assert pickle.loads(pickle.dumps(spec)) == spec
+    assert spec.url_for(Target("King of Prussia", "PA")) == "https://x.example/king-of-prussia"
+
+
+def test_spec_validation():
+    with pytest.raises(ValueError):
+        SiteSpec(source="X", brokerage="X", site="", roster_url="", card="", name=Field("a"), pagination="infinite")
+    with pytest.raises(ValueError):
+        SiteSpec(source="X", brokerage="X", site="", roster_url="", card="", name=Field("a"), pagination=NUMBERED)
+
+
+def test_spec_connector_pages_and_visits_profiles(tmp_path):
+    config = FixtureConfig(agents_per_town=50, cb_page_size=20)
+    with FixtureServer(config) as server:
+        manager = ScraperManager(["Wayne, PA", "Devon, PA"], [], 5, str(tmp_path / "out.csv"), enrich=False)
+        connector = SpecConnector(CB_SPEC, rate_limit=0, site=server.base_url)
+        connector._sleep = lambda: None  # skip the rate-limit jitter between the 100 profile visits
+        manager.add_connector(connector)
+        manager.run()
+
+    # Three list pages per town (20 + 20 + 10), stopping where the pager does
+    assert server.stats["cb_list"] == 6
+    assert server.stats["cb_profile"] == manager.collected == 100
+    assert all(a.email and a.phone for a in manager.results())
+    snapshot = {p.name: p for p in manager.progress.snapshot()}
+    assert snapshot["SpecCB"].pages_done == snapshot["SpecCB"].pages_total == 2
+
+
+def test_spec_connector_defers_profiles_to_enrichment(tmp_path):
+    with FixtureServer(FixtureConfig(agents_per_town=30)) as server:
+        connector = SpecConnector(CB_SPEC, rate_limit=0, site=server.base_url)
+        connector.defer_profiles = True
+        agents = list(connector.scrape(["Wayne, PA"], [], 1))
+
+    assert len(agents) == 24 and not any(a.email for a in agents)
+    assert server.stats["cb_list"] == 1 and server.stats["cb_profile"] == 0
+
+
+def test_ported_cb_spec_matches_the_cb_parser_and_is_opt_in():
+    with FixtureServer(FixtureConfig(agents_per_town=30)) as server:
+        html = requests.get(f"{server.base_url}/pa/wayne/agents/", timeout=10).text
+    target = Target("Wayne", "PA")
+    url = "https://www.coldwellbankerhomes.com/pa/wayne/agents/"
+    spec_agents, more = parse_spec_page(html, url, target, COLDWELL_BANKER)
+    cb_agents, _ = parse_cb_page(html, url, target, 1)
+    assert more and len(spec_agents) == len(cb_agents) == 24
+    assert [(a.full_name, a.phone, a.brokerage, a.source_url) for a in spec_agents] == \
+        [(a.full_name, a.phone, a.brokerage, a.source_url) for a in cb_agents]
+
+    assert "cbspec" not in default_sources()
+    connector = create_connector("cbspec", rate_limit=0.5)
+    assert connector.rate_limit == 0.5 and connector.roster_url(target) == url
+    # Specs whose selectors haven't been checked against the live sites stay out of the registry
+    assert "kw" not in CONNECTORS and "remax" not in CONNECTORS